@@ -1,25 +1,121 @@
 """
 Flask application factory.
 """
+import atexit
 from flask import Flask
-from app.api import api_bp
+from app import db, enrichment, metrics, reports
+from app.api import api_bp, configure_response_cache
+from app.compression import compress_response
+from app.profiling import RequestProfiler
+from app.serialization import InventoryJSONProvider
+from app.storage import open_backend
+from app.external_api import configure_cache, configure_client
 
 def create_app(test_config=None):
     """Create and configure the Flask application."""
     app = Flask(__name__, instance_relative_config=True)
+    # Inventory records are converted to dicts only when serialized
+    app.json = InventoryJSONProvider(app)
     
     # Default configuration
     app.config.from_mapping(
         SECRET_KEY='dev',
-        DEBUG=True
+        DEBUG=False,
+        # Inventory persistence: None keeps the in-memory mock data,
+        # "sqlite:///path" uses SQLite, "sqlite+shared:///path" SQLite
+        # shared by several worker processes, any other value is a WAL directory
+        INVENTORY_STORAGE=None,
+        INVENTORY_STORAGE_DURABLE=True,
+        INVENTORY_SNAPSHOT_EVERY=100000,
+        # Recent changes kept for GET /inventory/changes
+        INVENTORY_CHANGE_RETENTION=10000,
+        # Default reorder level for GET /inventory/low-stock and /inventory/stats
+        LOW_STOCK_THRESHOLD=10,
+        # Total size of serialized GET /inventory responses kept in memory
+        RESPONSE_CACHE_BYTES=64 * 1024 * 1024,
+        # gzip/brotli for responses the client accepts compressed;
+        # COMPRESS_LEVEL=0 turns compression off
+        COMPRESS_MIN_SIZE=1024,
+        COMPRESS_LEVEL=6,
+        # OpenFoodFacts barcode lookup cache
+        LOOKUP_CACHE_SIZE=10000,
+        LOOKUP_CACHE_TTL=3600,
+        LOOKUP_CACHE_NEGATIVE_TTL=300,
+        LOOKUP_CACHE_PATH=None,
+        # HTTP client used for OpenFoodFacts
+        UPSTREAM_POOL_SIZE=10,
+        UPSTREAM_CONNECT_TIMEOUT=3.05,
+        UPSTREAM_READ_TIMEOUT=10,
+        UPSTREAM_RETRIES=2,
+        UPSTREAM_BACKOFF=0.2,
+        UPSTREAM_BREAKER_THRESHOLD=5,
+        UPSTREAM_BREAKER_RESET=30,
+        UPSTREAM_MAX_PER_HOST=None,
+        # Token-bucket request budget for OpenFoodFacts, which asks for at
+        # most 100 product requests per minute. None disables it. Workers
+        # sharing UPSTREAM_RATE_FILE share one budget; otherwise each
+        # process has its own. Background jobs leave UPSTREAM_RATE_RESERVE
+        # tokens for interactive lookups, and callers queue for at most
+        # the lane's wait before failing with 503
+        UPSTREAM_RATE=None,
+        UPSTREAM_BURST=10,
+        UPSTREAM_RATE_FILE=None,
+        UPSTREAM_RATE_RESERVE=2,
+        UPSTREAM_INTERACTIVE_WAIT=5,
+        UPSTREAM_BACKGROUND_WAIT=60,
+        # Worker threads used by POST /lookup/barcode/batch
+        BATCH_LOOKUP_WORKERS=8,
+        # Background enrichment of items missing brands or ingredients
+        # (POST /inventory/enrichment). OpenFoodFacts asks for at most
+        # 100 product requests per minute; ENRICHMENT_CHECKPOINT is a JSON
+        # file that lets an interrupted job resume
+        ENRICHMENT_CHECKPOINT=None,
+        ENRICHMENT_BATCH_SIZE=100,
+        ENRICHMENT_WORKERS=4,
+        ENRICHMENT_RATE=1.5,
+        # Lookups served by the ASGI entry point (app.asgi)
+        ASYNC_UPSTREAM_POOL_SIZE=100,
+        ASYNC_LOOKUP_CONCURRENCY=100,
+        # Production server (app.server); more than one worker process
+        # needs a shared INVENTORY_STORAGE
+        SERVER_BIND="127.0.0.1:8000",
+        SERVER_WORKERS=1,
+        SERVER_THREADS=8,
+        SERVER_GRACEFUL_TIMEOUT=30,
+        # Answer requests carrying ?profile=1 with a cProfile summary;
+        # development only
+        PROFILE_REQUESTS=False
     )
+    # Any of the above can be set from the environment, e.g. FLASK_SERVER_WORKERS=4
+    app.config.from_prefixed_env()
     
     if test_config:
         # Load test config if passed
         app.config.from_mapping(test_config)
     
+    if app.config['INVENTORY_STORAGE']:
+        backend = open_backend(
+            app.config['INVENTORY_STORAGE'],
+            durable=app.config['INVENTORY_STORAGE_DURABLE'],
+            snapshot_every=app.config['INVENTORY_SNAPSHOT_EVERY']
+        )
+        atexit.register(db.configure_storage(backend).close)
+    db.configure_change_feed(app.config['INVENTORY_CHANGE_RETENTION'])
+    configure_response_cache(app.config['RESPONSE_CACHE_BYTES'])
+    configure_lookups(app.config)
+    
     # Register blueprints
+    metrics.instrument(app)
     app.register_blueprint(api_bp)
+    app.register_blueprint(metrics.metrics_bp)
+    app.register_blueprint(reports.reports_bp)
+    app.register_blueprint(enrichment.enrichment_bp)
+    if db.store.shared:
+        # Pick up other worker processes' writes before serving a request
+        app.before_request(db.sync_store)
+    app.after_request(compress_response)
+    if app.config['PROFILE_REQUESTS']:
+        app.wsgi_app = RequestProfiler(app.wsgi_app)
     
     # Simple index route
     @app.route('/')
@@ -27,14 +123,74 @@ def create_app(test_config=None):
         return {
             "message": "Inventory Management System API",
             "endpoints": {
-                "GET /inventory": "Fetch all items",
+                "GET /inventory": "Fetch items (?limit=, ?after=, ?fields=, ?brand=, ?min_/max_quantity=, ?min_/max_price=)",
+                "GET /inventory/search": "Full-text search over the inventory (?q=, ?limit=)",
+                "GET /inventory/low-stock": "Items below a reorder level, lowest first (?threshold=, ?limit=)",
+                "GET /inventory/stats": "Item count, units in stock and stock value (?threshold=)",
+                "GET /inventory/export": "Stream all items (?format=ndjson|csv)",
+                "GET /inventory/changes": "Changes after a feed position (?since=, ?limit=, ?wait=)",
+                "GET /inventory/changes/stream": "Push changes as server-sent events (?since=)",
+                "POST /inventory/enrichment": "Start filling in missing brands and ingredients from OpenFoodFacts",
+                "GET /inventory/enrichment": "Progress of the enrichment job",
+                "DELETE /inventory/enrichment": "Stop the enrichment job",
                 "GET /inventory/<id>": "Fetch a specific item",
                 "POST /inventory": "Create a new item",
-                "PATCH /inventory/<id>": "Update an item",
+                "PATCH /inventory/<id>": "Update an item (honours If-Match)",
+                "POST /inventory/<id>/adjust": "Atomically change an item's quantity by a delta",
                 "DELETE /inventory/<id>": "Delete an item",
+                "POST /inventory/bulk": "Create many items",
+                "PATCH /inventory/bulk": "Update many items",
+                "DELETE /inventory/bulk": "Delete many items",
                 "GET /lookup/barcode/<barcode>": "Lookup product by barcode",
-                "GET /lookup/name/<name>": "Search products by name"
+                "POST /lookup/barcode/batch": "Lookup many barcodes concurrently",
+                "GET /lookup/name/<name>": "Search products by name (inventory first, then OpenFoodFacts)",
+                "GET /lookup/stats": "Lookup cache and request coalescing statistics",
+                "GET /reports/brands": "Items, units, stock value and prices per brand (?limit=)",
+                "GET /reports/categories": "Items, units, stock value and prices per category (?limit=)",
+                "GET /reports/prices": "Price percentiles and histogram (?bins=)",
+                "GET /reports/turnover": "Units sold against stock over the retained changes (?by=brand|category, ?limit=)",
+                "GET /metrics": "Latency, upstream and cache metrics in the Prometheus text format"
             }
         }
     
-    return app
\ No newline at end of file
+    return app
+
+
+def configure_lookups(config):
+    """
+    Create the OpenFoodFacts lookup cache and HTTP client from ``config``.
+
+    Args:
+        config (Config): Application configuration
+    """
+    configure_cache(
+        maxsize=config['LOOKUP_CACHE_SIZE'],
+        ttl=config['LOOKUP_CACHE_TTL'],
+        negative_ttl=config['LOOKUP_CACHE_NEGATIVE_TTL'],
+        path=config['LOOKUP_CACHE_PATH']
+    )
+    configure_client(
+        pool_size=config['UPSTREAM_POOL_SIZE'],
+        connect_timeout=config['UPSTREAM_CONNECT_TIMEOUT'],
+        read_timeout=config['UPSTREAM_READ_TIMEOUT'],
+        retries=config['UPSTREAM_RETRIES'],
+        backoff=config['UPSTREAM_BACKOFF'],
+        breaker_threshold=config['UPSTREAM_BREAKER_THRESHOLD'],
+        breaker_reset=config['UPSTREAM_BREAKER_RESET'],
+        max_per_host=config['UPSTREAM_MAX_PER_HOST'],
+        rate_limit=rate_limit_options(config)
+    )
+
+
+def rate_limit_options(config):
+    """Return the upstream rate limiter arguments in ``config``, or None."""
+    if not config['UPSTREAM_RATE']:
+        return None
+    return {
+        "rate": config['UPSTREAM_RATE'],
+        "burst": config['UPSTREAM_BURST'],
+        "path": config['UPSTREAM_RATE_FILE'],
+        "reserve": config['UPSTREAM_RATE_RESERVE'],
+        "interactive_wait": config['UPSTREAM_INTERACTIVE_WAIT'],
+        "background_wait": config['UPSTREAM_BACKGROUND_WAIT']
+    }
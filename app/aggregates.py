@@ -0,0 +1,226 @@
+"""
+Inventory aggregates maintained incrementally as items change.
+"""
+import math
+from bisect import bisect_left, insort
+from itertools import islice
+
+# Entries per bucket of a SortedIndex before it is split in two
+DEFAULT_BUCKET_SIZE = 1024
+
+# Totals are summed as integers in millionths
+MICROS = 1000000
+
+
+def _number(value):
+    """Return ``value`` if it is a finite number, else None."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        return None
+    return value
+
+def in_range(value, low=None, high=None):
+    """Return True if ``value`` is a number within ``[low, high]``; None leaves a side open."""
+    value = _number(value)
+    return value is not None and (low is None or value >= low) and (high is None or value <= high)
+
+
+class SortedIndex:
+    """
+    Sorted multiset of ``(key, item_id)`` entries.
+
+    Entries live in a list of sorted buckets of at most
+    ``2 * bucket_size`` entries, so adding or removing one costs a binary
+    search plus shifting a single bucket rather than the whole list. A
+    Fenwick tree over the bucket sizes counts the entries before a bucket
+    in O(log n), so ranks cost a bisection plus that count; it is rebuilt
+    only when a bucket splits or empties.
+    """
+
+    def __init__(self, bucket_size=DEFAULT_BUCKET_SIZE):
+        self.bucket_size = bucket_size
+        self._buckets = []
+        # Largest entry of each bucket, for locating buckets by bisection
+        self._maxes = []
+        # Fenwick tree of bucket sizes, 1-based
+        self._tree = [0]
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def add(self, entry):
+        self._len += 1
+        if not self._buckets:
+            self._buckets.append([entry])
+            self._maxes.append(entry)
+            self._rebuild_tree()
+            return
+        i = min(bisect_left(self._maxes, entry), len(self._buckets) - 1)
+        bucket = self._buckets[i]
+        insort(bucket, entry)
+        self._maxes[i] = bucket[-1]
+        if len(bucket) > 2 * self.bucket_size:
+            half = len(bucket) // 2
+            self._buckets[i:i + 1] = [bucket[:half], bucket[half:]]
+            self._maxes[i:i + 1] = [bucket[half - 1], bucket[-1]]
+            self._rebuild_tree()
+        else:
+            self._resize(i, 1)
+
+    def remove(self, entry):
+        """Remove one occurrence of ``entry``, which must be present."""
+        i = bisect_left(self._maxes, entry)
+        bucket = self._buckets[i]
+        del bucket[bisect_left(bucket, entry)]
+        self._len -= 1
+        if bucket:
+            self._maxes[i] = bucket[-1]
+            self._resize(i, -1)
+        else:
+            del self._buckets[i]
+            del self._maxes[i]
+            self._rebuild_tree()
+
+    def _rebuild_tree(self):
+        tree = [0] + [len(bucket) for bucket in self._buckets]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _resize(self, i, delta):
+        """Record that bucket ``i`` gained ``delta`` entries."""
+        tree = self._tree
+        i += 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _count_before(self, i):
+        """Return the number of entries in the buckets before bucket ``i``."""
+        tree = self._tree
+        count = 0
+        while i:
+            count += tree[i]
+            i -= i & -i
+        return count
+
+    def below(self, key):
+        """Yield the entries whose key is less than ``key``, in order."""
+        for bucket in self._buckets:
+            if bucket[-1][0] < key:
+                yield from bucket
+                continue
+            yield from bucket[:bisect_left(bucket, (key,))]
+            return
+
+    def between(self, low=None, high=None):
+        """Yield the entries with ``low <= key <= high`` in order; None leaves a side open."""
+        i, offset = (0, 0) if low is None else self._locate((low,))
+        for bucket in islice(self._buckets, i, None):
+            for entry in islice(bucket, offset, None):
+                if high is not None and entry[0] > high:
+                    return
+                yield entry
+            offset = 0
+
+    def _locate(self, entry):
+        """Return the bucket and offset of the first entry not less than ``entry``."""
+        i = bisect_left(self._maxes, entry)
+        if i == len(self._buckets):
+            return i, 0
+        return i, bisect_left(self._buckets[i], entry)
+
+    def _rank(self, entry):
+        """Return the number of entries less than ``entry``."""
+        i, offset = self._locate(entry)
+        return self._count_before(i) + offset
+
+    def count_below(self, key):
+        """Return the number of entries whose key is less than ``key``."""
+        return self._rank((key,))
+
+    def count_between(self, low=None, high=None):
+        """Return the number of entries ``between(low, high)`` yields."""
+        # (high, inf) sorts after every entry with key ``high``
+        end = self._len if high is None else self._rank((high, math.inf))
+        return max(0, end - (0 if low is None else self._rank((low,))))
+
+
+def _index_entry(index, entry, sign):
+    """Add ``entry`` to ``index`` for a positive ``sign``, else remove it."""
+    if sign > 0:
+        index.add(entry)
+    else:
+        index.remove(entry)
+
+
+class InventoryAggregates:
+    """
+    Running totals over the inventory and indexes of items by quantity
+    and by price.
+
+    The store calls ``add``, ``remove`` and ``replace`` for every change,
+    so totals are read in O(1) and items in a quantity or price range are
+    found in O(log n) plus the number returned. Items without a numeric
+    quantity or price are left out of that index, and only items with a
+    numeric quantity and price count towards the stock value. Sums are
+    kept as integer millionths: an item's contribution is rounded the
+    same way when it is added and removed, so the totals never drift the
+    way repeatedly adding and subtracting floats would.
+
+    Not thread-safe; the store only uses it under its index lock.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.quantity_micros = 0
+        self.value_micros = 0
+        self.by_quantity = SortedIndex()
+        self.by_price = SortedIndex()
+
+    def _update(self, item, sign):
+        self.count += sign
+        quantity = _number(item.get("quantity"))
+        price = _number(item.get("price"))
+        if price is not None:
+            _index_entry(self.by_price, (price, item["id"]), sign)
+        if quantity is None:
+            return
+        self.quantity_micros += sign * round(quantity * MICROS)
+        _index_entry(self.by_quantity, (quantity, item["id"]), sign)
+        if price is not None:
+            self.value_micros += sign * round(quantity * price * MICROS)
+
+    def add(self, item):
+        self._update(item, 1)
+
+    def remove(self, item):
+        self._update(item, -1)
+
+    def replace(self, old, new):
+        """Account for an update of ``old`` to ``new``."""
+        quantity, price = old.get("quantity"), old.get("price")
+        if new.get("quantity") is quantity and new.get("price") is price:
+            return
+        self._update(old, -1)
+        self._update(new, 1)
+
+    def stats(self, low_stock_threshold):
+        """
+        Return the totals and stock level counts.
+
+        Args:
+            low_stock_threshold (int): Quantity below which an item is low on stock
+        """
+        whole, fraction = divmod(self.quantity_micros, MICROS)
+        return {
+            "items": self.count,
+            "total_quantity": whole if not fraction else self.quantity_micros / MICROS,
+            "total_value": self.value_micros / MICROS,
+            # Quantity below 1, i.e. none left for integer stock
+            "out_of_stock": self.by_quantity.count_below(1),
+            "low_stock": self.by_quantity.count_below(low_stock_threshold),
+            "low_stock_threshold": low_stock_threshold
+        }
@@ -1,27 +1,368 @@
 """
 Flask API endpoints for the inventory management system.
 """
-from flask import Blueprint, jsonify, request
+import csv
+import io
+import math
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context, url_for
+from app.cache import ResponseCache
+from app.metrics import registry
+from app.serialization import dumps
 from app.db import (
     get_all_items, get_item_by_id, add_item, 
-    update_item, delete_item
+    update_item, delete_item, iter_items,
+    add_items, update_items, delete_items, search_items,
+    adjust_item_quantity, VersionConflict, InsufficientStock, InvalidQuantity,
+    get_change_seq, get_changes, wait_for_changes,
+    get_low_stock_items, get_inventory_stats
+)
+from app.external_api import (
+    fetch_product_by_barcode, search_products_by_name, get_lookup_stats,
+    lookup_barcodes, PRODUCT_NOT_FOUND, NO_PRODUCTS_FOUND
 )
-from app.external_api import fetch_product_by_barcode, search_products_by_name
 
 # Create Blueprint for API routes
 api_bp = Blueprint('api', __name__)
 
+# Serialized GET /inventory responses, keyed by query string
+response_cache = ResponseCache()
+registry.caches.add("response", lambda: response_cache.stats())
+
+def configure_response_cache(max_bytes):
+    """
+    Replace the inventory response cache.
+
+    Args:
+        max_bytes (int): Total size of cached response bodies; 0 disables it
+    """
+    global response_cache
+    response_cache = ResponseCache(max_bytes)
+
+def not_modified(etag):
+    """304 response for a conditional GET whose ETag still matches."""
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+# Largest page a client may request with ?limit=
+MAX_PAGE_SIZE = 1000
+
+# Query parameters that filter items by a numeric range:
+# (field, 0 for the lower or 1 for the upper bound, type)
+RANGE_FILTERS = {
+    "min_quantity": ("quantity", 0, int),
+    "max_quantity": ("quantity", 1, int),
+    "min_price": ("price", 0, float),
+    "max_price": ("price", 1, float),
+}
+
+def parse_range_filters(args):
+    """
+    Collect the numeric range filters in the query string.
+
+    Args:
+        args (MultiDict): Request query parameters
+
+    Returns:
+        dict: Inclusive (low, high) bounds by field, with None for an
+        open side, as iter_items() takes them
+
+    Raises:
+        ValueError: If a bound is not a valid number
+    """
+    ranges = {}
+    for param, (field, side, convert) in RANGE_FILTERS.items():
+        if param in args:
+            try:
+                bound = convert(args[param])
+            except ValueError:
+                raise ValueError(f"Invalid value for {param}")
+            if not math.isfinite(bound):
+                raise ValueError(f"Invalid value for {param}")
+            ranges.setdefault(field, [None, None])[side] = bound
+    return {field: tuple(bounds) for field, bounds in ranges.items()}
+
+def project(item, fields):
+    """Return only the requested ``fields`` of an item (always with its ID)."""
+    if not fields:
+        return item
+    projected = {"id": item["id"]}
+    for field in fields:
+        if field in item:
+            projected[field] = item[field]
+    return projected
+
 # GET /inventory - Fetch all items
+# Supports ?limit=&after= keyset pagination, ?fields= projection and
+# ?brand=, ?min_quantity=, ?max_quantity=, ?min_price=, ?max_price= filters.
+# The next page's cursor is returned in the X-Next-Cursor and Link headers.
+# X-Change-Seq is the change feed position to follow the listing from.
+# Any mutation advances it, so it doubles as the ETag: If-None-Match gets
+# a 304, and serialized pages are cached until the inventory changes.
 @api_bp.route('/inventory', methods=['GET'])
 def get_inventory():
-    return jsonify(get_all_items())
+    # Read before the items, so no change after the listing is missed
+    seq = get_change_seq()
+    etag = f"inventory-{seq}"
+    if request.if_none_match.contains_weak(etag):
+        return not_modified(etag)
+
+    cached = response_cache.get(request.query_string, seq)
+    if cached is not None:
+        body, headers = cached
+        response = Response(body, mimetype="application/json", headers=headers)
+    else:
+        response = current_app.make_response(render_inventory())
+        if response.status_code != 200:
+            return response
+        response.headers["X-Change-Seq"] = str(seq)
+        response.set_etag(etag)
+        response_cache.set(request.query_string, seq, response.get_data(), dict(response.headers))
+    return response
+
+def render_inventory():
+    """Serialize the inventory page selected by the query string."""
+    if not request.args:
+        return jsonify(get_all_items())
+
+    try:
+        after = int(request.args.get("after", 0))
+        limit = int(request.args["limit"]) if "limit" in request.args else None
+    except ValueError:
+        return jsonify({"error": "Invalid pagination parameters"}), 400
+    try:
+        ranges = parse_range_filters(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+
+    fields = [f for f in request.args.get("fields", "").split(",") if f]
+    items = iter_items(after=after, brand=request.args.get("brand"), **ranges)
+
+    page = []
+    has_more = False
+    for item in items:
+        if limit is not None and len(page) == limit:
+            has_more = True
+            break
+        page.append(project(item, fields))
+
+    response = jsonify(page)
+    if has_more:
+        cursor = page[-1]["id"]
+        args = request.args.to_dict()
+        args["after"] = cursor
+        response.headers["X-Next-Cursor"] = str(cursor)
+        response.headers["Link"] = f'<{url_for("api.get_inventory", **args)}>; rel="next"'
+    return response
+
+# Columns written by the CSV export, in order
+EXPORT_FIELDS = ["id", "product_name", "brands", "ingredients_text", "quantity", "price", "barcode"]
+
+# Number of items serialized per chunk of a streamed export
+EXPORT_CHUNK_SIZE = 500
+
+def export_ndjson(items):
+    """Yield items as newline-delimited JSON, one chunk at a time."""
+    lines = []
+    for item in items:
+        lines.append(dumps(item))
+        if len(lines) == EXPORT_CHUNK_SIZE:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+def export_csv(items, fields):
+    """Yield items as CSV rows with a header, one chunk at a time."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    for count, item in enumerate(items, 1):
+        writer.writerow(item)
+        if count % EXPORT_CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+# GET /inventory/export - Stream every item as NDJSON or CSV
+# Items are read lazily from the store and written in chunks, so memory
+# use does not grow with the size of the inventory.
+@api_bp.route('/inventory/export', methods=['GET'])
+def export_inventory():
+    export_format = request.args.get("format", "ndjson")
+    fields = [f for f in request.args.get("fields", "").split(",") if f and f != "id"]
+    items = (project(item, fields) for item in iter_items(brand=request.args.get("brand")))
+
+    if export_format == "ndjson":
+        body, mimetype = export_ndjson(items), "application/x-ndjson"
+    elif export_format == "csv":
+        body, mimetype = export_csv(items, ["id"] + fields if fields else EXPORT_FIELDS), "text/csv"
+    else:
+        return jsonify({"error": "Unsupported export format"}), 400
+
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f"attachment; filename=inventory.{export_format}"
+    return response
+
+# Longest a long-polling client may wait for changes, in seconds
+MAX_CHANGES_WAIT = 30
+
+# Seconds between keep-alive comments on an idle change stream
+STREAM_HEARTBEAT = 15
+
+def resync_response(seq):
+    """410 response telling a replica to reload the full inventory."""
+    return jsonify({
+        "error": "Changes are no longer available; reload the full inventory",
+        "resync": True,
+        "seq": seq
+    }), 410
+
+# GET /inventory/changes?since=<seq> - Changes after a feed position
+# Returns {"changes": [...], "seq": <position to ask from next>, "more": bool}.
+# Each change is {"seq", "op": "put"|"delete", "id"} plus "item" for puts.
+# With ?wait=<seconds> the request long-polls until a change arrives.
+# A position that fell out of the retention ring gets 410 with "resync".
+@api_bp.route('/inventory/changes', methods=['GET'])
+def get_inventory_changes():
+    try:
+        since = int(request.args["since"])
+        limit = int(request.args.get("limit", MAX_PAGE_SIZE))
+        wait = float(request.args.get("wait", 0))
+    except (KeyError, ValueError):
+        return jsonify({"error": "since must be a sequence number"}), 400
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+
+    changes = get_changes(since, limit)
+    if changes == [] and wait > 0:
+        wait_for_changes(since, min(wait, MAX_CHANGES_WAIT))
+        changes = get_changes(since, limit)
+    if changes is None:
+        return resync_response(get_change_seq())
+    return jsonify({
+        "changes": changes,
+        "seq": changes[-1]["seq"] if changes else since,
+        "more": len(changes) == limit
+    })
+
+def stream_changes(since):
+    """Yield changes after ``since`` as server-sent events, forever."""
+    while True:
+        changes = get_changes(since, MAX_PAGE_SIZE)
+        if changes is None:
+            yield f"event: resync\ndata: {get_change_seq()}\n\n"
+            return
+        for change in changes:
+            data = dumps(change)
+            yield f"id: {change['seq']}\nevent: change\ndata: {data}\n\n"
+        if changes:
+            since = changes[-1]["seq"]
+        elif not wait_for_changes(since, STREAM_HEARTBEAT):
+            yield ": keep-alive\n\n"
+
+# GET /inventory/changes/stream?since=<seq> - Push changes as server-sent events
+# Each change is sent as a "change" event whose id is its sequence number,
+# so EventSource reconnects resume from Last-Event-ID. A "resync" event
+# ends the stream when the client has fallen too far behind.
+@api_bp.route('/inventory/changes/stream', methods=['GET'])
+def stream_inventory_changes():
+    try:
+        since = int(request.headers.get("Last-Event-ID") or request.args["since"])
+    except (KeyError, ValueError):
+        return jsonify({"error": "since must be a sequence number"}), 400
+    response = Response(stream_changes(since), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+# GET /inventory/search?q= - Full-text search over the inventory
+@api_bp.route('/inventory/search', methods=['GET'])
+def search_inventory():
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "Missing search query"}), 400
+    try:
+        limit = int(request.args.get("limit", 10))
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), 400
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+    return jsonify(search_items(query, limit))
+
+def low_stock_threshold():
+    """Return the ?threshold= reorder level, defaulting to LOW_STOCK_THRESHOLD."""
+    return int(request.args.get("threshold", current_app.config["LOW_STOCK_THRESHOLD"]))
+
+# GET /inventory/low-stock?threshold= - Items below a reorder level, lowest first
+# Served from the store's quantity index, without scanning the inventory.
+@api_bp.route('/inventory/low-stock', methods=['GET'])
+def get_low_stock():
+    try:
+        threshold = low_stock_threshold()
+        limit = int(request.args.get("limit", 100))
+    except ValueError:
+        return jsonify({"error": "Invalid threshold or limit"}), 400
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+    items, count = get_low_stock_items(threshold, limit)
+    return jsonify({"threshold": threshold, "count": count, "items": items})
+
+# GET /inventory/stats - Item count, units in stock and stock value
+# Totals are maintained on every change, so this is O(1) apart from the
+# low-stock counts.
+@api_bp.route('/inventory/stats', methods=['GET'])
+def get_stats():
+    try:
+        threshold = low_stock_threshold()
+    except ValueError:
+        return jsonify({"error": "Invalid threshold"}), 400
+    return jsonify(get_inventory_stats(threshold))
+
+def item_response(item, status=200):
+    """JSON response for one item, tagged with its version as the ETag."""
+    response = jsonify(item)
+    response.status_code = status
+    response.set_etag(f"{item['id']}-{item['version']}")
+    return response
+
+def expected_versions(item_id):
+    """
+    Versions of an item accepted by the request's If-Match header.
+
+    Returns:
+        set or None: None if the request is unconditional (no header or
+        ``If-Match: *``); otherwise the versions named by the ETags, which
+        may be empty if none of them belong to this item
+    """
+    if_match = request.if_match
+    if not if_match or if_match.star_tag:
+        return None
+    prefix = f"{item_id}-"
+    # Weak tags only mark a compressed copy of the same version
+    return {
+        int(tag[len(prefix):]) for tag in if_match.as_set(include_weak=True)
+        if tag.startswith(prefix) and tag[len(prefix):].isdigit()
+    }
+
+def conflict_response(error):
+    """412 response for a failed If-Match precondition."""
+    response = jsonify({"error": "Item has been modified", "item": error.item})
+    response.status_code = 412
+    response.set_etag(f"{error.item['id']}-{error.item['version']}")
+    return response
 
 # GET /inventory/<id> - Fetch a single item
 @api_bp.route('/inventory/<int:item_id>', methods=['GET'])
 def get_inventory_item(item_id):
     item = get_item_by_id(item_id)
     if item:
-        return jsonify(item)
+        etag = f"{item['id']}-{item['version']}"
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag)
+        return item_response(item)
     return jsonify({"error": "Item not found"}), 404
 
 # POST /inventory - Add a new item
@@ -35,18 +376,45 @@ def create_inventory_item():
     
     # Create new item
     new_item = add_item(data)
-    return jsonify(new_item), 201
+    return item_response(new_item, 201)
 
 # PATCH /inventory/<id> - Update an item
+# With If-Match the update only applies if the item is still at that ETag.
 @api_bp.route('/inventory/<int:item_id>', methods=['PATCH'])
 def update_inventory_item(item_id):
     data = request.get_json()
     if not data:
         return jsonify({"error": "No data provided"}), 400
     
-    updated_item = update_item(item_id, data)
+    try:
+        updated_item = update_item(item_id, data, expected_versions(item_id))
+    except VersionConflict as e:
+        return conflict_response(e)
     if updated_item:
-        return jsonify(updated_item)
+        return item_response(updated_item)
+    return jsonify({"error": "Item not found"}), 404
+
+# POST /inventory/<id>/adjust - Change an item's quantity by a relative amount
+# Body: {"delta": -1}. Applied atomically, so concurrent sales never lose
+# updates; stock cannot go below zero. If-Match is honoured as for PATCH.
+@api_bp.route('/inventory/<int:item_id>/adjust', methods=['POST'])
+def adjust_inventory_item(item_id):
+    data = request.get_json(silent=True)
+    delta = data.get("delta") if isinstance(data, dict) else None
+    if not isinstance(delta, int) or isinstance(delta, bool):
+        return jsonify({"error": "Request body must contain an integer 'delta'"}), 400
+
+    try:
+        item = adjust_item_quantity(item_id, delta, expected_versions(item_id))
+    except VersionConflict as e:
+        return conflict_response(e)
+    except InsufficientStock as e:
+        return jsonify({"error": "Insufficient stock", "item": e.item}), 409
+    except InvalidQuantity as e:
+        return jsonify({"error": "Item quantity is not an integer; set it with PATCH first",
+                        "item": e.item}), 409
+    if item:
+        return item_response(item)
     return jsonify({"error": "Item not found"}), 404
 
 # DELETE /inventory/<id> - Remove an item
@@ -57,18 +425,208 @@ def delete_inventory_item(item_id):
         return jsonify({"message": "Item deleted successfully"}), 200
     return jsonify({"error": "Item not found"}), 404
 
+# Largest number of items accepted by one bulk request
+MAX_BATCH_SIZE = 5000
+
+def get_batch(key):
+    """
+    Return the list under ``key`` in the request body.
+
+    Returns:
+        tuple: (batch, error response); exactly one of them is None
+    """
+    data = request.get_json(silent=True)
+    batch = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(batch, list) or not batch:
+        return None, (jsonify({"error": f"Request body must contain a non-empty '{key}' list"}), 400)
+    if len(batch) > MAX_BATCH_SIZE:
+        return None, (jsonify({"error": f"Batches are limited to {MAX_BATCH_SIZE} items"}), 413)
+    return batch, None
+
+def batch_response(results):
+    """Summarize per-item bulk results."""
+    failed = sum(1 for result in results if "error" in result)
+    return jsonify({
+        "results": results,
+        "succeeded": len(results) - failed,
+        "failed": failed
+    })
+
+# POST /inventory/bulk - Add many items in one transaction
+# Body: {"items": [{...}, ...]}. Invalid items are reported and skipped.
+@api_bp.route('/inventory/bulk', methods=['POST'])
+def bulk_create_inventory_items():
+    batch, error = get_batch("items")
+    if error:
+        return error
+
+    results = [None] * len(batch)
+    valid = []
+    for index, data in enumerate(batch):
+        if not isinstance(data, dict) or not data.get('product_name'):
+            results[index] = {"index": index, "status": 400, "error": "Missing required fields"}
+        else:
+            valid.append((index, data))
+
+    for (index, _), item in zip(valid, add_items([data for _, data in valid])):
+        results[index] = {"index": index, "status": 201, "item": item}
+    return batch_response(results)
+
+# PATCH /inventory/bulk - Update many items in one transaction
+# Body: {"items": [{"id": 1, ...}, ...]}
+@api_bp.route('/inventory/bulk', methods=['PATCH'])
+def bulk_update_inventory_items():
+    batch, error = get_batch("items")
+    if error:
+        return error
+
+    results = [None] * len(batch)
+    valid = []
+    for index, data in enumerate(batch):
+        item_id = data.get("id") if isinstance(data, dict) else None
+        if not isinstance(item_id, int) or isinstance(item_id, bool):
+            results[index] = {"index": index, "status": 400, "error": "Missing item id"}
+        elif len(data) < 2:
+            results[index] = {"index": index, "status": 400, "error": "No data provided"}
+        else:
+            valid.append((index, data))
+
+    updated = update_items([(data["id"], data) for _, data in valid])
+    for (index, data), item in zip(valid, updated):
+        if item is None:
+            results[index] = {"index": index, "id": data["id"], "status": 404, "error": "Item not found"}
+        else:
+            results[index] = {"index": index, "status": 200, "item": item}
+    return batch_response(results)
+
+# DELETE /inventory/bulk - Remove many items in one transaction
+# Body: {"ids": [1, 2, ...]}
+@api_bp.route('/inventory/bulk', methods=['DELETE'])
+def bulk_delete_inventory_items():
+    batch, error = get_batch("ids")
+    if error:
+        return error
+
+    results = [None] * len(batch)
+    valid = []
+    for index, item_id in enumerate(batch):
+        if not isinstance(item_id, int) or isinstance(item_id, bool):
+            results[index] = {"index": index, "status": 400, "error": "Invalid item id"}
+        else:
+            valid.append((index, item_id))
+
+    for (index, item_id), deleted in zip(valid, delete_items([item_id for _, item_id in valid])):
+        if deleted:
+            results[index] = {"index": index, "id": item_id, "status": 200}
+        else:
+            results[index] = {"index": index, "id": item_id, "status": 404, "error": "Item not found"}
+    return batch_response(results)
+
+def lookup_status(result):
+    """
+    HTTP status of a lookup result: 200 found, 404 not found, 503 when the
+    request budget ran out, 502 for other upstream failures.
+    """
+    if result["success"]:
+        return 200
+    if result["message"] in (PRODUCT_NOT_FOUND, NO_PRODUCTS_FOUND):
+        return 404
+    if "retry_after" in result:
+        return 503
+    return 502
+
+def retry_after(result):
+    """Retry-After header value of a rate-limited lookup, or None."""
+    if "retry_after" not in result:
+        return None
+    return str(math.ceil(result["retry_after"]))
+
+def lookup_response(result):
+    """JSON response for a lookup result, with its status and any Retry-After."""
+    response = jsonify(result)
+    response.status_code = lookup_status(result)
+    wait = retry_after(result)
+    if wait is not None:
+        response.headers["Retry-After"] = wait
+    return response
+
 # GET /lookup/barcode/<barcode> - Lookup product by barcode
 @api_bp.route('/lookup/barcode/<barcode>', methods=['GET'])
 def lookup_by_barcode(barcode):
-    result = fetch_product_by_barcode(barcode)
-    if result.get("success"):
-        return jsonify(result)
-    return jsonify(result), 404
+    return lookup_response(fetch_product_by_barcode(barcode))
+
+# Largest number of barcodes accepted by one batch lookup
+MAX_LOOKUP_BATCH = 500
+
+# POST /lookup/barcode/batch - Lookup many barcodes concurrently
+# Body: {"barcodes": [...]}. Results come back in input order, each with
+# an HTTP-style status: 200 found, 404 not found, 503 out of request
+# budget, 502 other upstream failure.
+@api_bp.route('/lookup/barcode/batch', methods=['POST'])
+def lookup_barcode_batch():
+    barcodes, error = parse_barcode_batch(request.get_json(silent=True))
+    if error is not None:
+        return jsonify(error[0]), error[1]
+    results = lookup_barcodes(barcodes, current_app.config['BATCH_LOOKUP_WORKERS'])
+    return jsonify({"results": add_lookup_statuses(results)})
+
+def parse_barcode_batch(data):
+    """
+    Validate a batch lookup request body.
+
+    Returns:
+        tuple: (barcodes, (error body, status)); exactly one of them is None
+    """
+    barcodes = data.get("barcodes") if isinstance(data, dict) else None
+    if not isinstance(barcodes, list) or not barcodes or \
+            not all(isinstance(barcode, str) and barcode for barcode in barcodes):
+        return None, ({"error": "Request body must contain a non-empty 'barcodes' list of strings"}, 400)
+    if len(barcodes) > MAX_LOOKUP_BATCH:
+        return None, ({"error": f"Batches are limited to {MAX_LOOKUP_BATCH} barcodes"}, 413)
+    return barcodes, None
+
+def add_lookup_statuses(results):
+    """Give each batch lookup result its HTTP-style status."""
+    for result in results:
+        result["status"] = lookup_status(result)
+    return results
+
+# Number of products returned by a name lookup
+NAME_LOOKUP_LIMIT = 5
+
+def as_product(item):
+    """Shape an inventory item like an OpenFoodFacts search result."""
+    return {
+        "id": item["id"],
+        "product_name": item.get("product_name", "Unknown"),
+        "brands": item.get("brands", "Unknown"),
+        "barcode": item.get("barcode", ""),
+        "ingredients_text": item.get("ingredients_text", "")
+    }
 
 # GET /lookup/name/<name> - Search products by name
+# Answered from the local inventory index first; OpenFoodFacts is only
+# queried when nothing in stock matches.
 @api_bp.route('/lookup/name/<name>', methods=['GET'])
 def lookup_by_name(name):
-    result = search_products_by_name(name)
-    if result.get("success"):
-        return jsonify(result)
-    return jsonify(result), 404
\ No newline at end of file
+    local = search_inventory_by_name(name)
+    if local is not None:
+        return jsonify(local)
+
+    return lookup_response(dict(search_products_by_name(name), source="openfoodfacts"))
+
+def search_inventory_by_name(name):
+    """Return a name lookup result from the local inventory, or None."""
+    items = search_items(name, limit=NAME_LOOKUP_LIMIT)
+    if not items:
+        return None
+    return {
+        "success": True,
+        "source": "inventory",
+        "products": [as_product(item) for item in items]
+    }
+
+# GET /lookup/stats - Lookup cache and request coalescing statistics
+@api_bp.route('/lookup/stats', methods=['GET'])
+def lookup_stats():
+    return jsonify(get_lookup_stats())
@@ -0,0 +1,202 @@
+"""
+ASGI entry point that serves OpenFoodFacts lookups on an event loop.
+
+The lookup routes spend nearly all their time waiting on the upstream,
+and under WSGI each of them holds a worker thread for the whole round
+trip. Here they are answered natively with app.async_external_api, so a
+single process can keep hundreds of lookups in flight. They are timed
+and see other workers' writes just like the Flask routes. Every other
+route is handed to the regular Flask app, which runs on a thread pool.
+
+Requires the optional aiohttp and asgiref packages and an ASGI server
+(see requirements-optional.txt):
+
+    uvicorn app.asgi:app
+"""
+import json
+import re
+import time
+from functools import partial
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from asgiref.wsgi import WsgiToAsgi
+from app import async_external_api, create_app, db, rate_limit_options
+from app.api import (
+    parse_barcode_batch, add_lookup_statuses, lookup_status, retry_after, search_inventory_by_name
+)
+from app.metrics import http_request_seconds
+from app.serialization import dumps
+
+BARCODE_PATH = re.compile(r"^/lookup/barcode/([^/]+)$")
+NAME_PATH = re.compile(r"^/lookup/name/([^/]+)$")
+
+
+class _WsgiToAsgi(WsgiToAsgi):
+    async def __call__(self, scope, receive, send):
+        # asgiref runs every WSGI call on one thread shared process-wide by
+        # default, which would serialize the whole Flask app; a context per
+        # request gives each request a thread of its own
+        async with ThreadSensitiveContext():
+            await super().__call__(scope, receive, send)
+
+
+async def send_json(send, body, status=200, headers=()):
+    """Send a complete JSON response."""
+    data = dumps(body).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"),
+                    (b"content-length", str(len(data)).encode()), *headers]
+    })
+    await send({"type": "http.response.body", "body": data})
+
+async def read_body(receive):
+    """Read the whole request body."""
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+async def send_lookup(send, result):
+    """Send a lookup result with the status the Flask routes would use."""
+    wait = retry_after(result)
+    headers = [(b"retry-after", wait.encode())] if wait is not None else []
+    await send_json(send, result, lookup_status(result), headers)
+
+async def lookup_barcode(send, barcode):
+    await send_lookup(send, await async_external_api.fetch_product_by_barcode(barcode))
+
+async def lookup_barcode_batch(send, receive, max_concurrency):
+    try:
+        data = json.loads(await read_body(receive))
+    except ValueError:
+        data = None
+    barcodes, error = parse_barcode_batch(data)
+    if error is not None:
+        await send_json(send, *error)
+        return
+    results = await async_external_api.lookup_barcodes(barcodes, max_concurrency)
+    await send_json(send, {"results": add_lookup_statuses(results)})
+
+async def lookup_name(send, name):
+    # The store takes locks, so search it off the event loop
+    local = await sync_to_async(search_inventory_by_name, thread_sensitive=False)(name)
+    if local is not None:
+        await send_json(send, local)
+        return
+    result = dict(await async_external_api.search_products_by_name(name), source="openfoodfacts")
+    await send_lookup(send, result)
+
+async def lookup_stats(send):
+    await send_json(send, async_external_api.get_lookup_stats())
+
+def route_request(scope, receive, send, config):
+    """
+    Find the handler for a request served on the event loop.
+
+    Returns:
+        tuple or None: (route rule as the Flask app names it, coroutine
+        function handling the request), or None for the Flask app's routes
+    """
+    method, path = scope["method"], scope["path"]
+    if method == "POST" and path == "/lookup/barcode/batch":
+        return "/lookup/barcode/batch", partial(
+            lookup_barcode_batch, send, receive, config['ASYNC_LOOKUP_CONCURRENCY'])
+    if method != "GET":
+        return None
+    if BARCODE_PATH.match(path):
+        return "/lookup/barcode/<barcode>", partial(lookup_barcode, send, BARCODE_PATH.match(path).group(1))
+    if NAME_PATH.match(path):
+        return "/lookup/name/<name>", partial(lookup_name, send, NAME_PATH.match(path).group(1))
+    if path == "/lookup/stats":
+        return "/lookup/stats", partial(lookup_stats, send)
+    return None
+
+async def serve(route, handler, method, recorder):
+    """Run a handler with the request hooks the Flask app applies to its routes."""
+    start = time.perf_counter()
+    try:
+        if db.store.shared:
+            # Pick up other worker processes' writes, as db.sync_store does under Flask
+            await sync_to_async(db.sync_store, thread_sensitive=False)()
+        await handler()
+    finally:
+        http_request_seconds.observe(time.perf_counter() - start, method, route,
+                                     str(recorder.status or 500))
+
+
+class _StatusRecorder:
+    """Wrap an ASGI ``send`` callable and remember the response status."""
+
+    def __init__(self, send):
+        self.send = send
+        self.status = None
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+        await self.send(message)
+
+
+def create_asgi_app(test_config=None):
+    """
+    Create the ASGI application.
+
+    Args:
+        test_config (dict, optional): Configuration passed to create_app()
+
+    Returns:
+        callable: ASGI application
+    """
+    flask_app = create_app(test_config)
+    config = flask_app.config
+    wsgi = _WsgiToAsgi(flask_app)
+
+    def start_client():
+        async_external_api.configure_client(
+            pool_size=config['ASYNC_UPSTREAM_POOL_SIZE'],
+            connect_timeout=config['UPSTREAM_CONNECT_TIMEOUT'],
+            read_timeout=config['UPSTREAM_READ_TIMEOUT'],
+            retries=config['UPSTREAM_RETRIES'],
+            backoff=config['UPSTREAM_BACKOFF'],
+            breaker_threshold=config['UPSTREAM_BREAKER_THRESHOLD'],
+            breaker_reset=config['UPSTREAM_BREAKER_RESET'],
+            max_per_host=config['UPSTREAM_MAX_PER_HOST'],
+            rate_limit=rate_limit_options(config)
+        )
+
+    async def lifespan(receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                start_client()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if async_external_api.http_client is not None:
+                    await async_external_api.http_client.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            await lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        if async_external_api.http_client is None:
+            # The server did not run the lifespan protocol
+            start_client()
+
+        recorder = _StatusRecorder(send)
+        routed = route_request(scope, receive, recorder, config)
+        if routed is None:
+            await wsgi(scope, receive, send)
+        else:
+            await serve(*routed, scope["method"], recorder)
+
+    return app
+
+
+app = create_asgi_app()
@@ -0,0 +1,153 @@
+"""
+asyncio variant of the OpenFoodFacts integration in app.external_api.
+
+Lookups await the upstream instead of blocking a thread, so one event
+loop can serve many of them at once. Results have the same shape as the
+threaded functions', share the same barcode cache and endpoint URLs, and
+go through the same parsing helpers.
+"""
+import asyncio
+from app import external_api
+from app.singleflight import AsyncSingleFlight
+from app.ratelimit import create_limiter
+from app.upstream import AsyncUpstreamClient, CircuitBreaker, CircuitOpenError, RateLimitedError, aiohttp
+
+# Coalesce concurrent identical lookups on the event loop
+barcode_flights = AsyncSingleFlight()
+name_flights = AsyncSingleFlight()
+
+# Async HTTP client for OpenFoodFacts; created by configure_client()
+http_client = None
+
+def configure_client(pool_size=100, connect_timeout=3.05, read_timeout=10, retries=2,
+                     backoff=0.2, breaker_threshold=5, breaker_reset=30, max_per_host=None,
+                     rate_limit=None):
+    """
+    Replace the async HTTP client used to reach OpenFoodFacts.
+
+    The previous client, if any, must be closed by the caller with
+    ``await client.close()`` on the loop that used it.
+
+    Args:
+        pool_size (int): Connections kept open to the upstream
+        connect_timeout (float): Seconds to wait for a connection
+        read_timeout (float): Seconds to wait for response data
+        retries (int): Extra attempts after a failed request
+        backoff (float): Base delay in seconds between attempts
+        breaker_threshold (int): Consecutive failures that open the circuit
+        breaker_reset (float): Seconds before an open circuit is retried
+        max_per_host (int, optional): Concurrent requests allowed per host;
+            defaults to ``pool_size``
+        rate_limit (dict, optional): app.ratelimit.create_limiter()
+            arguments; no rate limit by default
+
+    Returns:
+        AsyncUpstreamClient: The new client
+    """
+    global http_client
+    http_client = AsyncUpstreamClient(
+        pool_size=pool_size,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        retries=retries,
+        backoff=backoff,
+        breaker=CircuitBreaker(breaker_threshold, breaker_reset),
+        max_per_host=max_per_host,
+        limiter=create_limiter(**rate_limit) if rate_limit else None
+    )
+    return http_client
+
+def get_lookup_stats():
+    """Return the barcode cache and async request coalescing counters."""
+    return {
+        "cache": external_api.barcode_cache.stats(),
+        "coalescing": {
+            "barcode": barcode_flights.stats(),
+            "name": name_flights.stats()
+        }
+    }
+
+async def fetch_product_by_barcode(barcode):
+    """
+    Fetch product details from OpenFoodFacts API by barcode.
+
+    Args:
+        barcode (str): Product barcode
+
+    Returns:
+        dict: Product details or error message
+    """
+    cached = external_api.barcode_cache.get(barcode)
+    if cached is not None:
+        return cached
+    return await barcode_flights.do(barcode, _fetch_and_cache_product, barcode)
+
+async def _fetch_and_cache_product(barcode):
+    """Fetch a product and cache found and not-found results."""
+    cache = external_api.barcode_cache
+    result = await _fetch_product_by_barcode(barcode)
+    external_api.cache_product_result(cache, barcode, result)
+    return result
+
+async def _fetch_product_by_barcode(barcode):
+    """Fetch a product from OpenFoodFacts, bypassing the cache."""
+    try:
+        response = await http_client.get(f"{external_api.OPENFOODFACTS_API_URL}{barcode}.json")
+        if response.status != 404:
+            # An unknown barcode is a 404 whose body still says "product not found"
+            response.raise_for_status()
+        return external_api.product_result(await response.json(content_type=None))
+    except (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError, RateLimitedError,
+            ValueError) as e:
+        return external_api.request_failure(e)
+
+async def lookup_barcodes(barcodes, max_concurrency=100):
+    """
+    Look up many barcodes concurrently.
+
+    Duplicate barcodes are fetched once, and at most ``max_concurrency``
+    lookups from this batch are awaited at a time.
+
+    Args:
+        barcodes (list): Barcodes to look up
+        max_concurrency (int): Maximum number of concurrent lookups
+
+    Returns:
+        list: One result per input barcode, in input order, each with the
+            barcode added
+    """
+    unique = list(dict.fromkeys(barcodes))
+    slots = asyncio.Semaphore(max_concurrency)
+
+    async def lookup(barcode):
+        async with slots:
+            return await fetch_product_by_barcode(barcode)
+
+    results = dict(zip(unique, await asyncio.gather(*map(lookup, unique))))
+    return [dict(results[barcode], barcode=barcode) for barcode in barcodes]
+
+async def search_products_by_name(product_name):
+    """
+    Search products by name using OpenFoodFacts API.
+
+    Args:
+        product_name (str): Product name to search for
+
+    Returns:
+        dict: Search results or error message
+    """
+    return await name_flights.do(product_name, _search_products_by_name, product_name)
+
+async def _search_products_by_name(product_name):
+    """Search OpenFoodFacts by name."""
+    try:
+        response = await http_client.get(
+            external_api.OPENFOODFACTS_SEARCH_URL,
+            params=external_api.search_params(product_name)
+        )
+        if response.status != 404:
+            response.raise_for_status()
+        return external_api.search_result(await response.json(content_type=None))
+    except (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError, RateLimitedError,
+            ValueError) as e:
+        return external_api.request_failure(e)
@@ -0,0 +1,252 @@
+"""
+Caches for OpenFoodFacts lookups and serialized API responses.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+class DiskCache:
+    """
+    Persistent cache tier backed by SQLite, so lookups survive restarts.
+
+    Entries carry an absolute wall-clock expiry time because the monotonic
+    clock used in memory does not carry over between processes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+
+    def get(self, key):
+        """
+        Return ``(value, seconds_left)`` for a live entry, or None.
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            tuple or None: Cached value and its remaining time to live
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        seconds_left = row[1] - time.time()
+        if seconds_left <= 0:
+            self.delete(key)
+            return None
+        return json.loads(row[0]), seconds_left
+
+    def set(self, key, value, ttl):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + ttl)
+            )
+
+    def delete(self, key):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class LookupCache:
+    """
+    Thread-safe LRU cache with per-entry TTL expiry.
+
+    Positive and negative results get separate TTLs, so a barcode that was
+    not found is retried sooner than a product that was. When ``maxsize``
+    is reached the least recently used entry is evicted. An optional
+    DiskCache is consulted on memory misses and written on every set.
+    """
+
+    def __init__(self, maxsize=10000, ttl=3600, negative_ttl=300, disk=None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.disk = disk
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Return the cached value for ``key``, or None on a miss.
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            The cached value, or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+
+        if self.disk is not None:
+            stored = self.disk.get(key)
+            if stored is not None:
+                value, seconds_left = stored
+                with self._lock:
+                    self.hits += 1
+                    self._store(key, value, seconds_left)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value, negative=False):
+        """
+        Cache ``value`` under ``key``.
+
+        Args:
+            key (str): Cache key
+            value: JSON-serializable value
+            negative (bool): Whether this records a "not found" result
+        """
+        ttl = self.negative_ttl if negative else self.ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._store(key, value, ttl)
+        if self.disk is not None:
+            self.disk.set(key, value, ttl)
+
+    def _store(self, key, value, ttl):
+        """Insert into the memory tier, evicting LRU entries (lock held)."""
+        self._entries[key] = (value, self._clock() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self):
+        """Return hit/miss/eviction counters and the current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache of serialized responses, bounded by total bytes.
+
+    Every entry is stamped with the version of the data it was rendered
+    from, and ``get`` only returns it while the caller's current version
+    matches, so stale entries are never served and the cache does not
+    need to be notified of changes. The version is as coarse as the
+    caller's: with the inventory's change sequence, any mutation makes
+    every cached page a miss. Responses larger than ``max_bytes`` are
+    never stored.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version):
+        """
+        Return the cached ``(body, headers)`` for ``key`` at ``version``, or None.
+
+        Args:
+            key (hashable): Cache key, such as the request's query string
+            version: Current version of the underlying data
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], entry[2]
+            self.misses += 1
+            return None
+
+    def set(self, key, version, body, headers):
+        """
+        Cache a rendered response.
+
+        Args:
+            key (hashable): Cache key
+            version: Version of the data ``body`` was rendered from
+            body (bytes): Serialized response body
+            headers (dict): Response headers to replay on a hit
+        """
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old[1])
+            self._entries[key] = (version, body, headers)
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,125 @@
+"""
+Change feed that lets replicas follow the inventory incrementally.
+"""
+import threading
+import time
+from collections import deque
+from itertools import islice
+
+# Number of changes kept for clients that are catching up
+DEFAULT_RETENTION = 10000
+
+
+class ChangeFeed:
+    """
+    Bounded log of recent inventory changes, numbered by a sequence.
+
+    Every add, update and delete is recorded as ``{"seq", "op", "id"}``
+    plus the full ``item`` for puts, so replaying changes is idempotent.
+    Only the last ``retention`` changes are kept in a ring; a client whose
+    sequence has already fallen out of it must resync from a full listing.
+    A retention of 0 keeps none, so only up-to-date clients can follow.
+
+    Sequence numbers start from the wall clock in microseconds rather than
+    zero. They keep increasing across restarts, so a client holding a
+    sequence from a previous process is asked to resync instead of
+    silently missing the changes it never saw.
+
+    The store records changes inside its transactions, which keeps the
+    sequence in the order changes were applied. Readers may block in
+    ``wait`` until a newer change arrives.
+    """
+
+    def __init__(self, retention=DEFAULT_RETENTION, start=None):
+        self._cond = threading.Condition()
+        self._changes = deque(maxlen=retention)
+        self._seq = time.time_ns() // 1000 if start is None else start
+        self._first_seq = self._seq + 1
+
+    @property
+    def seq(self):
+        """Sequence number of the latest change."""
+        return self._seq
+
+    @property
+    def retention(self):
+        return self._changes.maxlen
+
+    @retention.setter
+    def retention(self, retention):
+        with self._cond:
+            self._changes = deque(self._changes, maxlen=retention)
+            self._first_seq = self._changes[0]["seq"] if self._changes else self._seq + 1
+
+    def record(self, op, item_id, item=None, seq=None):
+        """
+        Append a change and wake waiting readers.
+
+        Args:
+            op (str): "put" or "delete"
+            item_id (int): ID of the changed item
+            item (InventoryItem, optional): The item after a put
+            seq (int, optional): Sequence number assigned by a shared
+                storage backend; must follow the previous one
+
+        Returns:
+            int: The change's sequence number
+        """
+        with self._cond:
+            self._seq = self._seq + 1 if seq is None else seq
+            change = {"seq": self._seq, "op": op, "id": item_id}
+            if item is not None:
+                change["item"] = item
+            if not self._changes.maxlen:
+                self._first_seq = self._seq + 1
+            elif len(self._changes) == self._changes.maxlen:
+                self._first_seq = self._changes[0]["seq"] + 1
+            self._changes.append(change)
+            self._cond.notify_all()
+            return self._seq
+
+    def reset(self, seq):
+        """
+        Drop the retained changes and continue numbering after ``seq``.
+
+        Clients behind ``seq`` are asked to resync.
+        """
+        with self._cond:
+            self._changes.clear()
+            self._seq = seq
+            self._first_seq = seq + 1
+            self._cond.notify_all()
+
+    def since(self, seq, limit=1000):
+        """
+        Return the changes after ``seq``.
+
+        Args:
+            seq (int): Last sequence number the client has applied
+            limit (int): Maximum number of changes to return
+
+        Returns:
+            list or None: Up to ``limit`` changes in order, or None if the
+            changes after ``seq`` are no longer retained (or ``seq`` is
+            not from this feed) and the client must resync
+        """
+        with self._cond:
+            if seq < self._first_seq - 1 or seq > self._seq:
+                return None
+            start = seq - self._first_seq + 1
+            return list(islice(self._changes, start, start + limit))
+
+    def retained(self):
+        """Return every retained change, oldest first."""
+        with self._cond:
+            return list(self._changes)
+
+    def wait(self, seq, timeout):
+        """
+        Block until there is a change after ``seq`` or ``timeout`` expires.
+
+        Returns:
+            bool: True if a newer change is available
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: self._seq != seq, timeout)
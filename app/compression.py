@@ -0,0 +1,105 @@
+"""
+Negotiated gzip/brotli compression of API responses.
+"""
+import gzip
+import zlib
+from flask import current_app, request
+from app.cache import ResponseCache
+from app.metrics import registry
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Content types worth compressing
+COMPRESSIBLE_TYPES = frozenset(("application/json", "application/x-ndjson", "text/csv", "text/plain"))
+
+# Compressed bodies of responses with an ETag, so cached pages are not
+# recompressed on every request
+compressed_cache = ResponseCache(16 * 1024 * 1024)
+registry.caches.add("compressed", lambda: compressed_cache.stats())
+
+def supported_encodings():
+    """Content codings this server can produce, preferred first."""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+def negotiated_encoding():
+    """Return the coding the current request accepts that we prefer, or None."""
+    return request.accept_encodings.best_match(supported_encodings())
+
+def compress(data, encoding, level):
+    """Compress a complete body with ``encoding``."""
+    if encoding == "br":
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+def compress_stream(chunks, encoding, level):
+    """Compress a streamed body chunk by chunk."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=min(level, 11))
+        compress_chunk, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+        compress_chunk, finish = compressor.compress, compressor.flush
+    for chunk in chunks:
+        data = compress_chunk(chunk.encode() if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield finish()
+
+def compress_response(response):
+    """
+    ``after_request`` hook compressing bodies the client accepts compressed.
+
+    Bodies below COMPRESS_MIN_SIZE, non-2xx responses and server-sent
+    event streams are left alone. Streamed exports are compressed on the
+    fly. A strong ETag is weakened whenever the client negotiated a
+    coding, since the compressed bytes differ from the identity
+    representation but carry the same data. That includes bodies too
+    small to compress and 304 responses, which have no body to measure,
+    so a 304 always repeats the ETag of the 200 it stands for.
+
+    Args:
+        response (Response): Outgoing response
+
+    Returns:
+        Response: The response, compressed if appropriate
+    """
+    response.vary.add("Accept-Encoding")
+    level = current_app.config["COMPRESS_LEVEL"]
+    etag, weak = response.get_etag()
+    if response.status_code == 304:
+        # Conditional GETs are only served for JSON, which is compressible
+        if etag and not weak and level > 0 and negotiated_encoding() is not None:
+            response.set_etag(etag, weak=True)
+        return response
+    if not 200 <= response.status_code < 300 or response.status_code == 204 \
+            or response.direct_passthrough or "Content-Encoding" in response.headers \
+            or response.mimetype not in COMPRESSIBLE_TYPES or level <= 0:
+        return response
+    encoding = negotiated_encoding()
+    if encoding is None:
+        return response
+
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding, level)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < current_app.config["COMPRESS_MIN_SIZE"]:
+            return response
+        key = (request.full_path, encoding)
+        cached = compressed_cache.get(key, etag) if etag else None
+        if cached is not None:
+            body = cached[0]
+        else:
+            body = compress(data, encoding, level)
+            if etag:
+                compressed_cache.set(key, etag, body, {})
+        response.set_data(body)
+
+    response.headers["Content-Encoding"] = encoding
+    return response
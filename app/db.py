@@ -1,10 +1,38 @@
 """
 Mock database for storing inventory items.
-This simulates a database using an in-memory array.
+This simulates a database using an in-memory store indexed by item ID,
+with secondary indexes on barcode and brand.
 """
+import threading
+import time
+from bisect import bisect_right
+from contextlib import contextmanager
+from itertools import islice
+from operator import attrgetter, itemgetter
+from app.aggregates import InventoryAggregates, in_range
+from app.changes import ChangeFeed
+from app.locks import RWLock
+from app.metrics import store_operation_seconds
+from app.models import InventoryItem
+from app.search import SearchIndex
+from app.storage import MemoryBackend
+
+# Number of lock stripes the store is split into
+DEFAULT_SHARDS = 16
+
+# Seconds between checks for other processes' changes while waiting on
+# the change feed of a shared backend
+SHARED_POLL_INTERVAL = 0.1
+
+# Largest share of the inventory a quantity or price range may match for
+# iter_items() to read it from the range's index
+RANGE_INDEX_MAX_SHARE = 0.25
+
+# Fields covered by the secondary and full-text indexes
+INDEXED_FIELDS = frozenset(("barcode", "brands", "product_name", "ingredients_text"))
 
 # Initial inventory items
-inventory = [
+SEED_ITEMS = [
     {
         "id": 1,
         "product_name": "Organic Almond Milk",
@@ -25,73 +53,831 @@ inventory = [
     }
 ]
 
+
+class VersionConflict(Exception):
+    """Raised when an item's version does not match the expected one."""
+
+    def __init__(self, item):
+        super().__init__(f"Item {item['id']} is at version {item['version']}")
+        self.item = item
+
+
+class InsufficientStock(Exception):
+    """Raised when an adjustment would take an item's quantity below zero."""
+
+    def __init__(self, item):
+        super().__init__(f"Item {item['id']} has only {item.get('quantity', 0)} in stock")
+        self.item = item
+
+
+class InvalidQuantity(Exception):
+    """Raised when adjusting an item whose stored quantity is not an integer."""
+
+    def __init__(self, item):
+        super().__init__(f"Item {item['id']} has a non-integer quantity {item.get('quantity')!r}")
+        self.item = item
+
+
+def _brand_keys(brands):
+    """
+    Split a ``brands`` value into normalized index keys.
+
+    OpenFoodFacts stores multiple brands as a comma-separated string,
+    so "Silk, Danone" is indexed under both "silk" and "danone".
+
+    Args:
+        brands (str): Raw brands value of an item
+
+    Returns:
+        set: Lower-cased brand names
+    """
+    if not isinstance(brands, str):
+        return set()
+    return {brand.strip().lower() for brand in brands.split(",") if brand.strip()}
+
+
+class _Shard:
+    """A slice of the inventory guarded by its own reader/writer lock."""
+
+    __slots__ = ("items", "lock")
+
+    def __init__(self):
+        self.items = {}
+        self.lock = RWLock()
+
+
+class InventoryStore:
+    """
+    In-memory inventory keyed by item ID.
+
+    Items are stored as compact InventoryItem records in dicts keyed by
+    ID, so lookup, update and delete by ID are O(1).
+    Secondary indexes map barcodes and brand names to sets of item IDs,
+    and a full-text index covers names, brands and ingredients; all of
+    them are kept in sync on every mutation. IDs come from a monotonic
+    counter, so they are never reused after a delete. Each item carries a
+    version that starts at 1 and is bumped by every change, which callers
+    can use for optimistic concurrency control.
+
+    The store is safe to share between request threads. Items are striped
+    across shards by ID, each with its own reader/writer lock: reads never
+    block each other, and writes only block readers of the same shard.
+    Updates are copy-on-write, so an item returned to a reader is never
+    modified underneath it. Locks are always taken shard first, then
+    index, to rule out deadlocks.
+
+    For keyset pagination the store also keeps every allocated ID in a
+    sorted list. Deleted IDs are left in place as tombstones and swept
+    out once they make up half of the list, which keeps deletes O(1)
+    amortized while cursors can still be found by bisection.
+
+    Running totals (item count, units in stock, stock value) and an index
+    of items by quantity are maintained alongside the secondary indexes,
+    so valuation and low-stock queries never scan the inventory.
+
+    Every mutation is also handed to a storage backend inside the
+    transaction, so the log order matches the order changes were applied.
+    The caller then waits for durability after the locks are released,
+    letting the backend group concurrent writes into one sync. The same
+    records go to a change feed that replicas can follow.
+
+    A shared backend lets several worker processes each keep a store over
+    the same data. Mutations then run under the backend's write lock,
+    after replaying the records other processes have logged, and
+    ``sync`` applies those records between writes.
+    """
+
+    def __init__(self, items=None, shards=DEFAULT_SHARDS, next_id=1, backend=None):
+        self._shards = [_Shard() for _ in range(shards)]
+        self._by_barcode = {}
+        self._by_brand = {}
+        self._text_index = SearchIndex()
+        self._aggregates = InventoryAggregates()
+        self._index_lock = RWLock()
+        self._next_id = next_id
+        self._id_lock = threading.Lock()
+        self._backend = backend or MemoryBackend()
+        self._sync_lock = threading.Lock()
+        self._order = []
+        self._tombstones = set()
+        # A shared backend numbers changes the same way in every process
+        self.changes = ChangeFeed(start=self._backend.seq if self.shared else None)
+        self._load(items or [])
+
+    def _load(self, items):
+        """Insert stored items into an empty store."""
+        for item in sorted(items, key=itemgetter("id")):
+            self._insert(InventoryItem({"version": 1, **item}))
+            self._order.append(item["id"])
+            self._next_id = max(self._next_id, item["id"] + 1)
+
+    def __len__(self):
+        return sum(len(shard.items) for shard in self._shards)
+
+    @property
+    def next_id(self):
+        """The ID the next added item will get."""
+        return self._next_id
+
+    @property
+    def shared(self):
+        """Whether other processes write through the same backend."""
+        return self._backend.shared
+
+    def close(self):
+        """Flush and close the storage backend."""
+        self._backend.close()
+
+    def after_fork(self):
+        """Reopen the backend in a forked worker process."""
+        self._sync_lock = threading.Lock()
+        self._backend.after_fork()
+
+    def sync(self):
+        """
+        Apply the changes other processes made through a shared backend.
+
+        Waits for a write or sync in progress in this process, so the
+        store is current when it returns.
+        """
+        if not self.shared:
+            return
+        with self._sync_lock:
+            self._catch_up()
+
+    def _catch_up(self):
+        """Replay records from other processes (sync lock held)."""
+        records = self._backend.poll()
+        if records is None:
+            self._reload()
+            return
+        for record in records:
+            self._apply_record(record)
+
+    def _apply_record(self, record):
+        """Apply a put or delete logged by another process (sync lock held)."""
+        if record["op"] == "put":
+            item = InventoryItem(record["item"])
+            item_id = item["id"]
+            with self._id_lock:
+                if item_id >= self._next_id:
+                    self._order.append(item_id)
+                    self._next_id = item_id + 1
+            with self._transaction([item_id]):
+                old = self._shard(item_id).items.get(item_id)
+                if old is not None:
+                    self._unindex(old)
+                    self._aggregates.remove(old)
+                self._insert(item)
+                self.changes.record("put", item_id, item, seq=record["lsn"])
+        else:
+            item_id = record["id"]
+            with self._transaction([item_id]):
+                deleted = self._apply_delete(item_id)
+                self.changes.record("delete", item_id, seq=record["lsn"])
+            if deleted:
+                self._tombstone(item_id)
+
+    def _reload(self):
+        """Replace every item with the backend's state (sync lock held)."""
+        state = self._backend.load()
+        items, next_id = state if state is not None else ([], 1)
+        with self._transaction(range(len(self._shards))):
+            for shard in self._shards:
+                shard.items.clear()
+            self._by_barcode.clear()
+            self._by_brand.clear()
+            self._text_index = SearchIndex()
+            self._aggregates = InventoryAggregates()
+            with self._id_lock:
+                self._order = []
+                self._tombstones.clear()
+                self._next_id = next_id
+                self._load(items)
+            self.changes.reset(self._backend.seq)
+
+    @contextmanager
+    def _writing(self):
+        """
+        Exclude writers in other processes sharing the backend and catch
+        up with their changes first; a no-op for a private backend.
+        """
+        if not self.shared:
+            yield
+            return
+        with self._sync_lock, self._backend.write_lock():
+            self._catch_up()
+            yield
+
+    def _shard(self, item_id):
+        return self._shards[item_id % len(self._shards)]
+
+    def _index(self, item):
+        """Add an item to the secondary indexes (index lock held)."""
+        barcode = item.get("barcode")
+        if barcode:
+            self._by_barcode.setdefault(barcode, set()).add(item["id"])
+        for brand in _brand_keys(item.get("brands")):
+            self._by_brand.setdefault(brand, set()).add(item["id"])
+        self._text_index.add(item["id"], item)
+
+    def _unindex(self, item):
+        """Remove an item from the secondary indexes (index lock held)."""
+        barcode = item.get("barcode")
+        if barcode:
+            ids = self._by_barcode.get(barcode)
+            if ids is not None:
+                ids.discard(item["id"])
+                if not ids:
+                    del self._by_barcode[barcode]
+        for brand in _brand_keys(item.get("brands")):
+            ids = self._by_brand.get(brand)
+            if ids is not None:
+                ids.discard(item["id"])
+                if not ids:
+                    del self._by_brand[brand]
+        self._text_index.remove(item["id"])
+
+    def _allocate_id(self):
+        """Return a fresh item ID; safe to call from several threads."""
+        with self._id_lock:
+            new_id = self._next_id
+            self._next_id += 1
+            self._order.append(new_id)
+        return new_id
+
+    def _tombstone(self, item_id):
+        """Mark a deleted ID in the order list, compacting when sparse."""
+        with self._id_lock:
+            self._tombstones.add(item_id)
+            if len(self._tombstones) * 2 > len(self._order):
+                self._order = [i for i in self._order if i not in self._tombstones]
+                self._tombstones.clear()
+
+    @contextmanager
+    def _transaction(self, item_ids):
+        """
+        Write-lock every shard touching ``item_ids``, then the indexes.
+
+        Shards are locked in a fixed order so that concurrent transactions
+        over overlapping IDs cannot deadlock.
+        """
+        shards = [self._shards[n] for n in sorted({i % len(self._shards) for i in item_ids})]
+        for shard in shards:
+            shard.lock.acquire_write()
+        try:
+            with self._index_lock.write_locked():
+                yield
+        finally:
+            for shard in reversed(shards):
+                shard.lock.release_write()
+
+    def _log_put(self, item):
+        """Record a stored item in the backend and change feed (transaction held)."""
+        lsn = self._backend.append({"op": "put", "item": item})
+        self.changes.record("put", item["id"], item, seq=lsn if self.shared else None)
+        return lsn
+
+    def _log_delete(self, item_id):
+        """Record a deletion in the backend and change feed (transaction held)."""
+        lsn = self._backend.append({"op": "delete", "id": item_id})
+        self.changes.record("delete", item_id, seq=lsn if self.shared else None)
+        return lsn
+
+    def _insert(self, item):
+        """Store an item whose ID is already set (transaction held)."""
+        self._shard(item["id"]).items[item["id"]] = item
+        self._index(item)
+        self._aggregates.add(item)
+
+    def _apply_update(self, item_id, updated_data, expected_versions=None):
+        """
+        Copy-on-write update of one item (transaction held).
+
+        Raises:
+            VersionConflict: If ``expected_versions`` is given and does not
+                contain the item's current version
+        """
+        shard = self._shard(item_id)
+        old = shard.items.get(item_id)
+        if old is None:
+            return None
+        if expected_versions is not None and old["version"] not in expected_versions:
+            raise VersionConflict(old)
+        item = old.replace(dict(updated_data, version=old["version"] + 1))
+        shard.items[item_id] = item
+        # Quantity and price changes do not touch any index
+        if not INDEXED_FIELDS.isdisjoint(updated_data):
+            self._unindex(old)
+            self._index(item)
+        self._aggregates.replace(old, item)
+        return item
+
+    def _apply_delete(self, item_id):
+        """Remove one item (transaction held)."""
+        item = self._shard(item_id).items.pop(item_id, None)
+        if item is None:
+            return False
+        self._unindex(item)
+        self._aggregates.remove(item)
+        return True
+
+    def _collect(self, ids):
+        """Return the live items for ``ids``, skipping any deleted since."""
+        items = []
+        for item_id in ids:
+            item = self.get(item_id)
+            if item is not None:
+                items.append(item)
+        return items
+
+    def all(self):
+        """
+        Return all items ordered by ID.
+
+        Each shard is read under its own lock, so the result is not an
+        atomic snapshot across shards, but every item in it is complete.
+        """
+        items = []
+        for shard in self._shards:
+            with shard.lock.read_locked():
+                items.extend(shard.items.values())
+        items.sort(key=attrgetter("id"))
+        return items
+
+    def get(self, item_id):
+        """Return the item with the given ID, or None."""
+        shard = self._shard(item_id)
+        with shard.lock.read_locked():
+            return shard.items.get(item_id)
+
+    def add(self, item):
+        """Assign the next ID to ``item`` and store it."""
+        return self.add_many([item])[0]
+
+    def add_many(self, items):
+        """Store several new items in one transaction."""
+        lsn = 0
+        with self._writing():
+            items = [InventoryItem(dict(item, id=self._allocate_id(), version=1)) for item in items]
+            with self._transaction([item["id"] for item in items]):
+                for item in items:
+                    self._insert(item)
+                    lsn = self._log_put(item)
+        self._backend.wait(lsn)
+        return items
+
+    def update(self, item_id, updated_data, expected_versions=None):
+        """
+        Replace an item with a copy that has ``updated_data`` applied.
+
+        Raises:
+            VersionConflict: If the item's version is not in ``expected_versions``
+        """
+        lsn = 0
+        with self._writing(), self._transaction([item_id]):
+            item = self._apply_update(item_id, updated_data, expected_versions)
+            if item is not None:
+                lsn = self._log_put(item)
+        self._backend.wait(lsn)
+        return item
+
+    def adjust(self, item_id, delta, expected_versions=None):
+        """
+        Atomically add ``delta`` to an item's quantity.
+
+        Raises:
+            VersionConflict: If the item's version is not in ``expected_versions``
+            InsufficientStock: If the quantity would drop below zero
+            InvalidQuantity: If the stored quantity is not an integer
+        """
+        lsn = 0
+        with self._writing(), self._transaction([item_id]):
+            old = self._shard(item_id).items.get(item_id)
+            if old is None:
+                return None
+            quantity = old.get("quantity")
+            if quantity is None:
+                quantity = 0
+            elif not isinstance(quantity, int) or isinstance(quantity, bool):
+                raise InvalidQuantity(old)
+            if quantity + delta < 0:
+                raise InsufficientStock(old)
+            item = self._apply_update(item_id, {"quantity": quantity + delta}, expected_versions)
+            lsn = self._log_put(item)
+        self._backend.wait(lsn)
+        return item
+
+    def update_many(self, updates):
+        """
+        Apply several ``(item_id, updated_data)`` pairs in one transaction.
+
+        Returns the updated items in order, with None for unknown IDs.
+        """
+        lsn = 0
+        with self._writing(), self._transaction([item_id for item_id, _ in updates]):
+            updated = [self._apply_update(item_id, data) for item_id, data in updates]
+            for item in updated:
+                if item is not None:
+                    lsn = self._log_put(item)
+        self._backend.wait(lsn)
+        return updated
+
+    def delete(self, item_id):
+        """Remove an item, returning True if it existed."""
+        return self.delete_many([item_id])[0]
+
+    def delete_many(self, item_ids):
+        """Remove several items in one transaction, returning a flag per ID."""
+        lsn = 0
+        with self._writing(), self._transaction(item_ids):
+            deleted = [self._apply_delete(item_id) for item_id in item_ids]
+            for item_id, was_deleted in zip(item_ids, deleted):
+                if was_deleted:
+                    lsn = self._log_delete(item_id)
+        self._backend.wait(lsn)
+        for item_id, was_deleted in zip(item_ids, deleted):
+            if was_deleted:
+                self._tombstone(item_id)
+        return deleted
+
+    def wait_for_changes(self, since, timeout):
+        """
+        Block until there is a change after ``since`` or ``timeout`` expires.
+
+        With a shared backend, other processes' changes are polled for
+        every SHARED_POLL_INTERVAL seconds meanwhile.
+        """
+        if not self.shared:
+            return self.changes.wait(since, timeout)
+        deadline = time.monotonic() + timeout
+        while True:
+            self.sync()
+            remaining = deadline - time.monotonic()
+            if self.changes.wait(since, max(0, min(remaining, SHARED_POLL_INTERVAL))) \
+                    or remaining <= SHARED_POLL_INTERVAL:
+                return self.changes.seq != since
+
+    def iter_items(self, after=0, brand=None, quantity=None, price=None):
+        """
+        Yield items with an ID greater than ``after``, in ID order.
+
+        Items are fetched one at a time, so the generator can be consumed
+        lazily and tolerates concurrent writes: items deleted before they
+        are reached are skipped, and items added while iterating may or may
+        not be included.
+
+        The walk starts from the index that selects the fewest items. A
+        range matching more than RANGE_INDEX_MAX_SHARE of the inventory is
+        only checked along the way instead, since sorting that many IDs
+        costs more than skipping the few items it rules out.
+
+        Args:
+            after (int): Cursor; only items with a larger ID are yielded
+            brand (str): Restrict to items of this brand using the brand index
+            quantity (tuple): Inclusive (low, high) quantity bounds, either
+                of which may be None; only numeric quantities match
+            price (tuple): Inclusive (low, high) price bounds, as for quantity
+
+        Yields:
+            InventoryItem: Inventory items
+        """
+        ranges = [(field, bounds) for field, bounds in (("quantity", quantity), ("price", price))
+                  if bounds is not None]
+        with self._index_lock.read_locked():
+            brand_key = None if brand is None else brand.strip().lower()
+            ids = None if brand is None else self._by_brand.get(brand_key, ())
+            limit = len(ids) if ids is not None else self._aggregates.count * RANGE_INDEX_MAX_SHARE
+            for field, bounds in ranges:
+                index = self._aggregates.by_quantity if field == "quantity" else self._aggregates.by_price
+                count = index.count_between(*bounds)
+                if count <= limit:
+                    ids, limit = [item_id for _, item_id in index.between(*bounds)], count
+            ids = self._order if ids is None else sorted(ids)
+        position = bisect_right(ids, after)
+        while position < len(ids):
+            item = self.get(ids[position])
+            position += 1
+            if item is None or not all(in_range(item.get(field), *bounds) for field, bounds in ranges):
+                continue
+            # The walk may have started from a range index instead of the brand's
+            if brand_key is None or brand_key in _brand_keys(item.get("brands")):
+                yield item
+
+    def find_by_barcode(self, barcode):
+        """Return all items carrying ``barcode``, ordered by ID."""
+        with self._index_lock.read_locked():
+            ids = sorted(self._by_barcode.get(barcode, ()))
+        return self._collect(ids)
+
+    def search(self, query, limit=10):
+        """Return the items best matching a free-text query."""
+        with self._index_lock.read_locked():
+            ids = self._text_index.search(query, limit)
+        return self._collect(ids)
+
+    def low_stock(self, threshold, limit=100):
+        """
+        Return items whose quantity is below ``threshold``, lowest first.
+
+        Args:
+            threshold (int): Reorder level
+            limit (int): Maximum number of items to return
+
+        Returns:
+            tuple: (items, total number of items below the threshold)
+        """
+        with self._index_lock.read_locked():
+            ids = [item_id for _, item_id in islice(self._aggregates.by_quantity.below(threshold), limit)]
+            count = self._aggregates.by_quantity.count_below(threshold)
+        return self._collect(ids), count
+
+    def stats(self, low_stock_threshold):
+        """Return item count, units in stock, stock value and stock level counts."""
+        with self._index_lock.read_locked():
+            return self._aggregates.stats(low_stock_threshold)
+
+    def find_by_brand(self, brand):
+        """Return all items of ``brand`` (case-insensitive), ordered by ID."""
+        with self._index_lock.read_locked():
+            ids = sorted(self._by_brand.get(brand.strip().lower(), ()))
+        return self._collect(ids)
+
+
+store = InventoryStore(SEED_ITEMS)
+
+
+def configure_storage(backend):
+    """
+    Replace the inventory with one persisted by ``backend``.
+
+    The previous store is closed. The new store starts from the state the
+    backend has saved, or empty if it has none.
+
+    Args:
+        backend (MemoryBackend): Storage backend from app.storage
+
+    Returns:
+        InventoryStore: The new store
+    """
+    global store
+    store.close()
+    state = backend.load()
+    items, next_id = state if state is not None else ([], 1)
+    store = InventoryStore(items, next_id=next_id, backend=backend)
+    backend.attach(store)
+    return store
+
+
+def configure_change_feed(retention):
+    """
+    Set how many recent changes the store keeps for replicas.
+
+    Args:
+        retention (int): Number of changes in the retention ring
+    """
+    store.changes.retention = retention
+
+
+def sync_store():
+    """Apply changes made by other processes sharing the store's backend."""
+    store.sync()
+
+
+@store_operation_seconds.time("all")
 def get_all_items():
     """Return all inventory items."""
-    return inventory
+    return store.all()
 
+@store_operation_seconds.time("get")
 def get_item_by_id(item_id):
     """
     Return an item by its ID.
-    
+
     Args:
         item_id (int): ID of the item to retrieve
-        
+
+    Returns:
+        InventoryItem or None: Inventory item if found, None otherwise
+    """
+    return store.get(item_id)
+
+def iter_items(after=0, brand=None, quantity=None, price=None):
+    """
+    Lazily iterate over inventory items in ID order.
+
+    Args:
+        after (int): Only yield items whose ID is greater than this cursor
+        brand (str, optional): Only yield items of this brand
+        quantity (tuple, optional): Inclusive (low, high) quantity bounds;
+            None leaves a side open
+        price (tuple, optional): Inclusive (low, high) price bounds
+
+    Returns:
+        generator: Inventory items
+    """
+    return store.iter_items(after=after, brand=brand, quantity=quantity, price=price)
+
+@store_operation_seconds.time("find_by_barcode")
+def get_items_by_barcode(barcode):
+    """
+    Return all items with the given barcode.
+
+    Args:
+        barcode (str): Product barcode
+
+    Returns:
+        list: Matching inventory items
+    """
+    return store.find_by_barcode(barcode)
+
+@store_operation_seconds.time("find_by_brand")
+def get_items_by_brand(brand):
+    """
+    Return all items sold under the given brand.
+
+    Args:
+        brand (str): Brand name (case-insensitive)
+
+    Returns:
+        list: Matching inventory items
+    """
+    return store.find_by_brand(brand)
+
+@store_operation_seconds.time("search")
+def search_items(query, limit=10):
+    """
+    Full-text search over product names, brands and ingredients.
+
+    Args:
+        query (str): Search terms; each may match as a prefix
+        limit (int): Maximum number of results
+
+    Returns:
+        list: Matching inventory items, best match first
+    """
+    return store.search(query, limit)
+
+@store_operation_seconds.time("low_stock")
+def get_low_stock_items(threshold, limit=100):
+    """
+    Return the items whose quantity is below a reorder level.
+
+    Args:
+        threshold (int): Reorder level
+        limit (int): Maximum number of items to return
+
+    Returns:
+        tuple: (items ordered by quantity, total number below the threshold)
+    """
+    return store.low_stock(threshold, limit)
+
+@store_operation_seconds.time("stats")
+def get_inventory_stats(low_stock_threshold):
+    """
+    Return inventory totals without scanning the items.
+
+    Args:
+        low_stock_threshold (int): Quantity below which an item counts as low on stock
+
     Returns:
-        dict or None: Inventory item if found, None otherwise
+        dict: Item count, total quantity, total stock value (quantity * price)
+        and the number of items out of stock and low on stock
     """
-    for item in inventory:
-        if item["id"] == item_id:
-            return item
-    return None
+    return store.stats(low_stock_threshold)
 
+@store_operation_seconds.time("add")
 def add_item(item):
     """
     Add a new item to the inventory.
-    
+
     Args:
         item (dict): Item to add
-        
+
     Returns:
-        dict: The added item with assigned ID
+        InventoryItem: The added item with assigned ID
     """
-    # Generate new ID (max ID + 1)
-    new_id = max([item["id"] for item in inventory], default=0) + 1
-    item["id"] = new_id
-    inventory.append(item)
-    return item
+    return store.add(item)
 
-def update_item(item_id, updated_data):
+@store_operation_seconds.time("update")
+def update_item(item_id, updated_data, expected_versions=None):
     """
     Update an existing item.
-    
+
     Args:
         item_id (int): ID of the item to update
         updated_data (dict): New data for the item
-        
+        expected_versions (set, optional): Only update if the item is at
+            one of these versions
+
     Returns:
-        dict or None: Updated item if found, None otherwise
+        InventoryItem or None: Updated item if found, None otherwise
+
+    Raises:
+        VersionConflict: If the item is at another version
     """
-    item = get_item_by_id(item_id)
-    if item:
-        for key, value in updated_data.items():
-            if key != "id":  # Prevent ID from being changed
-                item[key] = value
-        return item
-    return None
+    return store.update(item_id, updated_data, expected_versions)
+
+@store_operation_seconds.time("adjust")
+def adjust_item_quantity(item_id, delta, expected_versions=None):
+    """
+    Atomically change an item's quantity by a relative amount.
+
+    Args:
+        item_id (int): ID of the item to adjust
+        delta (int): Amount to add; negative for sales
+        expected_versions (set, optional): Only adjust if the item is at
+            one of these versions
+
+    Returns:
+        InventoryItem or None: Adjusted item if found, None otherwise
 
+    Raises:
+        VersionConflict: If the item is at another version
+        InsufficientStock: If the quantity would drop below zero
+        InvalidQuantity: If the stored quantity is not an integer
+    """
+    return store.adjust(item_id, delta, expected_versions)
+
+@store_operation_seconds.time("delete")
 def delete_item(item_id):
     """
     Delete an item from the inventory.
-    
+
     Args:
         item_id (int): ID of the item to delete
-        
+
     Returns:
         bool: True if item was deleted, False otherwise
     """
-    global inventory
-    for i, item in enumerate(inventory):
-        if item["id"] == item_id:
-            del inventory[i]
-            return True
-    return False
\ No newline at end of file
+    return store.delete(item_id)
+
+@store_operation_seconds.time("add_many")
+def add_items(items):
+    """
+    Add several items to the inventory in one transaction.
+
+    Args:
+        items (list): Items to add
+
+    Returns:
+        list: The added items with assigned IDs
+    """
+    return store.add_many(items)
+
+@store_operation_seconds.time("update_many")
+def update_items(updates):
+    """
+    Update several items in one transaction.
+
+    Args:
+        updates (list): (item_id, updated_data) pairs
+
+    Returns:
+        list: Updated items, with None for IDs that were not found
+    """
+    return store.update_many(updates)
+
+@store_operation_seconds.time("delete_many")
+def delete_items(item_ids):
+    """
+    Delete several items in one transaction.
+
+    Args:
+        item_ids (list): IDs of the items to delete
+
+    Returns:
+        list: True for each item that was deleted, False otherwise
+    """
+    return store.delete_many(item_ids)
+
+def get_change_seq():
+    """Return the sequence number of the latest inventory change."""
+    return store.changes.seq
+
+def get_changes(since, limit=1000):
+    """
+    Return the inventory changes after a sequence number.
+
+    Args:
+        since (int): Last sequence number the caller has applied
+        limit (int): Maximum number of changes to return
+
+    Returns:
+        list or None: Changes in order, or None if they are no longer
+        retained and the caller must resync from a full listing
+    """
+    return store.changes.since(since, limit)
+
+def get_retained_changes():
+    """Return every change the feed still retains, oldest first."""
+    return store.changes.retained()
+
+def wait_for_changes(since, timeout):
+    """
+    Block until there is a change after ``since`` or ``timeout`` expires.
+
+    Returns:
+        bool: True if a newer change is available
+    """
+    return store.wait_for_changes(since, timeout)
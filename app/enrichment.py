@@ -0,0 +1,253 @@
+"""
+Background job filling in missing product metadata from OpenFoodFacts.
+
+The job walks the inventory in ID order, picks items that have a barcode
+but are missing some of ENRICHED_FIELDS, looks their barcodes up with
+bounded concurrency at its own pace, and writes the fields it found back
+with ``update_item``. Only empty fields are filled in, and only if the
+item has not changed since it was read. Lookups use the background lane
+of the upstream rate limiter, so they never hold up interactive ones.
+
+Progress is checkpointed after every batch as the last item ID scanned
+plus the job's counters. A job that is stopped, crashes or runs out of
+upstream retries resumes from the checkpoint; a finished job starts a
+new pass from the beginning, which picks up items that were not found
+or failed before.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, current_app, jsonify, request
+from app import db, external_api
+from app.ratelimit import BACKGROUND, TokenBucket
+
+# Item fields the job fills in from the matching product fields
+ENRICHED_FIELDS = ("brands", "ingredients_text")
+
+# Items scanned without finding a full batch before the job checkpoints anyway
+SCAN_CHUNK = 10000
+
+# Placeholder product_result() uses for missing values
+UNKNOWN = "Unknown"
+
+IDLE = "idle"
+RUNNING = "running"
+STOPPED = "stopped"
+FAILED = "failed"
+DONE = "done"
+
+
+def missing_fields(item):
+    """Return the ENRICHED_FIELDS an item lacks, or () if it has no barcode."""
+    if not item.get("barcode"):
+        return ()
+    return tuple(field for field in ENRICHED_FIELDS if not item.get(field))
+
+
+class EnrichmentJob:
+    """
+    One resumable enrichment run.
+
+    Attributes:
+        progress (dict): Status and counters, as saved in the checkpoint
+    """
+
+    def __init__(self, checkpoint=None, batch_size=100, max_workers=4, rate=1.5, restart=False):
+        """
+        Args:
+            checkpoint (str, optional): JSON file progress is saved to and
+                resumed from; without one the job cannot resume after a restart
+            batch_size (int): Items looked up between checkpoints
+            max_workers (int): Concurrent lookups
+            rate (float): Upstream requests per second; 0 for no limit
+            restart (bool): Ignore the checkpoint and scan from the start
+        """
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        # Paces this job on top of the shared upstream budget
+        self.pacing = TokenBucket(rate, 1) if rate else None
+        # Background thread running the job, set by start_job()
+        self.thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        saved = None if restart else load_checkpoint(checkpoint)
+        if saved is not None and saved["status"] != DONE:
+            self.progress = dict(saved, status=IDLE)
+        else:
+            self.progress = {
+                "status": IDLE, "after": 0, "scanned": 0, "candidates": 0,
+                "enriched": 0, "unchanged": 0, "not_found": 0, "failed": 0,
+                "conflicts": 0, "error": None
+            }
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.progress)
+
+    def stop(self):
+        """Ask the job to stop after the current batch."""
+        self._stop.set()
+
+    def _update(self, **changes):
+        with self._lock:
+            self.progress.update(changes)
+            progress = dict(self.progress)
+        if self.checkpoint:
+            save_checkpoint(self.checkpoint, progress)
+
+    def _batches(self):
+        """Yield (candidates, last ID scanned, number scanned) from the cursor on."""
+        batch, scanned, last = [], 0, self.progress["after"]
+        for item in db.iter_items(after=self.progress["after"]):
+            scanned += 1
+            last = item["id"]
+            if missing_fields(item):
+                batch.append(item)
+            if len(batch) == self.batch_size or scanned == SCAN_CHUNK:
+                yield batch, last, scanned
+                batch, scanned = [], 0
+        if scanned:
+            yield batch, last, scanned
+
+    def _pace(self):
+        """Wait for this job's next turn to contact the upstream."""
+        wait = self.pacing.take()
+        while wait:
+            time.sleep(wait)
+            wait = self.pacing.take()
+
+    def _enrich(self, item):
+        """Look up one item and fill in its missing fields; return the outcome."""
+        result = external_api.fetch_product_by_barcode(
+            item["barcode"], BACKGROUND, self._pace if self.pacing is not None else None)
+        if not result["success"]:
+            return "not_found" if result["message"] == external_api.PRODUCT_NOT_FOUND else "failed"
+        product = result["product"]
+        changes = {field: product[field] for field in missing_fields(item)
+                   if product.get(field) and product[field] != UNKNOWN}
+        if not changes:
+            return "unchanged"
+        try:
+            updated = db.update_item(item["id"], changes, expected_versions={item["version"]})
+        except db.VersionConflict:
+            return "conflicts"
+        return "enriched" if updated is not None else "unchanged"
+
+    def run(self):
+        """Process the inventory until done, stopped or the upstream fails."""
+        self._update(status=RUNNING, error=None)
+        try:
+            status, error = self._run()
+        except Exception as e:
+            status, error = FAILED, str(e)
+            raise
+        finally:
+            self._update(status=status, error=error)
+
+    def _run(self):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for batch, last, scanned in self._batches():
+                if self._stop.is_set():
+                    return STOPPED, None
+                outcomes = list(executor.map(self._enrich, batch))
+                if outcomes and outcomes.count("failed") == len(outcomes):
+                    # Keep the cursor before this batch so a resumed job retries it
+                    return FAILED, "Every lookup in the batch failed"
+                with self._lock:
+                    progress = self.progress
+                    changes = {outcome: progress[outcome] + outcomes.count(outcome)
+                               for outcome in set(outcomes)}
+                    changes.update(after=last, scanned=progress["scanned"] + scanned,
+                                   candidates=progress["candidates"] + len(batch))
+                self._update(**changes)
+        return DONE, None
+
+
+def load_checkpoint(path):
+    """Return the progress saved at ``path``, or None."""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def save_checkpoint(path, progress):
+    """Atomically replace the checkpoint at ``path``."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(progress, f)
+    os.replace(tmp_path, path)
+
+
+# The job started by start_job(), if any
+job = None
+_job_lock = threading.Lock()
+
+def start_job(**options):
+    """
+    Start an enrichment job in a background thread.
+
+    Args:
+        **options: EnrichmentJob arguments
+
+    Returns:
+        EnrichmentJob or None: The new job, or None if one is already running
+    """
+    global job
+    with _job_lock:
+        if job is not None and job.snapshot()["status"] == RUNNING:
+            return None
+        job = EnrichmentJob(**options)
+        job.progress["status"] = RUNNING
+        job.thread = threading.Thread(target=job.run, name="enrichment", daemon=True)
+        job.thread.start()
+        return job
+
+def job_progress(checkpoint=None):
+    """Return the progress of the current job, else the one in ``checkpoint``."""
+    if job is not None:
+        return job.snapshot()
+    saved = load_checkpoint(checkpoint)
+    if saved is None:
+        return {"status": IDLE}
+    if saved["status"] == RUNNING:
+        # Saved by a process that exited mid-run
+        saved["status"] = STOPPED
+    return saved
+
+
+enrichment_bp = Blueprint('enrichment', __name__)
+
+# POST /inventory/enrichment - Start filling in missing brands and ingredients
+# {"restart": true} ignores the checkpoint. Returns 202 with the progress,
+# or 409 if a job is already running.
+@enrichment_bp.route('/inventory/enrichment', methods=['POST'])
+def start_enrichment():
+    data = request.get_json(silent=True) or {}
+    config = current_app.config
+    started = start_job(
+        checkpoint=config["ENRICHMENT_CHECKPOINT"],
+        batch_size=config["ENRICHMENT_BATCH_SIZE"],
+        max_workers=config["ENRICHMENT_WORKERS"],
+        rate=config["ENRICHMENT_RATE"],
+        restart=bool(data.get("restart"))
+    )
+    if started is None:
+        return jsonify({"error": "An enrichment job is already running",
+                        "progress": job.snapshot()}), 409
+    return jsonify(started.snapshot()), 202
+
+# GET /inventory/enrichment - Progress of the current or last job
+@enrichment_bp.route('/inventory/enrichment', methods=['GET'])
+def get_enrichment():
+    return jsonify(job_progress(current_app.config["ENRICHMENT_CHECKPOINT"]))
+
+# DELETE /inventory/enrichment - Stop the running job after its current batch
+@enrichment_bp.route('/inventory/enrichment', methods=['DELETE'])
+def stop_enrichment():
+    if job is None or job.snapshot()["status"] != RUNNING:
+        return jsonify({"error": "No enrichment job is running"}), 404
+    job.stop()
+    return jsonify(job.snapshot()), 202
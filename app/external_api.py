@@ -1,47 +1,203 @@
 """
 Integration with the OpenFoodFacts API to fetch product details.
 """
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from app.cache import DiskCache, LookupCache
+from app.metrics import registry
+from app.singleflight import SingleFlight
+from app.ratelimit import INTERACTIVE, create_limiter
+from app.upstream import CircuitBreaker, RateLimitedError, UpstreamClient
 
 OPENFOODFACTS_API_URL = "https://world.openfoodfacts.org/api/v0/product/"
+OPENFOODFACTS_SEARCH_URL = "https://world.openfoodfacts.org/cgi/search.pl"
 
-def fetch_product_by_barcode(barcode):
+PRODUCT_NOT_FOUND = "Product not found"
+NO_PRODUCTS_FOUND = "No products found"
+
+# Cache of barcode lookups; replaced by configure_cache()
+barcode_cache = LookupCache()
+registry.caches.add("lookup", lambda: barcode_cache.stats())
+
+# Coalesce concurrent identical lookups into one upstream request
+barcode_flights = SingleFlight()
+name_flights = SingleFlight()
+
+# Shared, pooled HTTP client for OpenFoodFacts; replaced by configure_client()
+http_client = UpstreamClient()
+
+def configure_client(pool_size=10, connect_timeout=3.05, read_timeout=10, retries=2,
+                     backoff=0.2, breaker_threshold=5, breaker_reset=30, max_per_host=None,
+                     rate_limit=None):
+    """
+    Replace the HTTP client used to reach OpenFoodFacts.
+
+    Args:
+        pool_size (int): Keep-alive connections kept per host
+        connect_timeout (float): Seconds to wait for a connection
+        read_timeout (float): Seconds to wait for response data
+        retries (int): Extra attempts after a failed request
+        backoff (float): Base delay in seconds between attempts
+        breaker_threshold (int): Consecutive failures that open the circuit
+        breaker_reset (float): Seconds before an open circuit is retried
+        max_per_host (int, optional): Concurrent requests allowed per host;
+            defaults to ``pool_size``
+        rate_limit (dict, optional): app.ratelimit.create_limiter()
+            arguments; no rate limit by default
+
+    Returns:
+        UpstreamClient: The new client
+    """
+    global http_client
+    http_client.close()
+    http_client = UpstreamClient(
+        pool_size=pool_size,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        retries=retries,
+        backoff=backoff,
+        breaker=CircuitBreaker(breaker_threshold, breaker_reset),
+        max_per_host=max_per_host,
+        limiter=create_limiter(**rate_limit) if rate_limit else None
+    )
+    return http_client
+
+def configure_cache(maxsize=10000, ttl=3600, negative_ttl=300, path=None):
+    """
+    Replace the barcode lookup cache.
+
+    Args:
+        maxsize (int): Maximum number of entries kept in memory
+        ttl (float): Seconds a found product stays cached
+        negative_ttl (float): Seconds a "Product not found" result stays cached
+        path (str, optional): SQLite file for a persistent cache tier
+
+    Returns:
+        LookupCache: The new cache
+    """
+    global barcode_cache
+    if barcode_cache.disk is not None:
+        barcode_cache.disk.close()
+    disk = DiskCache(path) if path else None
+    barcode_cache = LookupCache(maxsize, ttl, negative_ttl, disk)
+    return barcode_cache
+
+def get_lookup_stats():
+    """Return the barcode cache and request coalescing counters."""
+    return {
+        "cache": barcode_cache.stats(),
+        "coalescing": {
+            "barcode": barcode_flights.stats(),
+            "name": name_flights.stats()
+        }
+    }
+
+def fetch_product_by_barcode(barcode, lane=INTERACTIVE, pace=None):
     """
     Fetch product details from OpenFoodFacts API by barcode.
     
     Args:
         barcode (str): Product barcode
+        lane (str): Rate limiter lane; background jobs pass
+            app.ratelimit.BACKGROUND so interactive lookups go first
+        pace (callable, optional): Called before OpenFoodFacts is
+            contacted, i.e. only on a cache miss; lets a caller throttle
+            its own requests
         
     Returns:
         dict: Product details or error message
     """
-    try:
-        response = requests.get(f"{OPENFOODFACTS_API_URL}{barcode}.json")
-        data = response.json()
-        
-        if data.get("status") == 1:
-            return {
-                "success": True,
-                "product": {
-                    "product_name": data.get("product", {}).get("product_name", "Unknown"),
-                    "brands": data.get("product", {}).get("brands", "Unknown"),
-                    "ingredients_text": data.get("product", {}).get("ingredients_text", ""),
-                    "image_url": data.get("product", {}).get("image_url", ""),
-                    "nutriscore_grade": data.get("product", {}).get("nutriscore_grade", ""),
-                    "categories": data.get("product", {}).get("categories", "")
-                }
-            }
-        else:
-            return {
-                "success": False,
-                "message": "Product not found"
+    cached = barcode_cache.get(barcode)
+    if cached is not None:
+        return cached
+    # Lookups only coalesce within a lane, so an interactive caller never
+    # waits on a background one queued for the background budget
+    return barcode_flights.do((barcode, lane), _fetch_and_cache_product, barcode, lane, pace)
+
+def _fetch_and_cache_product(barcode, lane=INTERACTIVE, pace=None):
+    """Fetch a product and cache found and not-found results."""
+    cache = barcode_cache
+    if pace is not None:
+        pace()
+    result = _fetch_product_by_barcode(barcode, lane)
+    cache_product_result(cache, barcode, result)
+    return result
+
+def cache_product_result(cache, barcode, result):
+    """Cache a found or not-found lookup result; failures are not cached."""
+    if result["success"]:
+        cache.set(barcode, result)
+    elif result["message"] == PRODUCT_NOT_FOUND:
+        cache.set(barcode, result, negative=True)
+
+def product_result(data):
+    """Shape an OpenFoodFacts product response into a lookup result."""
+    if data.get("status") == 1:
+        return {
+            "success": True,
+            "product": {
+                "product_name": data.get("product", {}).get("product_name", "Unknown"),
+                "brands": data.get("product", {}).get("brands", "Unknown"),
+                "ingredients_text": data.get("product", {}).get("ingredients_text", ""),
+                "image_url": data.get("product", {}).get("image_url", ""),
+                "nutriscore_grade": data.get("product", {}).get("nutriscore_grade", ""),
+                "categories": data.get("product", {}).get("categories", "")
             }
-    except requests.exceptions.RequestException as e:
+        }
+    else:
         return {
             "success": False,
-            "message": f"API request failed: {str(e)}"
+            "message": PRODUCT_NOT_FOUND
         }
 
+def request_failure(error):
+    """
+    Shape a failed upstream request into a lookup result.
+
+    Requests refused by the rate limiter carry ``retry_after`` seconds.
+    """
+    result = {
+        "success": False,
+        "message": f"API request failed: {str(error)}"
+    }
+    if isinstance(error, RateLimitedError):
+        result["retry_after"] = error.retry_after
+    return result
+
+def _fetch_product_by_barcode(barcode, lane=INTERACTIVE):
+    """Fetch a product from OpenFoodFacts, bypassing the cache."""
+    try:
+        response = http_client.get(f"{OPENFOODFACTS_API_URL}{barcode}.json", lane=lane)
+        if response.status_code != 404:
+            # An unknown barcode is a 404 whose body still says "product not found"
+            response.raise_for_status()
+        return product_result(response.json())
+    except requests.exceptions.RequestException as e:
+        return request_failure(e)
+
+def lookup_barcodes(barcodes, max_workers=8):
+    """
+    Look up many barcodes concurrently.
+
+    Duplicate barcodes are fetched once. Lookups run on a bounded thread
+    pool and still go through the cache and the per-host concurrency cap
+    of the HTTP client.
+
+    Args:
+        barcodes (list): Barcodes to look up
+        max_workers (int): Maximum number of concurrent lookups
+
+    Returns:
+        list: One result per input barcode, in input order, each with the
+            barcode added
+    """
+    unique = list(dict.fromkeys(barcodes))
+    if not unique:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(unique))) as executor:
+        results = dict(zip(unique, executor.map(fetch_product_by_barcode, unique)))
+    return [dict(results[barcode], barcode=barcode) for barcode in barcodes]
+
 def search_products_by_name(product_name):
     """
     Search products by name using OpenFoodFacts API.
@@ -52,37 +208,43 @@ def search_products_by_name(product_name):
     Returns:
         dict: Search results or error message
     """
-    try:
-        response = requests.get(
-            "https://world.openfoodfacts.org/cgi/search.pl", 
-            params={
-                "search_terms": product_name,
-                "json": 1,
-                "page_size": 5  # Limit results to 5 products
-            }
-        )
-        data = response.json()
-        
-        if data.get("products"):
-            results = []
-            for product in data.get("products", []):
-                results.append({
-                    "product_name": product.get("product_name", "Unknown"),
-                    "brands": product.get("brands", "Unknown"),
-                    "barcode": product.get("code", ""),
-                    "ingredients_text": product.get("ingredients_text", "")
-                })
-            return {
-                "success": True,
-                "products": results
-            }
-        else:
-            return {
-                "success": False,
-                "message": "No products found"
-            }
-    except requests.exceptions.RequestException as e:
+    return name_flights.do(product_name, _search_products_by_name, product_name)
+
+def search_params(product_name):
+    """Query parameters of an OpenFoodFacts name search."""
+    return {
+        "search_terms": product_name,
+        "json": 1,
+        "page_size": 5  # Limit results to 5 products
+    }
+
+def search_result(data):
+    """Shape an OpenFoodFacts search response into a lookup result."""
+    if data.get("products"):
+        results = []
+        for product in data.get("products", []):
+            results.append({
+                "product_name": product.get("product_name", "Unknown"),
+                "brands": product.get("brands", "Unknown"),
+                "barcode": product.get("code", ""),
+                "ingredients_text": product.get("ingredients_text", "")
+            })
+        return {
+            "success": True,
+            "products": results
+        }
+    else:
         return {
             "success": False,
-            "message": f"API request failed: {str(e)}"
-        }
\ No newline at end of file
+            "message": NO_PRODUCTS_FOUND
+        }
+
+def _search_products_by_name(product_name):
+    """Search OpenFoodFacts by name."""
+    try:
+        response = http_client.get(OPENFOODFACTS_SEARCH_URL, params=search_params(product_name))
+        if response.status_code != 404:
+            response.raise_for_status()
+        return search_result(response.json())
+    except requests.exceptions.RequestException as e:
+        return request_failure(e)
\ No newline at end of file
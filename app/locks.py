@@ -0,0 +1,63 @@
+"""
+Locking primitives used by the inventory store.
+"""
+import threading
+from contextlib import contextmanager
+
+class RWLock:
+    """
+    Reader/writer lock.
+
+    Any number of readers may hold the lock at once; a writer holds it
+    alone. Waiting writers block new readers so that a steady stream of
+    GETs cannot starve a PATCH. The lock is not reentrant.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    @contextmanager
+    def read_locked(self):
+        """Hold the lock for reading inside a ``with`` block."""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_locked(self):
+        """Hold the lock for writing inside a ``with`` block."""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
@@ -0,0 +1,227 @@
+"""
+In-process metrics exposed in the Prometheus text format on GET /metrics.
+
+Counters and histograms are plain Python objects updated under a lock
+per metric, so recording a sample costs about a microsecond. Cache hit
+ratios are not recorded at all: they are read from the caches' own
+counters when /metrics is scraped.
+
+Each worker process keeps its own metrics; with several workers every
+scrape reports the one that answered it.
+"""
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from flask import Blueprint, Response, g, request
+
+# Upper bounds of the latency buckets, in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count, optionally split by label values."""
+
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        """Add ``amount`` to the count for ``labelvalues``."""
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues):
+        with self._lock:
+            return self._values.get(labelvalues, 0)
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labelvalues, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}"
+
+
+class Histogram:
+    """Distribution of observed values in cumulative buckets, plus sum and count."""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labelvalues -> [per-bucket counts (last one is +Inf), sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        """Record one observation for ``labelvalues``."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *labelvalues):
+        with self._lock:
+            series = self._series.get(labelvalues)
+            return sum(series[0]) if series else 0
+
+    def time(self, *labelvalues):
+        """Decorator recording the duration of each call."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - start, *labelvalues)
+            return wrapper
+        return decorator
+
+    def render(self):
+        with self._lock:
+            series = sorted((labelvalues, (list(counts), total))
+                            for labelvalues, (counts, total) in self._series.items())
+        for labelvalues, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, labelvalues, f'le="{bound}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class CacheMetrics:
+    """Hit and miss counters and hit ratio read from caches' ``stats()``."""
+
+    def __init__(self):
+        self._caches = {}
+
+    def add(self, name, get_stats):
+        """
+        Report a cache under ``name``.
+
+        Args:
+            name (str): Value of the ``cache`` label
+            get_stats (callable): Returns a dict with "hits" and "misses"
+        """
+        self._caches[name] = get_stats
+
+    def render(self):
+        stats = {name: get_stats() for name, get_stats in sorted(self._caches.items())}
+        for metric, kind, documentation, key in (
+            ("cache_hits_total", "counter", "Cache lookups answered from the cache.", "hits"),
+            ("cache_misses_total", "counter", "Cache lookups that missed.", "misses"),
+            ("cache_hit_ratio", "gauge", "Fraction of cache lookups that hit.", None)
+        ):
+            yield f"# HELP {metric} {documentation}"
+            yield f"# TYPE {metric} {kind}"
+            for name, values in stats.items():
+                if key is None:
+                    lookups = values["hits"] + values["misses"]
+                    value = values["hits"] / lookups if lookups else 0.0
+                else:
+                    value = values[key]
+                yield f'{metric}{{cache="{name}"}} {_format_value(value)}'
+
+
+class Registry:
+    """The metrics reported on GET /metrics."""
+
+    def __init__(self):
+        self._metrics = []
+        self.caches = CacheMetrics()
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        lines.extend(self.caches.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds", "Time to handle an HTTP request.",
+    ("method", "route", "status")
+)
+store_operation_seconds = registry.histogram(
+    "inventory_store_operation_seconds", "Time spent in inventory store operations.",
+    ("operation",)
+)
+upstream_request_seconds = registry.histogram(
+    "upstream_request_duration_seconds", "Time per OpenFoodFacts request attempt.",
+    ("outcome",)
+)
+upstream_errors = registry.counter(
+    "upstream_errors_total", "Failed OpenFoodFacts request attempts.", ("reason",)
+)
+
+
+def _start_timer():
+    g.metrics_start = time.perf_counter()
+
+def _observe_request(response):
+    start = g.pop("metrics_start", None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        http_request_seconds.observe(time.perf_counter() - start,
+                                     request.method, route, str(response.status_code))
+    return response
+
+def instrument(app):
+    """
+    Time every request to ``app`` by route.
+
+    Register before other request hooks so their time is included.
+    Streamed bodies are timed until the response starts.
+    """
+    app.before_request(_start_timer)
+    app.after_request(_observe_request)
+
+
+metrics_bp = Blueprint('metrics', __name__)
+
+# GET /metrics - Prometheus scrape endpoint
+@metrics_bp.route('/metrics')
+def get_metrics():
+    return Response(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
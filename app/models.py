@@ -0,0 +1,139 @@
+"""
+Compact in-memory representation of inventory items.
+"""
+import sys
+
+# Fields every item may have, in the order they are serialized
+ITEM_FIELDS = ("id", "product_name", "brands", "ingredients_text", "quantity", "price", "barcode", "version")
+
+_MISSING = object()
+
+class InventoryItem:
+    """
+    Slotted inventory record.
+
+    A plain dict per item costs a hash table per SKU plus the key
+    strings' slots; a ``__slots__`` record stores the known fields as
+    fixed attributes instead. Brand names repeat across many items, so
+    they are interned and shared. Fields outside ITEM_FIELDS that a client
+    sends are kept in a small ``extra`` dict, which stays None for the
+    common case.
+
+    Records are immutable by convention: updates build a new record with
+    ``replace``, which the store's copy-on-write updates rely on. They
+    behave like read-only mappings, and ``to_dict`` materializes a plain
+    dict at the JSON boundary.
+    """
+
+    __slots__ = ITEM_FIELDS + ("extra",)
+
+    def __init__(self, fields):
+        """
+        Args:
+            fields (dict): Field values; any key is allowed, including ones
+                that are not Python identifiers
+        """
+        extra = None
+        for key, value in fields.items():
+            if key in ITEM_FIELDS:
+                if key == "brands" and isinstance(value, str):
+                    value = sys.intern(value)
+                object.__setattr__(self, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        object.__setattr__(self, "extra", extra)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from a dict such as a parsed request body."""
+        return data if isinstance(data, cls) else cls(data)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("InventoryItem is immutable; use replace()")
+
+    def replace(self, changes):
+        """
+        Return a copy with ``changes`` applied; the ID cannot be changed.
+
+        Args:
+            changes (dict): Fields to set
+
+        Returns:
+            InventoryItem: The updated copy
+        """
+        fields = self.to_dict()
+        for key, value in changes.items():
+            if key != "id":  # Prevent ID from being changed
+                fields[key] = value
+        return InventoryItem(fields)
+
+    def to_dict(self):
+        """Materialize the record as a plain dict."""
+        data = {}
+        for field in ITEM_FIELDS:
+            value = getattr(self, field, _MISSING)
+            if value is not _MISSING:
+                data[field] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def get(self, key, default=None):
+        if key in ITEM_FIELDS:
+            return getattr(self, key, default)
+        if self.extra:
+            return self.extra.get(key, default)
+        return default
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def items(self):
+        return self.to_dict().items()
+
+    def __iter__(self):
+        return iter(self.to_dict())
+
+    def __len__(self):
+        return len(self.to_dict())
+
+    def __eq__(self, other):
+        if isinstance(other, InventoryItem):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"InventoryItem({self.to_dict()!r})"
+
+
+def to_json_default(obj):
+    """
+    ``default`` hook for json.dumps that materializes inventory records.
+
+    Args:
+        obj: Object the encoder could not serialize
+
+    Returns:
+        dict: Plain representation of ``obj``
+
+    Raises:
+        TypeError: If ``obj`` is not an inventory record
+    """
+    if isinstance(obj, InventoryItem):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,61 @@
+"""
+Opt-in per-request profiling for development.
+
+With PROFILE_REQUESTS enabled, a request carrying ``?profile=1`` is
+handled as usual under cProfile, and the response is replaced by a text
+summary of where the time went. Never enable this in production: any
+client could make the server profile its requests.
+"""
+import cProfile
+import io
+import pstats
+import time
+from urllib.parse import parse_qs
+
+
+class RequestProfiler:
+    """
+    WSGI middleware answering ``?profile=1`` requests with a cProfile summary.
+
+    Args:
+        app (callable): WSGI application to profile
+        sort (str): pstats sort key
+        limit (int): Number of functions listed
+    """
+
+    def __init__(self, app, sort="cumulative", limit=40):
+        self.app = app
+        self.sort = sort
+        self.limit = limit
+
+    def __call__(self, environ, start_response):
+        if parse_qs(environ.get("QUERY_STRING", "")).get("profile") != ["1"]:
+            return self.app(environ, start_response)
+
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured["status"] = status
+            return lambda data: None
+
+        def handle():
+            body = self.app(environ, capture)
+            try:
+                return sum(len(chunk) for chunk in body)
+            finally:
+                if hasattr(body, "close"):
+                    body.close()
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        size = profiler.runcall(handle)
+        elapsed = time.perf_counter() - start
+
+        out = io.StringIO()
+        out.write(f"{environ['REQUEST_METHOD']} {environ.get('PATH_INFO', '')}: "
+                  f"{captured.get('status')}, {size} bytes in {elapsed * 1000:.1f}ms\n\n")
+        pstats.Stats(profiler, stream=out).sort_stats(self.sort).print_stats(self.limit)
+        data = out.getvalue().encode()
+        start_response("200 OK", [("Content-Type", "text/plain; charset=utf-8"),
+                                  ("Content-Length", str(len(data)))])
+        return [data]
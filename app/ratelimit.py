@@ -0,0 +1,187 @@
+"""
+Token-bucket rate limiting for upstream requests, with priority lanes.
+
+A bucket holds up to ``burst`` tokens and refills at ``rate`` tokens per
+second; every request to the upstream takes one. The bucket's state can
+live in a small file guarded by ``flock``, so every worker process on a
+host draws from the same budget.
+
+Callers queue for tokens instead of failing outright, but only up to a
+per-lane wait. Interactive lookups always come first: background callers
+leave ``reserve`` tokens in the bucket for them, which holds across
+processes, and within a process they also stand aside while an
+interactive caller is waiting.
+"""
+import asyncio
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# Layout of a shared bucket file: tokens, time of the last refill
+_STATE = struct.Struct("dd")
+
+
+class TokenBucket:
+    """
+    Tokens refilled continuously at ``rate`` per second, up to ``burst``.
+
+    With ``path`` the state is kept in that file and updated under an
+    exclusive ``flock``, so buckets opened on the same file in several
+    processes share one budget. Shared buckets use the wall clock, which
+    every process agrees on.
+    """
+
+    def __init__(self, rate, burst, path=None, clock=time.time):
+        if path and fcntl is None:
+            raise RuntimeError("Sharing a TokenBucket through a file requires fcntl")
+        self.rate = rate
+        self.burst = burst
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600) if path else None
+
+    @contextmanager
+    def _state(self):
+        """Yield the mutable ``[tokens, updated]`` state and save it afterwards."""
+        with self._lock:
+            if self._fd is None:
+                state = [self._tokens, self._updated]
+                yield state
+                self._tokens, self._updated = state
+                return
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                data = os.pread(self._fd, _STATE.size, 0)
+                state = list(_STATE.unpack(data)) if len(data) == _STATE.size \
+                    else [float(self.burst), self._clock()]
+                yield state
+                os.pwrite(self._fd, _STATE.pack(*state), 0)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def take(self, reserve=0):
+        """
+        Take a token if at least ``reserve`` would be left afterwards.
+
+        Returns:
+            float: 0 if a token was taken, else the seconds until one
+            is expected to be available
+        """
+        with self._state() as state:
+            now = self._clock()
+            tokens = min(self.burst, state[0] + max(0.0, now - state[1]) * self.rate)
+            if tokens >= reserve + 1:
+                state[:] = [tokens - 1, now]
+                return 0.0
+            state[:] = [tokens, now]
+            return (reserve + 1 - tokens) / self.rate
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class RateLimiter:
+    """
+    Queue callers for tokens from a bucket, interactive lane first.
+
+    Attributes:
+        bucket (TokenBucket): Bucket tokens are taken from
+        reserve (int): Tokens background callers leave for interactive ones
+        max_wait (dict): Longest each lane queues for a token, in seconds
+    """
+
+    def __init__(self, bucket, reserve=0, interactive_wait=5, background_wait=60,
+                 clock=time.monotonic):
+        self.bucket = bucket
+        self.reserve = reserve
+        self.max_wait = {INTERACTIVE: interactive_wait, BACKGROUND: background_wait}
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._interactive_waiting = 0
+
+    def acquire(self, lane=INTERACTIVE):
+        """
+        Wait for a token, for at most the lane's ``max_wait``.
+
+        Returns:
+            float: 0 once a token was taken; otherwise the wait for the
+            next token, which would have exceeded ``max_wait``
+        """
+        deadline = self._clock() + self.max_wait[lane]
+        interactive = lane == INTERACTIVE
+        if interactive:
+            with self._cond:
+                self._interactive_waiting += 1
+        try:
+            while True:
+                with self._cond:
+                    # Background callers stand aside while an interactive one waits
+                    while not interactive and self._interactive_waiting:
+                        remaining = deadline - self._clock()
+                        if remaining <= 0:
+                            return 1 / self.bucket.rate
+                        self._cond.wait(remaining)
+                wait = self.bucket.take(0 if interactive else self.reserve)
+                if not wait:
+                    return 0.0
+                if self._clock() + wait > deadline:
+                    return wait
+                with self._cond:
+                    self._cond.wait(wait)
+        finally:
+            if interactive:
+                with self._cond:
+                    self._interactive_waiting -= 1
+                    self._cond.notify_all()
+
+    async def acquire_async(self, lane=INTERACTIVE):
+        """
+        Coroutine version of ``acquire`` for a single event loop.
+
+        Only the bucket's reserve separates the lanes here.
+        """
+        deadline = self._clock() + self.max_wait[lane]
+        reserve = 0 if lane == INTERACTIVE else self.reserve
+        while True:
+            wait = self.bucket.take(reserve)
+            if not wait:
+                return 0.0
+            if self._clock() + wait > deadline:
+                return wait
+            await asyncio.sleep(wait)
+
+    def close(self):
+        self.bucket.close()
+
+
+def create_limiter(rate, burst=10, path=None, reserve=0, interactive_wait=5, background_wait=60):
+    """
+    Build a RateLimiter, or return None if ``rate`` is not set.
+
+    Args:
+        rate (float): Requests per second; None or 0 for no limit
+        burst (int): Requests allowed at once after an idle period
+        path (str, optional): File shared by the processes drawing from
+            the same budget
+        reserve (int): Tokens background callers leave for interactive ones
+        interactive_wait (float): Seconds an interactive caller may queue
+        background_wait (float): Seconds a background caller may queue
+    """
+    if not rate:
+        return None
+    return RateLimiter(TokenBucket(rate, burst, path), reserve, interactive_wait, background_wait)
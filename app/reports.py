@@ -0,0 +1,387 @@
+"""
+Catalog-wide analytics computed over columnar snapshots of the inventory.
+
+A snapshot copies the fields reports need into one column per field
+(NumPy arrays when NumPy is installed), with brands and categories
+encoded as integer group codes. Group-by rollups, percentiles and
+histograms then run as vectorized operations over whole columns rather
+than Python loops over item dicts. Without NumPy the same reports are
+computed in pure Python, with identical results.
+
+Snapshots are cached until the inventory changes, so several reports
+rendered for one dashboard refresh share a single copy.
+"""
+import math
+from flask import Blueprint, jsonify, request
+from app import db
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Label of the group for items without a brand or category
+NO_GROUP = "(none)"
+
+# Percentiles reported by price_distribution()
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+
+# Fields that items can be grouped by, and the item field each reads
+GROUP_FIELDS = {"brand": "brands", "category": "categories"}
+
+
+def _number(value):
+    """Return ``value`` as a float, or NaN if it is not a finite number."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        return math.nan
+    return float(value)
+
+def _first(value):
+    """Return the first entry of a comma-separated field, or NO_GROUP."""
+    if isinstance(value, str):
+        first = value.split(",", 1)[0].strip()
+        if first:
+            return first
+    return NO_GROUP
+
+def _money(value):
+    return round(float(value), 2)
+
+def _units(value):
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+class Snapshot:
+    """
+    Columnar copy of the inventory.
+
+    Attributes:
+        ids: Item IDs in ascending order
+        quantities: Quantities, NaN where not a number
+        prices: Prices, NaN where not a number
+        groups (dict): For "brand" and "category", a ``(names, codes)``
+            pair: the group names and each item's index into them
+    """
+
+    def __init__(self, items):
+        ids, quantities, prices = [], [], []
+        names = {by: {} for by in GROUP_FIELDS}
+        codes = {by: [] for by in GROUP_FIELDS}
+        # Raw field value -> group code; the same few brand strings repeat
+        # across most of the catalog, so each is only parsed once
+        known = {by: {} for by in GROUP_FIELDS}
+        for item in items:
+            ids.append(item["id"])
+            quantities.append(_number(item.get("quantity")))
+            prices.append(_number(item.get("price")))
+            for by, field in GROUP_FIELDS.items():
+                value = item.get(field)
+                if not isinstance(value, str):
+                    value = None
+                code = known[by].get(value)
+                if code is None:
+                    group_names = names[by]
+                    code = known[by][value] = group_names.setdefault(_first(value), len(group_names))
+                codes[by].append(code)
+
+        if np is not None:
+            ids = np.array(ids, dtype=np.int64)
+            quantities = np.array(quantities, dtype=np.float64)
+            prices = np.array(prices, dtype=np.float64)
+            codes = {by: np.array(column, dtype=np.int64) for by, column in codes.items()}
+        self.ids = ids
+        self.quantities = quantities
+        self.prices = prices
+        self.groups = {by: (list(names[by]), codes[by]) for by in GROUP_FIELDS}
+
+    def __len__(self):
+        return len(self.ids)
+
+
+_cached_snapshot = (None, None)
+
+def current_snapshot():
+    """Return a snapshot of the inventory, reusing the last one if nothing changed."""
+    global _cached_snapshot
+    seq = db.get_change_seq()
+    cached_seq, snapshot = _cached_snapshot
+    # The cached snapshot must also have been built with the current mode
+    if cached_seq != seq or (np is not None) != isinstance(snapshot.ids, getattr(np, "ndarray", ())):
+        snapshot = Snapshot(db.get_all_items())
+        _cached_snapshot = (seq, snapshot)
+    return snapshot
+
+
+def rollup(snapshot, by="brand"):
+    """
+    Aggregate items per brand or category.
+
+    Items are grouped by the first brand or category they list.
+
+    Args:
+        snapshot (Snapshot): Inventory snapshot
+        by (str): "brand" or "category"
+
+    Returns:
+        list: One row per group with item count, units in stock, stock
+        value (quantity * price) and mean/min/max price, by value descending
+    """
+    names, codes = snapshot.groups[by]
+    if np is not None:
+        columns = _rollup_numpy(snapshot, codes, len(names))
+    else:
+        columns = _rollup_python(snapshot, codes, len(names))
+    rows = []
+    for code, (items, units, value, priced, price_sum, low, high) in enumerate(zip(*columns)):
+        rows.append({
+            by: names[code],
+            "items": int(items),
+            "units": _units(units),
+            "value": _money(value),
+            "avg_price": _money(price_sum / priced) if priced else None,
+            "min_price": float(low) if priced else None,
+            "max_price": float(high) if priced else None
+        })
+    rows.sort(key=lambda row: (-row["value"], row[by]))
+    return rows
+
+def _rollup_numpy(snapshot, codes, groups):
+    quantities, prices = snapshot.quantities, snapshot.prices
+    has_quantity = ~np.isnan(quantities)
+    has_price = ~np.isnan(prices)
+    valued = has_quantity & has_price
+    items = np.bincount(codes, minlength=groups)
+    units = np.bincount(codes, weights=np.where(has_quantity, quantities, 0), minlength=groups)
+    value = np.bincount(codes, weights=np.where(valued, quantities * prices, 0), minlength=groups)
+
+    priced_codes, priced = codes[has_price], prices[has_price]
+    counts = np.bincount(priced_codes, minlength=groups)
+    price_sum = np.bincount(priced_codes, weights=priced, minlength=groups)
+    low = np.full(groups, np.inf)
+    high = np.full(groups, -np.inf)
+    np.minimum.at(low, priced_codes, priced)
+    np.maximum.at(high, priced_codes, priced)
+    return items, units, value, counts, price_sum, low, high
+
+def _rollup_python(snapshot, codes, groups):
+    items = [0] * groups
+    units = [0.0] * groups
+    value = [0.0] * groups
+    counts = [0] * groups
+    price_sum = [0.0] * groups
+    low = [math.inf] * groups
+    high = [-math.inf] * groups
+    for code, quantity, price in zip(codes, snapshot.quantities, snapshot.prices):
+        items[code] += 1
+        if quantity == quantity:
+            units[code] += quantity
+            if price == price:
+                value[code] += quantity * price
+        if price == price:
+            counts[code] += 1
+            price_sum[code] += price
+            low[code] = min(low[code], price)
+            high[code] = max(high[code], price)
+    return items, units, value, counts, price_sum, low, high
+
+
+def price_distribution(snapshot, bins=10):
+    """
+    Summarize the distribution of item prices.
+
+    Percentiles use linear interpolation between the closest ranks. The
+    histogram has ``bins`` equal-width bins from the lowest to the
+    highest price; the last bin includes the highest price. If every
+    price is the same, it has a single bin holding them all.
+
+    Args:
+        snapshot (Snapshot): Inventory snapshot
+        bins (int): Number of histogram bins
+
+    Returns:
+        dict: Count, mean, percentiles and histogram of prices
+    """
+    if np is not None:
+        prices = np.sort(snapshot.prices[~np.isnan(snapshot.prices)])
+        count = len(prices)
+        mean = float(prices.mean()) if count else None
+    else:
+        prices = sorted(price for price in snapshot.prices if price == price)
+        count = len(prices)
+        mean = math.fsum(prices) / count if count else None
+    if not count:
+        return {"count": 0, "mean": None, "percentiles": {}, "histogram": {"edges": [], "counts": []}}
+
+    low, high = float(prices[0]), float(prices[-1])
+    if high == low:
+        bins = 1
+    width = (high - low) / bins or 1.0
+    edges = [low + width * i for i in range(bins)] + [high]
+    if np is not None:
+        ranks = (count - 1) * np.array(PERCENTILES) / 100
+        below = np.floor(ranks).astype(np.int64)
+        above = np.minimum(below + 1, count - 1)
+        values = prices[below] + (prices[above] - prices[below]) * (ranks - below)
+        index = np.minimum(((prices - low) / width).astype(np.int64), bins - 1)
+        counts = np.bincount(index, minlength=bins).tolist()
+        values = values.tolist()
+    else:
+        values = []
+        for percentile in PERCENTILES:
+            rank = (count - 1) * percentile / 100
+            below = math.floor(rank)
+            above = min(below + 1, count - 1)
+            values.append(prices[below] + (prices[above] - prices[below]) * (rank - below))
+        counts = [0] * bins
+        for price in prices:
+            counts[min(int((price - low) / width), bins - 1)] += 1
+    return {
+        "count": count,
+        "mean": _money(mean),
+        "percentiles": {f"p{p}": _money(value) for p, value in zip(PERCENTILES, values)},
+        "histogram": {"edges": [_money(edge) for edge in edges], "counts": counts}
+    }
+
+
+def turnover(snapshot, changes, by="brand"):
+    """
+    Stock turnover per brand or category over a window of changes.
+
+    Units out are the quantity decreases between consecutive versions of
+    each item within the window (sales and write-offs); increases are
+    restocks and are ignored. An item's first change in the window has
+    no earlier quantity to compare with. Turnover is units out divided
+    by the units now in stock. Deleted items are left out.
+
+    Args:
+        snapshot (Snapshot): Inventory snapshot taken at the end of the window
+        changes (list): Change feed entries in sequence order
+        by (str): "brand" or "category"
+
+    Returns:
+        list: One row per group with units out, stock and turnover, by
+        units out descending
+    """
+    names, codes = snapshot.groups[by]
+    puts = [change for change in changes if change["op"] == "put"]
+    if np is not None:
+        out, stock = _turnover_numpy(snapshot, codes, len(names), puts)
+    else:
+        out, stock = _turnover_python(snapshot, codes, len(names), puts)
+    rows = []
+    for code, (units_out, units) in enumerate(zip(out, stock)):
+        rows.append({
+            by: names[code],
+            "units_out": _units(units_out),
+            "stock": _units(units),
+            "turnover": round(float(units_out / units), 4) if units > 0 else None
+        })
+    rows.sort(key=lambda row: (-row["units_out"], row[by]))
+    return rows
+
+def _turnover_numpy(snapshot, codes, groups, puts):
+    quantities = np.where(np.isnan(snapshot.quantities), 0, snapshot.quantities)
+    stock = np.bincount(codes, weights=quantities, minlength=groups)
+    if not puts:
+        return np.zeros(groups), stock
+    ids = np.fromiter((change["id"] for change in puts), dtype=np.int64, count=len(puts))
+    changed = np.fromiter((_number(change["item"].get("quantity")) for change in puts),
+                          dtype=np.float64, count=len(puts))
+    # A stable sort by ID keeps each item's changes in sequence order
+    order = np.argsort(ids, kind="stable")
+    ids, changed = ids[order], changed[order]
+    drops = changed[:-1] - changed[1:]
+    same_item = ids[:-1] == ids[1:]
+    drops = np.where(same_item & (drops > 0), drops, 0)  # NaN comparisons are False
+    # Map each item to its row in the snapshot; deleted items have none
+    rows = np.searchsorted(snapshot.ids, ids[1:])
+    rows = np.minimum(rows, len(snapshot.ids) - 1)
+    present = snapshot.ids[rows] == ids[1:] if len(snapshot.ids) else np.zeros(len(rows), bool)
+    out = np.bincount(codes[rows[present]], weights=drops[present], minlength=groups)
+    return out, stock
+
+def _turnover_python(snapshot, codes, groups, puts):
+    stock = [0.0] * groups
+    rows = {}
+    for item_id, code, quantity in zip(snapshot.ids, codes, snapshot.quantities):
+        rows[item_id] = code
+        if quantity == quantity:
+            stock[code] += quantity
+    out = [0.0] * groups
+    last = {}
+    for change in puts:
+        quantity = _number(change["item"].get("quantity"))
+        previous = last.get(change["id"])
+        last[change["id"]] = quantity
+        if previous is not None and previous - quantity > 0 and change["id"] in rows:
+            out[rows[change["id"]]] += previous - quantity
+    return out, stock
+
+
+reports_bp = Blueprint('reports', __name__)
+
+# Largest number of groups a report returns with ?limit=
+MAX_GROUPS = 1000
+
+# Largest number of bins in the price histogram
+MAX_BINS = 1000
+
+def _limit():
+    limit = int(request.args.get("limit", 100))
+    if not 1 <= limit <= MAX_GROUPS:
+        raise ValueError(f"limit must be between 1 and {MAX_GROUPS}")
+    return limit
+
+def _rollup_response(by):
+    try:
+        limit = _limit()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    rows = rollup(current_snapshot(), by)
+    return jsonify({"groups": len(rows), "rows": rows[:limit]})
+
+# GET /reports/brands?limit= - Items, units, stock value and prices per brand
+@reports_bp.route('/reports/brands', methods=['GET'])
+def brand_report():
+    return _rollup_response("brand")
+
+# GET /reports/categories?limit= - The same rollup per category
+@reports_bp.route('/reports/categories', methods=['GET'])
+def category_report():
+    return _rollup_response("category")
+
+# GET /reports/prices?bins= - Price percentiles and histogram
+@reports_bp.route('/reports/prices', methods=['GET'])
+def price_report():
+    try:
+        bins = int(request.args.get("bins", 10))
+    except ValueError:
+        return jsonify({"error": "Invalid bins"}), 400
+    if not 1 <= bins <= MAX_BINS:
+        return jsonify({"error": f"bins must be between 1 and {MAX_BINS}"}), 400
+    return jsonify(price_distribution(current_snapshot(), bins))
+
+# GET /reports/turnover?by=brand|category&limit= - Units sold against stock
+# The window is the changes the change feed still retains
+# (INVENTORY_CHANGE_RETENTION), reported as "window".
+@reports_bp.route('/reports/turnover', methods=['GET'])
+def turnover_report():
+    by = request.args.get("by", "brand")
+    if by not in GROUP_FIELDS:
+        return jsonify({"error": "by must be brand or category"}), 400
+    try:
+        limit = _limit()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    changes = db.get_retained_changes()
+    rows = turnover(current_snapshot(), changes, by)
+    return jsonify({
+        "window": {
+            "changes": len(changes),
+            "from_seq": changes[0]["seq"] if changes else None,
+            "to_seq": changes[-1]["seq"] if changes else None
+        },
+        "groups": len(rows),
+        "rows": rows[:limit]
+    })
@@ -0,0 +1,173 @@
+"""
+In-process full-text index over inventory items.
+"""
+import math
+import re
+from bisect import bisect_left, insort
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Relative weight of a term depending on the field it appears in
+FIELD_WEIGHTS = {
+    "product_name": 3.0,
+    "brands": 2.0,
+    "ingredients_text": 1.0
+}
+
+# Score multiplier for terms matched only by prefix
+PREFIX_MATCH_WEIGHT = 0.5
+
+# Longest list of vocabulary terms a single query prefix may expand to
+MAX_PREFIX_EXPANSION = 100
+
+# Minimum number of new terms buffered before merging into the sorted vocabulary
+MIN_MERGE_THRESHOLD = 1024
+
+def tokenize(text):
+    """
+    Split text into lower-cased word tokens.
+
+    Args:
+        text (str): Text to tokenize
+
+    Returns:
+        list: Tokens in order of appearance
+    """
+    if not isinstance(text, str):
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class SearchIndex:
+    """
+    Inverted index with prefix matching and weighted ranking.
+
+    Each term maps to the documents containing it and a per-document
+    weight (field weight times occurrences). A sorted vocabulary lets
+    query tokens match by prefix, so "alm" finds "almond". Every query
+    token must match; documents are ranked by the sum of their term
+    weights scaled by inverse document frequency, with exact matches
+    counting more than prefix matches.
+
+    Catalogs have many one-off terms (codes, sizes), so inserting each new
+    term into one big sorted vocabulary would make indexing quadratic.
+    New terms go into a second, small sorted list that is merged into the
+    main one once it outgrows a threshold scaling with the square root of
+    the vocabulary. Terms that disappear from the main list are left in
+    place and skipped until enough of them pile up to be swept out.
+
+    The index is not synchronized; the inventory store updates and
+    queries it under its own index lock.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._doc_terms = {}
+        self._vocabulary = []
+        self._recent_terms = []
+        self._stale_terms = 0
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def add(self, doc_id, fields):
+        """
+        Index a document.
+
+        Args:
+            doc_id (int): Document ID
+            fields (dict): Field name to text, weighted by FIELD_WEIGHTS
+        """
+        weights = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(fields.get(field)):
+                weights[term] = weights.get(term, 0.0) + weight
+        if not weights:
+            return
+
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._recent_terms, term)
+            postings[doc_id] = weight
+        self._doc_terms[doc_id] = list(weights)
+
+        threshold = max(MIN_MERGE_THRESHOLD, 4 * math.isqrt(len(self._vocabulary)))
+        if len(self._recent_terms) > threshold:
+            self._merge_vocabulary()
+
+    def remove(self, doc_id):
+        """Remove a document from the index, if present."""
+        for term in self._doc_terms.pop(doc_id, ()):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                position = bisect_left(self._recent_terms, term)
+                if position < len(self._recent_terms) and self._recent_terms[position] == term:
+                    del self._recent_terms[position]
+                else:
+                    self._stale_terms += 1
+        if self._stale_terms * 2 > len(self._vocabulary) + MIN_MERGE_THRESHOLD:
+            self._vocabulary = [term for term in self._vocabulary if term in self._postings]
+            self._stale_terms = 0
+
+    def _merge_vocabulary(self):
+        """Fold the recent terms into the main sorted vocabulary."""
+        # Both lists are sorted runs, which list.sort() merges in linear time
+        self._vocabulary.extend(self._recent_terms)
+        self._vocabulary.sort()
+        self._recent_terms = []
+
+    def _expand(self, token):
+        """Return ``(term, match_weight)`` pairs matching a query token."""
+        matches = []
+        if token in self._postings:
+            matches.append((token, 1.0))
+        for vocabulary in (self._vocabulary, self._recent_terms):
+            position = bisect_left(vocabulary, token)
+            while len(matches) < MAX_PREFIX_EXPANSION and position < len(vocabulary):
+                term = vocabulary[position]
+                if not term.startswith(token):
+                    break
+                if term != token and term in self._postings:
+                    matches.append((term, PREFIX_MATCH_WEIGHT))
+                position += 1
+        return matches
+
+    def search(self, query, limit=10):
+        """
+        Return the IDs of the best matching documents.
+
+        Args:
+            query (str): Free-text query
+            limit (int): Maximum number of results
+
+        Returns:
+            list: Document IDs, best match first
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens or not self._doc_terms:
+            return []
+
+        scores = None
+        for token in tokens:
+            token_scores = {}
+            for term, match_weight in self._expand(token):
+                postings = self._postings[term]
+                idf = math.log(1 + len(self._doc_terms) / len(postings))
+                for doc_id, weight in postings.items():
+                    score = weight * idf * match_weight
+                    if score > token_scores.get(doc_id, 0.0):
+                        token_scores[doc_id] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {doc_id: score + token_scores[doc_id]
+                          for doc_id, score in scores.items() if doc_id in token_scores}
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda entry: (-entry[1], entry[0]))
+        return [doc_id for doc_id, _ in ranked[:limit]]
@@ -0,0 +1,95 @@
+"""
+JSON serialization of inventory records.
+
+orjson is used when it is installed; it encodes large inventories several
+times faster than the standard library and writes UTF-8 bytes directly.
+Without it everything falls back to the stdlib json module.
+"""
+import json
+from flask.json.provider import DefaultJSONProvider
+from app.models import InventoryItem, to_json_default
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# json.dumps arguments the orjson path knows how to honour
+ORJSON_DUMP_ARGS = frozenset(("default", "ensure_ascii", "sort_keys", "indent", "separators"))
+
+# Deprecated Flask settings that only the stdlib path implements
+LEGACY_CONFIG_KEYS = ("JSON_AS_ASCII", "JSON_SORT_KEYS", "JSONIFY_PRETTYPRINT_REGULAR", "JSONIFY_MIMETYPE")
+
+def dumps(obj):
+    """
+    Serialize ``obj`` as compact JSON, materializing inventory records.
+
+    Args:
+        obj: Value to serialize
+
+    Returns:
+        str: JSON text
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=to_json_default, option=orjson.OPT_NON_STR_KEYS).decode()
+        except orjson.JSONEncodeError:
+            pass  # e.g. integers beyond 64 bits, which the stdlib handles
+    return json.dumps(obj, default=to_json_default, separators=(",", ":"))
+
+
+class InventoryJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that turns records into dicts only when responding.
+
+    With orjson available, responses are encoded straight to bytes by
+    orjson, honouring ``sort_keys`` and the pretty-printing used in debug
+    mode. Calls it cannot express, and values it rejects, go through the
+    stdlib encoder as before. Non-ASCII text is written as UTF-8 rather
+    than ``\\u`` escapes on the orjson path; both decode to the same data.
+    """
+
+    @staticmethod
+    def default(obj):
+        if isinstance(obj, InventoryItem):
+            return obj.to_dict()
+        return DefaultJSONProvider.default(obj)
+
+    def _orjson_options(self, kwargs):
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _dumps_bytes(self, obj, **kwargs):
+        """Encode with orjson, or return None if the stdlib must be used."""
+        if orjson is None or not ORJSON_DUMP_ARGS.issuperset(kwargs) \
+                or self._app._json_encoder is not None \
+                or any(self._app.config.get(key) is not None for key in LEGACY_CONFIG_KEYS):
+            return None
+        try:
+            return orjson.dumps(obj, default=kwargs.get("default", self.default),
+                                option=self._orjson_options(kwargs))
+        except orjson.JSONEncodeError:
+            return None
+
+    def dumps(self, obj, **kwargs):
+        data = self._dumps_bytes(obj, **kwargs)
+        if data is None:
+            return super().dumps(obj, **kwargs)
+        return data.decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs or self._app._json_decoder is not None:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        data = self._dumps_bytes(obj, indent=2 if pretty else None)
+        if data is None:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(data + b"\n", mimetype=self.mimetype)
@@ -0,0 +1,107 @@
+"""
+Production WSGI server: preloaded gunicorn worker processes with threads.
+
+The app is created once in the master process, which loads the
+inventory and fills the response cache before forking, so workers start
+warm and share those pages copy-on-write. Each worker then reopens its
+own storage connection and HTTP client. On SIGTERM workers stop
+accepting connections and finish in-flight requests for up to
+SERVER_GRACEFUL_TIMEOUT seconds.
+
+Every worker process keeps its own in-memory store, so running more
+than one requires a shared backend (INVENTORY_STORAGE=sqlite+shared:///path)
+that keeps them consistent.
+
+Requires the optional gunicorn package; without it a single threaded
+process is served by werkzeug instead.
+
+    python -m app.server
+"""
+from app import configure_lookups, create_app, db
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:
+    BaseApplication = None
+
+
+def warm_up(app):
+    """Fill the response cache with the pages most clients fetch first."""
+    with app.test_client() as client:
+        client.get("/inventory")
+        client.get("/inventory", headers={"Accept-Encoding": "gzip"})
+
+
+def reinitialize_worker(app):
+    """Recreate connections and threads that must not be shared after fork."""
+    db.store.after_fork()
+    # Pages cached by the master stay valid: the sequence numbers of a
+    # shared backend are the same in every process
+    db.store.sync()
+    configure_lookups(app.config)
+
+
+if BaseApplication is not None:
+    class InventoryServer(BaseApplication):
+        """gunicorn application serving an already created Flask app."""
+
+        def __init__(self, app, options):
+            self.application = app
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+
+def server_options(config):
+    """
+    Build gunicorn settings from the app configuration.
+
+    Raises:
+        ValueError: If several workers are requested without a shared backend
+    """
+    workers = int(config['SERVER_WORKERS'])
+    if workers > 1 and not db.store.shared:
+        raise ValueError(
+            "SERVER_WORKERS > 1 requires a shared INVENTORY_STORAGE "
+            "(sqlite+shared:///path); each worker would have its own inventory"
+        )
+    return {
+        "bind": config['SERVER_BIND'],
+        "workers": workers,
+        "threads": int(config['SERVER_THREADS']),
+        "worker_class": "gthread",
+        "preload_app": True,
+        "graceful_timeout": int(config['SERVER_GRACEFUL_TIMEOUT']),
+        "accesslog": None,
+        "post_fork": lambda server, worker: reinitialize_worker(server.app.application),
+        "worker_exit": lambda server, worker: db.store.close()
+    }
+
+
+def serve(app=None):
+    """
+    Run the production server until it is stopped.
+
+    Args:
+        app (Flask, optional): Application to serve; defaults to create_app()
+    """
+    app = app or create_app()
+    options = server_options(app.config)
+    warm_up(app)
+    if BaseApplication is not None:
+        InventoryServer(app, options).run()
+        return
+    if options["workers"] > 1:
+        raise RuntimeError("Several worker processes need gunicorn installed")
+    host, _, port = options["bind"].rpartition(":")
+    app.run(host=host, port=int(port), threaded=True, debug=False, use_reloader=False)
+
+
+if __name__ == "__main__":
+    serve()
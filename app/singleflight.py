@@ -0,0 +1,124 @@
+"""
+Request coalescing: concurrent calls for the same key share one execution.
+"""
+import asyncio
+import threading
+
+class _Call:
+    """An in-flight call whose outcome waiting callers will share."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent calls by key.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is still running wait and receive the same result or
+    exception. Once the call finishes, the next caller starts a fresh one,
+    so results are never reused beyond the in-flight window.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, *args):
+        """
+        Run ``fn(*args)`` unless a call for ``key`` is already in flight.
+
+        Args:
+            key: Hashable key identifying equivalent calls
+            fn (callable): Function to run
+            *args: Arguments passed to ``fn``
+
+        Returns:
+            The result of ``fn``, possibly computed by another thread
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        """Return how many calls ran and how many were coalesced into them."""
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executed": self.executed,
+                "coalesced": self.coalesced
+            }
+
+
+class AsyncSingleFlight:
+    """
+    asyncio counterpart of SingleFlight.
+
+    The leader's call runs as a task that every caller awaits through
+    ``asyncio.shield``, so a caller that is cancelled (say, its client
+    disconnected) does not cancel the lookup the others are waiting on.
+    Must be used from a single event loop.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn, *args):
+        """
+        Await ``fn(*args)`` unless a call for ``key`` is already in flight.
+
+        Args:
+            key: Hashable key identifying equivalent calls
+            fn (coroutine function): Function to run
+            *args: Arguments passed to ``fn``
+
+        Returns:
+            The result of ``fn``, possibly awaited by another caller
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(fn(*args))
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self):
+        """Return how many calls ran and how many were coalesced into them."""
+        return {
+            "in_flight": len(self._calls),
+            "executed": self.executed,
+            "coalesced": self.coalesced
+        }
@@ -0,0 +1,492 @@
+"""
+Storage backends that make the inventory store durable.
+
+The store keeps serving reads from memory; a backend only records every
+mutation and hands the data back on startup. Mutations are logged as
+records of the form ``{"op": "put", "item": {...}}`` (the full item after
+the change) or ``{"op": "delete", "id": ...}``. Replaying a record twice
+has no further effect, which lets snapshots be taken while writes go on.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from app.models import to_json_default
+
+class StorageError(Exception):
+    """Raised when a backend fails to persist a mutation."""
+
+
+class MemoryBackend:
+    """Backend that persists nothing; the default for the mock database."""
+
+    # Whether other processes write through the same storage
+    shared = False
+
+    def load(self):
+        """Return ``(items, next_id)``, or None if there is no stored state."""
+        return None
+
+    def attach(self, store):
+        pass
+
+    def append(self, record):
+        """Log a mutation record and return its sequence number."""
+        return 0
+
+    def wait(self, lsn):
+        """Block until the record with sequence number ``lsn`` is durable."""
+
+    def write_lock(self):
+        """Context manager held around a mutation and its ``append`` calls."""
+        return nullcontext()
+
+    def poll(self):
+        """
+        Return records appended by other processes since the last call.
+
+        Returns:
+            list or None: Records in order, or None if some are no longer
+            available and the caller must reload everything
+        """
+        return []
+
+    def after_fork(self):
+        """Recreate threads and connections in a forked worker process."""
+
+    def close(self):
+        pass
+
+
+class GroupCommitBackend(MemoryBackend):
+    """
+    Base class for backends that batch writes in a background thread.
+
+    ``append`` only queues a record. A committer thread writes everything
+    queued since its last pass in one batch and makes it durable with a
+    single fsync (group commit), then wakes every caller of ``wait``
+    whose record was part of the batch. With ``durable=False`` callers do
+    not wait, and batches are flushed every ``flush_interval`` seconds.
+
+    Subclasses implement ``_write_batch``.
+    """
+
+    def __init__(self, durable=True, flush_interval=0.005):
+        self.durable = durable
+        self.flush_interval = flush_interval
+        self._cond = threading.Condition()
+        self._pending = []
+        self._lsn = 0
+        self._durable_lsn = 0
+        self._error = None
+        self._closed = False
+        self._thread = None
+
+    def _start(self, lsn):
+        """Start the committer thread, numbering records after ``lsn``."""
+        self._lsn = self._durable_lsn = lsn
+        self._thread = threading.Thread(target=self._run, name="storage-commit", daemon=True)
+        self._thread.start()
+
+    def append(self, record):
+        with self._cond:
+            if self._closed:
+                raise StorageError("Storage backend is closed")
+            self._lsn += 1
+            record["lsn"] = self._lsn
+            self._pending.append(record)
+            self._cond.notify_all()
+            return self._lsn
+
+    def wait(self, lsn):
+        if not self.durable:
+            return
+        with self._cond:
+            while self._durable_lsn < lsn and self._error is None:
+                self._cond.wait()
+            if self._error is not None:
+                raise StorageError(f"Failed to persist inventory change: {self._error}")
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending and self._closed:
+                    return
+            if not self.durable:
+                time.sleep(self.flush_interval)
+            with self._cond:
+                batch, self._pending = self._pending, []
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                with self._cond:
+                    self._error = e
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                self._durable_lsn = batch[-1]["lsn"]
+                self._cond.notify_all()
+            self._after_batch(batch)
+
+    def _write_batch(self, batch):
+        raise NotImplementedError
+
+    def after_fork(self):
+        # Only the forking thread survives, so restart the committer
+        if self._thread is not None:
+            self._cond = threading.Condition()
+            self._start(self._lsn)
+
+    def _after_batch(self, batch):
+        """Hook run on the committer thread after each durable batch."""
+
+    def close(self):
+        """Flush queued records and stop the committer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class WALBackend(GroupCommitBackend):
+    """
+    Append-only write-ahead log with periodic compacted snapshots.
+
+    The directory holds ``snapshot.ndjson`` and one or more log segments
+    named ``wal-<first lsn>.log``, one JSON record per line. After
+    ``snapshot_every`` records the log is rotated to a new segment and a
+    snapshot of the store is written in the background; once it is safely
+    renamed into place, the segments it covers are deleted.
+
+    Startup loads the snapshot and replays only the log records with a
+    higher sequence number. A torn last line from a crash is ignored.
+    """
+
+    SNAPSHOT = "snapshot.ndjson"
+
+    def __init__(self, directory, durable=True, flush_interval=0.005, snapshot_every=100000):
+        super().__init__(durable, flush_interval)
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self._store = None
+        self._log = None
+        self._since_snapshot = 0
+        self._snapshot_thread = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _segments(self):
+        """Return the log segment paths, oldest first."""
+        names = sorted(n for n in os.listdir(self.directory)
+                       if n.startswith("wal-") and n.endswith(".log"))
+        return [os.path.join(self.directory, n) for n in names]
+
+    def _open_segment(self, first_lsn):
+        if self._log is not None:
+            self._log.close()
+        path = os.path.join(self.directory, f"wal-{first_lsn:020d}.log")
+        self._log = open(path, "ab")
+
+    def load(self):
+        items = {}
+        next_id = 1
+        lsn = 0
+        snapshot_path = os.path.join(self.directory, self.SNAPSHOT)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, "rb") as f:
+                header = json.loads(f.readline())
+                lsn, next_id = header["lsn"], header["next_id"]
+                for line in f:
+                    item = json.loads(line)
+                    items[item["id"]] = item
+
+        snapshot_lsn = lsn
+        for path in self._segments():
+            with open(path, "r+b") as f:
+                for line in iter(f.readline, b""):
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn write at the end of the log: cut it off so
+                        # later appends start on a clean line
+                        f.truncate(f.tell() - len(line))
+                        break
+                    if record["lsn"] <= snapshot_lsn:
+                        continue
+                    if record["op"] == "put":
+                        item = record["item"]
+                        items[item["id"]] = item
+                        next_id = max(next_id, item["id"] + 1)
+                    else:
+                        items.pop(record["id"], None)
+                    lsn = max(lsn, record["lsn"])
+
+        self._open_segment(lsn + 1)
+        self._start(lsn)
+        if not lsn and not items:
+            return None
+        return list(items.values()), next_id
+
+    def attach(self, store):
+        """Register the store that snapshots are taken from."""
+        self._store = store
+
+    def _write_batch(self, batch):
+        self._log.write(b"".join(
+            json.dumps(record, default=to_json_default).encode() + b"\n" for record in batch
+        ))
+        self._log.flush()
+        os.fsync(self._log.fileno())
+
+    def _after_batch(self, batch):
+        self._since_snapshot += len(batch)
+        snapshot_running = self._snapshot_thread is not None and self._snapshot_thread.is_alive()
+        if self._since_snapshot >= self.snapshot_every and self._store is not None \
+                and not snapshot_running:
+            self._since_snapshot = 0
+            # New records go to a fresh segment; older ones are covered by the snapshot
+            start_lsn = batch[-1]["lsn"]
+            self._open_segment(start_lsn + 1)
+            self._snapshot_thread = threading.Thread(
+                target=self.snapshot, args=(start_lsn,), name="storage-snapshot", daemon=True
+            )
+            self._snapshot_thread.start()
+
+    def snapshot(self, start_lsn):
+        """
+        Write a snapshot of the attached store and drop obsolete segments.
+
+        Items are read while writes continue, so the snapshot is "fuzzy":
+        each item reflects some state at or after ``start_lsn``. Replaying
+        the log from ``start_lsn`` on top of it yields the exact state.
+
+        Args:
+            start_lsn (int): Last sequence number written before the snapshot began
+        """
+        path = os.path.join(self.directory, self.SNAPSHOT)
+        tmp_path = path + ".tmp"
+        covered = [p for p in self._segments()
+                   if int(os.path.basename(p)[4:-4]) <= start_lsn]
+        with open(tmp_path, "wb") as f:
+            header = {"lsn": start_lsn, "next_id": self._store.next_id}
+            f.write(json.dumps(header).encode() + b"\n")
+            for item in self._store.iter_items():
+                f.write(json.dumps(item, default=to_json_default).encode() + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        for segment in covered:
+            os.remove(segment)
+
+    def close(self):
+        super().close()
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+        if self._log is not None:
+            self._log.close()
+
+
+class SQLiteBackend(GroupCommitBackend):
+    """
+    Backend storing one row per item in SQLite.
+
+    Batches of records are applied in a single transaction, so SQLite
+    syncs once per batch. There is no separate log to replay, so startup
+    simply reads the items table.
+    """
+
+    def __init__(self, path, durable=True, flush_interval=0.005):
+        super().__init__(durable, flush_interval)
+        self.path = path
+        self._conn = _connect_sqlite(path)
+
+    def load(self):
+        state = _load_sqlite(self._conn)
+        self._start(0)
+        return state
+
+    def _write_batch(self, batch):
+        with self._conn:
+            for record in batch:
+                _write_sqlite(self._conn, record)
+
+    def after_fork(self):
+        self._conn = _connect_sqlite(self.path)
+        super().after_fork()
+
+    def close(self):
+        super().close()
+        self._conn.close()
+
+
+class SharedSQLiteBackend(MemoryBackend):
+    """
+    SQLite backend that several worker processes write through at once.
+
+    Each process serves reads from its own in-memory store, so they all
+    have to apply the same changes in the same order. Every mutation runs
+    inside ``write_lock``, an immediate SQLite transaction that excludes
+    writers in other processes; before changing anything the store
+    replays what they logged since it last looked, so version checks and
+    new IDs always see the latest state. Records go to a ``log`` table
+    whose row IDs are shared by all processes and serve as change feed
+    sequence numbers, and the items table is updated in the same
+    transaction.
+
+    ``poll`` returns the records other processes appended. It costs one
+    ``PRAGMA data_version`` when nothing changed. The log keeps the last
+    ``log_retention`` records; a process further behind reloads the items.
+
+    Writes are serialized across processes and committed one at a time,
+    so this suits read-heavy deployments rather than write throughput.
+    """
+
+    shared = True
+
+    def __init__(self, path, durable=True, log_retention=100000):
+        self.path = path
+        self.durable = durable
+        self.log_retention = log_retention
+        # Sequence number of the last log record applied by this process
+        self.seq = 0
+        self._lock = threading.RLock()
+        self._connect()
+
+    def _connect(self):
+        self._conn = _connect_sqlite(self.path, isolation_level=None, timeout=30)
+        self._conn.execute(f"PRAGMA synchronous={'FULL' if self.durable else 'NORMAL'}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS log (seq INTEGER PRIMARY KEY AUTOINCREMENT, record TEXT NOT NULL)"
+        )
+        self._data_version = None
+
+    def _last_seq(self):
+        row = self._conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'log'").fetchone()
+        return row[0] if row else 0
+
+    def load(self):
+        with self._lock:
+            # One read transaction, so the items match the log position
+            self._conn.execute("BEGIN")
+            try:
+                state = _load_sqlite(self._conn)
+                self.seq = self._last_seq()
+                self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            finally:
+                self._conn.execute("COMMIT")
+        return state
+
+    @contextmanager
+    def write_lock(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            try:
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                raise StorageError(f"Failed to persist inventory change: {e}") from e
+
+    def append(self, record):
+        """Log a record; must be called inside ``write_lock``."""
+        cursor = self._conn.execute(
+            "INSERT INTO log (record) VALUES (?)", (json.dumps(record, default=to_json_default),)
+        )
+        self.seq = cursor.lastrowid
+        _write_sqlite(self._conn, record)
+        if self.seq % 1000 == 0:
+            self._conn.execute("DELETE FROM log WHERE seq <= ?", (self.seq - self.log_retention,))
+        return self.seq
+
+    def poll(self):
+        with self._lock:
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._data_version:
+                return []
+            self._data_version = version
+            rows = self._conn.execute(
+                "SELECT seq, record FROM log WHERE seq > ? ORDER BY seq", (self.seq,)
+            ).fetchall()
+            if rows and rows[0][0] != self.seq + 1:
+                return None
+            records = []
+            for seq, data in rows:
+                record = json.loads(data)
+                record["lsn"] = seq
+                records.append(record)
+            if records:
+                self.seq = records[-1]["lsn"]
+            return records
+
+    def after_fork(self):
+        self._lock = threading.RLock()
+        self._connect()
+
+    def close(self):
+        self._conn.close()
+
+
+def _connect_sqlite(path, **kwargs):
+    """Open an inventory database, creating its tables."""
+    conn = sqlite3.connect(path, check_same_thread=False, **kwargs)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY, data TEXT NOT NULL)")
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+    conn.commit()
+    return conn
+
+def _load_sqlite(conn):
+    """Return ``(items, next_id)`` from an inventory database, or None if empty."""
+    rows = conn.execute("SELECT data FROM items ORDER BY id").fetchall()
+    row = conn.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()
+    if not rows and row is None:
+        return None
+    items = [json.loads(data) for data, in rows]
+    next_id = row[0] if row else max((item["id"] for item in items), default=0) + 1
+    return items, next_id
+
+def _write_sqlite(conn, record):
+    """Apply one mutation record to the items table."""
+    if record["op"] == "put":
+        item = record["item"]
+        conn.execute(
+            "INSERT OR REPLACE INTO items (id, data) VALUES (?, ?)",
+            (item["id"], json.dumps(item, default=to_json_default))
+        )
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('next_id', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = max(value, excluded.value)",
+            (item["id"] + 1,)
+        )
+    else:
+        conn.execute("DELETE FROM items WHERE id = ?", (record["id"],))
+
+
+def open_backend(url, durable=True, snapshot_every=100000):
+    """
+    Create a backend from a storage URL.
+
+    Args:
+        url (str): ``None`` or "memory" for no persistence, "sqlite:///path"
+            for SQLite, "sqlite+shared:///path" for SQLite shared by several
+            worker processes, or a directory path for the write-ahead log
+        durable (bool): Whether writes wait for their batch to be synced
+        snapshot_every (int): Log records between WAL snapshots
+
+    Returns:
+        MemoryBackend: The backend
+    """
+    if not url or url == "memory":
+        return MemoryBackend()
+    if url.startswith("sqlite+shared:///"):
+        return SharedSQLiteBackend(url[len("sqlite+shared:///"):], durable=durable)
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):], durable=durable)
+    return WALBackend(url, durable=durable, snapshot_every=snapshot_every)
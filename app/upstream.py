@@ -0,0 +1,352 @@
+"""
+Pooled HTTP clients for upstream APIs, with timeouts, retries, a circuit
+breaker and an optional rate limiter.
+"""
+import asyncio
+import random
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from app.metrics import upstream_errors, upstream_request_seconds
+from app.ratelimit import INTERACTIVE
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# Response statuses worth retrying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def record_attempt(start, outcome):
+    """Record the latency of one request attempt and count failures by reason."""
+    upstream_request_seconds.observe(time.perf_counter() - start, outcome)
+    if outcome != "ok":
+        upstream_errors.inc(outcome)
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without contacting the upstream while the circuit is open."""
+
+
+class RateLimitedError(requests.exceptions.RequestException):
+    """
+    Raised without contacting the upstream when no request budget is left
+    within the caller's maximum wait.
+
+    Attributes:
+        retry_after (float): Seconds until the budget is expected to allow a request
+    """
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def budget_exhausted(url, wait):
+    """Count a request refused by the rate limiter and return the error to raise."""
+    upstream_errors.inc("rate_limited")
+    return RateLimitedError(f"Request budget for {url} exhausted; retry in {wait:.1f}s", wait)
+
+
+@contextmanager
+def settle_breaker(breaker):
+    """
+    Settle a call the breaker allowed if it raises, so a half-open trial
+    never stays marked as running.
+
+    Any error counts as a failure, except a request the rate limiter
+    refused or an interrupted call (e.g. a cancelled task), which never
+    got an answer from the upstream and only free the trial.
+    """
+    try:
+        yield
+    except RateLimitedError:
+        breaker.release()
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+
+
+class CircuitBreaker:
+    """
+    Fail fast while an upstream is down.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are rejected for ``reset_timeout`` seconds. Then a single trial
+    call is let through (half-open): success closes the circuit again,
+    failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """Return True if a call may go to the upstream now."""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def release(self):
+        """End a call that never reached the upstream, freeing a half-open trial."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+
+
+class UpstreamClient:
+    """
+    Thread-safe HTTP client sharing one connection pool.
+
+    Each thread gets its own requests.Session (sessions keep mutable state
+    such as cookies), but all of them mount the same HTTPAdapter, so
+    keep-alive connections are pooled and reused across threads.
+
+    Connection errors, timeouts and retryable statuses are retried up to
+    ``retries`` times with jittered exponential backoff. Calls that still
+    fail count against the circuit breaker.
+
+    At most ``max_per_host`` requests are in flight to any one host at a
+    time, across all threads; further callers wait for a free slot. With a
+    ``limiter`` (app.ratelimit.RateLimiter) every attempt also waits for
+    the request budget in the caller's priority lane.
+    """
+
+    def __init__(self, pool_size=10, connect_timeout=3.05, read_timeout=10, retries=2,
+                 backoff=0.2, max_backoff=2.0, breaker=None, max_per_host=None, limiter=None):
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.max_per_host = max_per_host or pool_size
+        self.limiter = limiter
+        self._adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._local = threading.local()
+        self._host_slots = {}
+        self._host_slots_lock = threading.Lock()
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", self._adapter)
+            session.mount("https://", self._adapter)
+            self._local.session = session
+        return session
+
+    @contextmanager
+    def _host_slot(self, url):
+        """Hold one of the concurrency slots for the URL's host."""
+        host = urlsplit(url).netloc
+        with self._host_slots_lock:
+            slots = self._host_slots.get(host)
+            if slots is None:
+                slots = self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+        with slots:
+            yield
+
+    def _sleep_before_retry(self, attempt):
+        """Sleep with "full jitter" so retrying clients do not stampede."""
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        time.sleep(random.uniform(0, delay))
+
+    def get(self, url, params=None, lane=INTERACTIVE):
+        """
+        Send a GET request.
+
+        Args:
+            url (str): URL to fetch
+            params (dict, optional): Query parameters
+            lane (str): Rate limiter lane, app.ratelimit.INTERACTIVE or BACKGROUND
+
+        Returns:
+            requests.Response: The final response, possibly with an error status
+
+        Raises:
+            CircuitOpenError: If the upstream is considered down
+            RateLimitedError: If the request budget ran out
+            requests.exceptions.RequestException: If every attempt failed
+        """
+        if not self.breaker.allow():
+            upstream_errors.inc("circuit_open")
+            raise CircuitOpenError(f"Circuit open for {url}; not contacting upstream")
+        with settle_breaker(self.breaker):
+            response = self._send(url, params, lane)
+        if response.status_code in RETRY_STATUSES:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def _send(self, url, params, lane):
+        """Make up to ``retries + 1`` attempts and return the last response."""
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            if self.limiter is not None:
+                wait = self.limiter.acquire(lane)
+                if wait:
+                    raise budget_exhausted(url, wait)
+            try:
+                with self._host_slot(url):
+                    start = time.perf_counter()
+                    response = self._session().get(url, params=params, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                record_attempt(start, "timeout" if isinstance(e, requests.exceptions.Timeout)
+                               else "connection_error")
+                if last_attempt:
+                    raise
+            else:
+                record_attempt(start, "http_error" if response.status_code in RETRY_STATUSES else "ok")
+                if response.status_code not in RETRY_STATUSES or last_attempt:
+                    return response
+                response.close()
+            self._sleep_before_retry(attempt)
+
+    def close(self):
+        self._adapter.close()
+        if self.limiter is not None:
+            self.limiter.close()
+
+
+class AsyncUpstreamClient:
+    """
+    asyncio counterpart of UpstreamClient, built on aiohttp.
+
+    One aiohttp session pools keep-alive connections for every coroutine,
+    so a single event loop can keep hundreds of requests in flight without
+    a thread each. The session is created on first use, on the loop that
+    uses it. Timeouts, retries with jittered backoff and the circuit
+    breaker behave as in UpstreamClient; the per-host concurrency cap is
+    enforced by the connector, and the rate limiter is awaited without
+    blocking the loop. Must be used from a single event loop.
+    """
+
+    def __init__(self, pool_size=100, connect_timeout=3.05, read_timeout=10, retries=2,
+                 backoff=0.2, max_backoff=2.0, breaker=None, max_per_host=None, limiter=None):
+        if aiohttp is None:
+            raise RuntimeError("AsyncUpstreamClient requires the aiohttp package")
+        self.pool_size = pool_size
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.max_per_host = max_per_host or pool_size
+        self.limiter = limiter
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.max_per_host)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def _sleep_before_retry(self, attempt):
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        await asyncio.sleep(random.uniform(0, delay))
+
+    async def get(self, url, params=None, lane=INTERACTIVE):
+        """
+        Send a GET request.
+
+        The body is read before returning, so the connection goes straight
+        back to the pool.
+
+        Args:
+            url (str): URL to fetch
+            params (dict, optional): Query parameters
+            lane (str): Rate limiter lane, app.ratelimit.INTERACTIVE or BACKGROUND
+
+        Returns:
+            aiohttp.ClientResponse: The final response, possibly with an error status
+
+        Raises:
+            CircuitOpenError: If the upstream is considered down
+            RateLimitedError: If the request budget ran out
+            aiohttp.ClientError, asyncio.TimeoutError: If every attempt failed
+        """
+        if not self.breaker.allow():
+            upstream_errors.inc("circuit_open")
+            raise CircuitOpenError(f"Circuit open for {url}; not contacting upstream")
+        with settle_breaker(self.breaker):
+            response = await self._send(url, params, lane)
+        if response.status in RETRY_STATUSES:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    async def _send(self, url, params, lane):
+        """Make up to ``retries + 1`` attempts and return the last response."""
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            if self.limiter is not None:
+                wait = await self.limiter.acquire_async(lane)
+                if wait:
+                    raise budget_exhausted(url, wait)
+            start = time.perf_counter()
+            try:
+                async with self._get_session().get(url, params=params) as response:
+                    await response.read()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                record_attempt(start, "timeout" if isinstance(e, asyncio.TimeoutError)
+                               else "connection_error")
+                if last_attempt:
+                    raise
+            else:
+                record_attempt(start, "http_error" if response.status in RETRY_STATUSES else "ok")
+                if response.status not in RETRY_STATUSES or last_attempt:
+                    return response
+            await self._sleep_before_retry(attempt)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+        if self.limiter is not None:
+            self.limiter.close()
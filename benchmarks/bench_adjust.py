@@ -0,0 +1,57 @@
+"""
+Benchmark concurrent stock decrements through the API.
+
+Many threads sell units of the same item at once. The read-modify-write
+pattern (GET, then PATCH an absolute quantity) loses updates whenever two
+sellers read the same quantity; POST /inventory/<id>/adjust applies the
+delta atomically in the store, so every sale is counted and each costs a
+single request.
+
+Usage:
+    python -m benchmarks.bench_adjust [--threads 16] [--sales 200]
+"""
+import argparse
+import threading
+import time
+from app import create_app
+
+def run(client, item_id, threads, sales, sell):
+    """Run ``sell`` ``sales`` times on each of ``threads`` threads; return elapsed seconds."""
+    def seller():
+        for _ in range(sales):
+            sell(client, item_id)
+
+    workers = [threading.Thread(target=seller) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start
+
+def sell_read_modify_write(client, item_id):
+    quantity = client.get(f"/inventory/{item_id}").get_json()["quantity"]
+    client.patch(f"/inventory/{item_id}", json={"quantity": quantity - 1})
+
+def sell_adjust(client, item_id):
+    client.post(f"/inventory/{item_id}/adjust", json={"delta": -1})
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent stock adjustment benchmark")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--sales", type=int, default=200, help="Sales per thread")
+    args = parser.parse_args()
+
+    client = create_app({"TESTING": True}).test_client()
+    total = args.threads * args.sales
+    print(f"{args.threads} threads x {args.sales} sales")
+
+    for name, sell in (("GET + PATCH", sell_read_modify_write), ("POST adjust", sell_adjust)):
+        item = client.post("/inventory", json={"product_name": "Bench", "quantity": total}).get_json()
+        elapsed = run(client, item["id"], args.threads, args.sales, sell)
+        # Every sale should have brought the quantity down to zero
+        lost = client.get(f"/inventory/{item['id']}").get_json()["quantity"]
+        print(f"{name:12} {total / elapsed:8,.0f} sales/s, lost updates: {lost}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Load test barcode lookups over HTTP: thread-per-request WSGI vs ASGI.
+
+Both servers run in this process against a local fake OpenFoodFacts
+server that adds a fixed latency to every request. The WSGI server has a
+fixed pool of worker threads, like a threaded production server, so at
+most that many lookups can wait on the upstream at once. The ASGI server
+(app.asgi under uvicorn) waits on the upstream from a single event loop.
+The cache is disabled and every barcode is distinct, so each request
+reaches the upstream.
+
+Requires aiohttp, asgiref and uvicorn.
+
+Usage:
+    python -m benchmarks.bench_async [--requests 1000] [--concurrency 200] [--latency 0.1] [--workers 8]
+"""
+import argparse
+import asyncio
+import socket
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import aiohttp
+import uvicorn
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+from app import create_app, external_api
+from app.asgi import create_asgi_app
+from tests.openfoodfacts_stub import OpenFoodFactsStub
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """WSGI server handling connections on a fixed pool of worker threads."""
+
+    def __init__(self, host, port, app, workers):
+        super().__init__(host, port, app, handler=QuietRequestHandler)
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False)
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def load(base_url, barcodes, concurrency):
+    """Request every barcode with ``concurrency`` requests in flight; return latencies."""
+    queue = iter(barcodes)
+    latencies = []
+
+    async def client_loop(session):
+        for barcode in queue:
+            start = time.perf_counter()
+            async with session.get(f"{base_url}/lookup/barcode/{barcode}") as response:
+                await response.read()
+            latencies.append(time.perf_counter() - start)
+            assert response.status == 200, response.status
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(client_loop(session) for _ in range(concurrency)))
+    return latencies
+
+def report(name, latencies, elapsed):
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{name:26} {len(latencies) / elapsed:8,.0f} req/s  "
+          f"p50 {statistics.median(latencies) * 1000:6.0f}ms  p99 {p99 * 1000:6.0f}ms")
+
+def run_load(name, base_url, barcodes, concurrency):
+    start = time.perf_counter()
+    latencies = asyncio.run(load(base_url, barcodes, concurrency))
+    report(name, latencies, time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Async lookup load test")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds per upstream request")
+    parser.add_argument("--workers", type=int, default=8, help="WSGI worker threads")
+    args = parser.parse_args()
+
+    products = {f"{n:012d}": {"product_name": f"Product {n}", "brands": "Bench"}
+                for n in range(2 * args.requests)}
+    barcodes = list(products)
+    config = {
+        "LOOKUP_CACHE_TTL": 0,
+        "LOOKUP_CACHE_NEGATIVE_TTL": 0,
+        "UPSTREAM_RETRIES": 0,
+        "UPSTREAM_POOL_SIZE": args.workers,
+        "ASYNC_UPSTREAM_POOL_SIZE": args.concurrency,
+        "ASYNC_LOOKUP_CONCURRENCY": args.concurrency
+    }
+    print(f"{args.requests} lookups, {args.concurrency} concurrent clients, "
+          f"{args.latency * 1000:.0f}ms upstream latency")
+
+    with OpenFoodFactsStub(products, latency=args.latency) as stub:
+        external_api.OPENFOODFACTS_API_URL = stub.product_url
+
+        port = free_port()
+        wsgi_server = PooledWSGIServer("127.0.0.1", port, create_app(config), args.workers)
+        threading.Thread(target=wsgi_server.serve_forever, daemon=True).start()
+        run_load(f"WSGI ({args.workers} threads)", f"http://127.0.0.1:{port}",
+                 barcodes[:args.requests], args.concurrency)
+        wsgi_server.shutdown()
+        wsgi_server.server_close()
+
+        port = free_port()
+        asgi_server = uvicorn.Server(uvicorn.Config(
+            create_asgi_app(config), host="127.0.0.1", port=port, log_level="warning", backlog=4096
+        ))
+        thread = threading.Thread(target=asgi_server.run, daemon=True)
+        thread.start()
+        while not asgi_server.started:
+            time.sleep(0.01)
+        run_load("ASGI (1 event loop)", f"http://127.0.0.1:{port}",
+                 barcodes[args.requests:], args.concurrency)
+        asgi_server.should_exit = True
+        thread.join()
+
+if __name__ == "__main__":
+    main()
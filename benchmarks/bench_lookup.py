@@ -0,0 +1,49 @@
+"""
+Benchmark batch barcode lookups against a local fake OpenFoodFacts server.
+
+Compares looking up barcodes one after another with lookup_barcodes(),
+which fans them out over a bounded thread pool. The fake server adds a
+fixed latency per request to stand in for the network round trip, and
+the cache is disabled so every lookup reaches the server.
+
+Usage:
+    python -m benchmarks.bench_lookup [--barcodes 100] [--latency 0.05] [--workers 16]
+"""
+import argparse
+import time
+from app import external_api
+from tests.openfoodfacts_stub import OpenFoodFactsStub
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch barcode lookup benchmark")
+    parser.add_argument("--barcodes", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per upstream request")
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    products = {f"{n:012d}": {"product_name": f"Product {n}", "brands": "Bench"}
+                for n in range(args.barcodes)}
+    barcodes = list(products)
+
+    with OpenFoodFactsStub(products, latency=args.latency) as stub:
+        external_api.OPENFOODFACTS_API_URL = stub.product_url
+        external_api.configure_cache(ttl=0, negative_ttl=0)
+        external_api.configure_client(pool_size=args.workers, retries=0)
+
+        start = time.perf_counter()
+        for barcode in barcodes:
+            external_api.fetch_product_by_barcode(barcode)
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = external_api.lookup_barcodes(barcodes, max_workers=args.workers)
+        batched = time.perf_counter() - start
+
+    assert all(result["success"] for result in results)
+    print(f"{args.barcodes} barcodes, {args.latency * 1000:.0f}ms upstream latency")
+    print(f"sequential: {sequential:.2f}s")
+    print(f"batch ({args.workers} workers): {batched:.2f}s")
+    print(f"speedup: {sequential / batched:.1f}x")
+
+if __name__ == "__main__":
+    main()
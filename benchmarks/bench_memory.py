@@ -0,0 +1,40 @@
+"""
+Compare the memory used by plain dict items and slotted InventoryItem records.
+
+Items are built the way they arrive in requests: every item gets its own
+freshly decoded strings, so repeated brand names are separate objects
+unless they are interned.
+
+Usage:
+    python -m benchmarks.bench_memory [--items 200000]
+"""
+import argparse
+import json
+import tracemalloc
+from app.models import InventoryItem
+from benchmarks.bench_store import make_item
+
+def measure(build, count):
+    """Return bytes allocated to keep ``count`` items built by ``build``."""
+    payloads = [json.dumps(make_item(n)) for n in range(count)]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = [build(json.loads(payload)) for payload in payloads]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del items
+    return used
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-item memory benchmark")
+    parser.add_argument("--items", type=int, default=200000)
+    args = parser.parse_args()
+
+    as_dict = measure(lambda data: data, args.items)
+    as_record = measure(InventoryItem.from_dict, args.items)
+    print(f"dict items:          {as_dict / args.items:7.1f} bytes/item")
+    print(f"InventoryItem items: {as_record / args.items:7.1f} bytes/item")
+    print(f"saving: {1 - as_record / as_dict:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Benchmark GET /inventory throughput with and without response caching.
+
+Three ways of reading an unchanged catalog are compared: serializing it
+on every request (response cache disabled), serving the cached bytes,
+and revalidating with If-None-Match, which answers 304 without a body.
+
+Usage:
+    python -m benchmarks.bench_reads [--items 10000] [--requests 200]
+"""
+import argparse
+import time
+from app import create_app, db
+from benchmarks.bench_store import make_item
+
+def throughput(client, requests, url, headers=None):
+    """Return requests per second for ``requests`` GETs of ``url``."""
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(url, headers=headers)
+        assert response.status_code in (200, 304)
+    return requests / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="GET /inventory caching benchmark")
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    db.store.add_many([make_item(n) for n in range(args.items)])
+    print(f"{args.items:,} items, {args.requests} requests each")
+
+    for url in ("/inventory", "/inventory?limit=100"):
+        client = create_app({"TESTING": True, "RESPONSE_CACHE_BYTES": 0}).test_client()
+        uncached = throughput(client, args.requests, url)
+
+        client = create_app({"TESTING": True}).test_client()
+        etag = client.get(url).headers["ETag"]
+        cached = throughput(client, args.requests, url)
+        revalidated = throughput(client, args.requests, url, {"If-None-Match": etag})
+
+        print(f"{url}")
+        print(f"  serialize every time: {uncached:10,.0f} req/s")
+        print(f"  response cache:       {cached:10,.0f} req/s ({cached / uncached:.1f}x)")
+        print(f"  If-None-Match (304):  {revalidated:10,.0f} req/s ({revalidated / uncached:.1f}x)")
+
+if __name__ == "__main__":
+    main()
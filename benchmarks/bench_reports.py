@@ -0,0 +1,75 @@
+"""
+Benchmark the catalog reports with NumPy against pure Python.
+
+Builds a snapshot of generated items and a window of quantity changes,
+then times each report with the vectorized implementation and with the
+pure-Python fallback, and checks that both give the same result.
+
+Usage:
+    python -m benchmarks.bench_reports [--items 100000,1000000] [--changes 10000]
+"""
+import argparse
+import random
+import time
+from app import reports
+from benchmarks.bench_store import make_item
+
+def make_catalog(count, changes):
+    """Return ``count`` items and ``changes`` put changes to their quantities."""
+    rng = random.Random(0)
+    items = []
+    for n in range(count):
+        item = make_item(n)
+        item.update(id=n + 1, price=round(rng.uniform(0.5, 50), 2),
+                    categories=f"Category {n % 40}")
+        items.append(item)
+    feed = []
+    for seq in range(changes):
+        item = rng.choice(items)
+        feed.append({"seq": seq, "op": "put", "id": item["id"],
+                     "item": dict(item, quantity=rng.randint(0, 100))})
+    return items, feed
+
+def time_reports(items, feed):
+    """Return ``{report: (seconds, result)}`` with the current implementation."""
+    timings = {}
+    start = time.perf_counter()
+    snapshot = reports.Snapshot(items)
+    timings["snapshot"] = (time.perf_counter() - start, len(snapshot))
+    for name, report in (
+        ("brands", lambda: reports.rollup(snapshot, "brand")),
+        ("categories", lambda: reports.rollup(snapshot, "category")),
+        ("prices", lambda: reports.price_distribution(snapshot, 20)),
+        ("turnover", lambda: reports.turnover(snapshot, feed, "brand"))
+    ):
+        start = time.perf_counter()
+        result = report()
+        timings[name] = (time.perf_counter() - start, result)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="NumPy vs pure-Python report benchmark")
+    parser.add_argument("--items", default="100000,1000000", help="Comma-separated catalog sizes")
+    parser.add_argument("--changes", type=int, default=10000, help="Changes in the turnover window")
+    args = parser.parse_args()
+
+    np = reports.np
+    if np is None:
+        raise SystemExit("NumPy is not installed")
+    for count in (int(size) for size in args.items.split(",")):
+        items, feed = make_catalog(count, args.changes)
+        print(f"{count:,} items, {len(feed):,} changes")
+        vectorized = time_reports(items, feed)
+        reports.np = None
+        try:
+            python = time_reports(items, feed)
+        finally:
+            reports.np = np
+        for name, (fast, result) in vectorized.items():
+            slow, expected = python[name]
+            same = "" if result == expected else "  MISMATCH"
+            print(f"  {name:11} python: {slow * 1000:9.1f}ms  numpy: {fast * 1000:8.1f}ms "
+                  f"({slow / fast:5.1f}x){same}")
+
+if __name__ == "__main__":
+    main()
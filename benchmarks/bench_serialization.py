@@ -0,0 +1,55 @@
+"""
+Benchmark serializing and compressing a large inventory response.
+
+Compares the stdlib encoder with orjson (when installed) for a full
+catalog, compact and pretty-printed, and reports the body size with each
+supported content coding.
+
+Usage:
+    python -m benchmarks.bench_serialization [--items 100000]
+"""
+import argparse
+import time
+from app import create_app, serialization
+from app.compression import compress, supported_encodings
+from app.models import InventoryItem
+from benchmarks.bench_store import make_item
+
+def encode_time(app, items, compact):
+    app.json.compact = compact
+    with app.app_context():
+        start = time.perf_counter()
+        body = app.json.response(items).get_data()
+    return time.perf_counter() - start, body
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON serialization benchmark")
+    parser.add_argument("--items", type=int, default=100000)
+    args = parser.parse_args()
+
+    items = [InventoryItem(dict(make_item(n), id=n, version=1)) for n in range(args.items)]
+    app = create_app({"TESTING": True})
+    orjson = serialization.orjson
+    print(f"{args.items:,} items")
+    bodies = {}
+
+    for compact in (True, False):
+        serialization.orjson = None
+        stdlib, bodies[compact] = encode_time(app, items, compact)
+        line = f"{'compact' if compact else 'indented':9} stdlib: {stdlib:6.3f}s"
+        if orjson is not None:
+            serialization.orjson = orjson
+            fast, _ = encode_time(app, items, compact)
+            line += f"  orjson: {fast:6.3f}s ({stdlib / fast:.1f}x)"
+        print(line)
+    serialization.orjson = orjson
+
+    body = bodies[True]
+    print(f"compact body: {len(body) / 1e6:.1f} MB")
+    for encoding in supported_encodings():
+        start = time.perf_counter()
+        size = len(compress(body, encoding, 6))
+        print(f"  {encoding}: {size / 1e6:.1f} MB in {time.perf_counter() - start:.3f}s")
+
+if __name__ == "__main__":
+    main()
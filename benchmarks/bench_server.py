@@ -0,0 +1,130 @@
+"""
+Load test the development server against the production server.
+
+Starts each server as a subprocess, seeds it with the same items and
+measures requests per second for a read-heavy mix: single items, pages
+of the listing and stock adjustments. The development server is what
+``python run.py`` starts (one process, debugger and reloader on); the
+production server is app.server with preloaded gunicorn workers sharing
+a SQLite database.
+
+Requires aiohttp and gunicorn.
+
+Usage:
+    python -m benchmarks.bench_server [--requests 5000] [--concurrency 64] [--workers N] [--threads 8]
+"""
+import argparse
+import asyncio
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import aiohttp
+import requests
+from benchmarks.bench_async import free_port, report
+from benchmarks.bench_store import make_item
+
+
+def start_server(command, port, env):
+    """Start a server process and wait until it answers."""
+    process = subprocess.Popen(
+        command, env=dict(os.environ, **env), start_new_session=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return process
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    stop_server(process)
+    raise RuntimeError(f"{command} did not start")
+
+def stop_server(process):
+    # The dev server's reloader runs the app in a child process
+    os.killpg(process.pid, signal.SIGTERM)
+    process.wait()
+
+def make_requests(count, item_ids):
+    """A reproducible mix of 80% item reads, 15% page reads and 5% adjustments."""
+    rng = random.Random(0)
+    mix = []
+    for _ in range(count):
+        roll = rng.random()
+        item_id = rng.choice(item_ids)
+        if roll < 0.8:
+            mix.append(("GET", f"/inventory/{item_id}", None))
+        elif roll < 0.95:
+            mix.append(("GET", f"/inventory?limit=50&after={item_id}", None))
+        else:
+            mix.append(("POST", f"/inventory/{item_id}/adjust", {"delta": 1}))
+    return mix
+
+async def load(base_url, mix, concurrency):
+    """Send every request with ``concurrency`` in flight; return latencies."""
+    queue = iter(mix)
+    latencies = []
+
+    async def client_loop(session):
+        for method, path, body in queue:
+            start = time.perf_counter()
+            async with session.request(method, base_url + path, json=body) as response:
+                await response.read()
+            latencies.append(time.perf_counter() - start)
+            assert response.status == 200, (path, response.status)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(client_loop(session) for _ in range(concurrency)))
+    return latencies
+
+def run_load(name, port, items, count, concurrency):
+    base_url = f"http://127.0.0.1:{port}"
+    response = requests.post(f"{base_url}/inventory/bulk", json={"items": items})
+    ids = [result["item"]["id"] for result in response.json()["results"]]
+    mix = make_requests(count, ids)
+    start = time.perf_counter()
+    latencies = asyncio.run(load(base_url, mix, concurrency))
+    report(name, latencies, time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Development vs production server load test")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Production worker processes")
+    parser.add_argument("--threads", type=int, default=8, help="Threads per production worker")
+    args = parser.parse_args()
+
+    items = [make_item(n) for n in range(args.items)]
+    print(f"{args.requests} requests, {args.concurrency} concurrent clients, {args.items} items")
+
+    port = free_port()
+    dev = start_server([sys.executable, "-m", "flask", "--app", "run", "--debug", "run",
+                        "--port", str(port)], port, {})
+    try:
+        run_load("dev server (1 process)", port, items, args.requests, args.concurrency)
+    finally:
+        stop_server(dev)
+
+    with tempfile.TemporaryDirectory() as directory:
+        port = free_port()
+        production = start_server([sys.executable, "-m", "app.server"], port, {
+            "FLASK_INVENTORY_STORAGE": f"sqlite+shared:///{directory}/inventory.sqlite",
+            "FLASK_SERVER_BIND": f"127.0.0.1:{port}",
+            "FLASK_SERVER_WORKERS": str(args.workers),
+            "FLASK_SERVER_THREADS": str(args.threads)
+        })
+        try:
+            run_load(f"production ({args.workers}x{args.threads})", port,
+                     items, args.requests, args.concurrency)
+        finally:
+            stop_server(production)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark bulk inserts into the inventory store.
+
+Inserts batches of increasing size into a fresh store and reports the
+cost per insert. With O(1) ID allocation the per-insert cost stays flat
+as the batch grows, i.e. total time is linear in the number of items.
+
+Usage:
+    python -m benchmarks.bench_store [--max-items 1000000]
+"""
+import argparse
+import time
+from app.db import InventoryStore
+
+def make_item(n):
+    """Build a representative inventory item."""
+    return {
+        "product_name": f"Product {n}",
+        "brands": f"Brand {n % 500}",
+        "ingredients_text": "Water, sugar, salt",
+        "quantity": n % 100,
+        "price": 1.99,
+        "barcode": f"{n:012d}"
+    }
+
+def time_inserts(count):
+    """Return the seconds needed to insert ``count`` items."""
+    store = InventoryStore()
+    items = [make_item(n) for n in range(count)]
+    start = time.perf_counter()
+    for item in items:
+        store.add(item)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Inventory store insert benchmark")
+    parser.add_argument("--max-items", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    sizes = []
+    size = args.max_items
+    while size >= 1000 and len(sizes) < 4:
+        sizes.insert(0, size)
+        size //= 2
+
+    per_item = []
+    for count in sizes:
+        elapsed = time_inserts(count)
+        per_item.append(elapsed / count)
+        print(f"{count:>9} items: {elapsed:7.3f}s total, {elapsed / count * 1e6:6.2f}us/insert")
+
+    # Linear time means the per-insert cost does not grow with the size.
+    growth = per_item[-1] / per_item[0]
+    print(f"per-insert cost ratio ({sizes[-1]} vs {sizes[0]}): {growth:.2f}x")
+    if growth > 2:
+        raise SystemExit("insert cost grows with store size (expected ~1x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Reproducible performance benchmark suite with a regression check.
+
+Drives the API through the Flask test client against a fresh in-memory
+store and a local OpenFoodFacts stub, so results do not depend on the
+network. Scenarios:
+
+- ``crud.*``: create, get, update and delete one item, per store size
+- ``list.page`` / ``list.full``: serializing a 100-item page and the
+  whole catalog, with the response cache and compression off
+- ``lookup.cold`` / ``lookup.warm``: barcode lookups missing and hitting
+  the lookup cache
+- ``mixed``: reads, listings, adjustments and lookups from several
+  threads at once
+
+Each scenario reports p50/p99 latency and throughput. ``--save`` writes
+them to a JSON baseline; ``--compare`` checks a run against one and
+exits with status 1 if any scenario's p50 latency rose or throughput
+fell by more than ``--tolerance``. p99 is reported but not compared, as
+it is too noisy for a pass/fail check.
+
+Usage:
+    python -m benchmarks.suite [--sizes 1000,100000,1000000] [--save baseline.json]
+    python -m benchmarks.suite --compare baseline.json [--tolerance 0.25]
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app import create_app, db, external_api
+from app.storage import MemoryBackend
+from benchmarks.bench_store import make_item
+from tests.openfoodfacts_stub import OpenFoodFactsStub
+
+DEFAULT_SIZES = (1000, 100000, 1000000)
+
+# Config isolating the code under test from caching and compression
+CONFIG = {
+    "TESTING": True,
+    "RESPONSE_CACHE_BYTES": 0,
+    "COMPRESS_LEVEL": 0,
+    "UPSTREAM_RETRIES": 0
+}
+
+def size_label(size):
+    """Short label for a store size, e.g. 100k."""
+    for unit, suffix in ((1000000, "M"), (1000, "k")):
+        if size >= unit and size % unit == 0:
+            return f"{size // unit}{suffix}"
+    return str(size)
+
+def summarize(latencies, elapsed):
+    """Return p50/p99 latency in milliseconds and operations per second."""
+    latencies = sorted(latencies)
+    return {
+        "ops": len(latencies),
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000,
+        "throughput": len(latencies) / elapsed
+    }
+
+def timed(operation, count):
+    """Call ``operation(n)`` for n in range(count) and summarize the timings."""
+    latencies = []
+    start = time.perf_counter()
+    for n in range(count):
+        begin = time.perf_counter()
+        operation(n)
+        latencies.append(time.perf_counter() - begin)
+    return summarize(latencies, time.perf_counter() - start)
+
+def check(response, *statuses):
+    assert response.status_code in statuses, (response.request.path, response.status_code)
+    return response
+
+def populate(size):
+    """Replace the inventory with ``size`` generated items; return their IDs."""
+    store = db.configure_storage(MemoryBackend())
+    ids = []
+    for start in range(0, size, 10000):
+        added = store.add_many([make_item(n) for n in range(start, min(size, start + 10000))])
+        ids.extend(item["id"] for item in added)
+    return ids
+
+def bench_crud(client, ids, repeat, rng):
+    created = []
+    return {
+        "create": timed(lambda n: created.append(
+            check(client.post("/inventory", json=make_item(n)), 201).get_json()["id"]
+        ), repeat),
+        "get": timed(lambda n: check(client.get(f"/inventory/{rng.choice(ids)}"), 200), repeat),
+        "update": timed(lambda n: check(
+            client.patch(f"/inventory/{rng.choice(ids)}", json={"quantity": n}), 200
+        ), repeat),
+        "delete": timed(lambda n: check(client.delete(f"/inventory/{created[n]}"), 200), repeat)
+    }
+
+def bench_listing(client, ids, repeat, rng):
+    # Serializing the full catalog is O(size); keep the total work bounded
+    full_repeat = max(3, min(repeat, 1000000 // len(ids)))
+    return {
+        "page": timed(lambda n: check(
+            client.get(f"/inventory?limit=100&after={rng.choice(ids)}"), 200
+        ), repeat),
+        "full": timed(lambda n: check(client.get("/inventory"), 200), full_repeat)
+    }
+
+def bench_lookups(client, barcodes, repeat):
+    external_api.barcode_cache.clear()
+    cold = timed(lambda n: check(client.get(f"/lookup/barcode/{barcodes[n]}"), 200), repeat)
+    warm = timed(lambda n: check(client.get(f"/lookup/barcode/{barcodes[n % 10]}"), 200), repeat)
+    return {"cold": cold, "warm": warm}
+
+def bench_mixed(app, ids, barcodes, repeat, threads):
+    """Run a mix of 70% item reads, 10% pages, 10% adjustments and 10% lookups."""
+    local = threading.local()
+    rng = random.Random(1)
+    plan = [rng.random() for _ in range(repeat * threads)]
+
+    def operation(n):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.test_client()
+        roll, item_id = plan[n], ids[n % len(ids)]
+        begin = time.perf_counter()
+        if roll < 0.7:
+            check(client.get(f"/inventory/{item_id}"), 200)
+        elif roll < 0.8:
+            check(client.get(f"/inventory?limit=100&after={item_id}"), 200)
+        elif roll < 0.9:
+            check(client.post(f"/inventory/{item_id}/adjust", json={"delta": 1}), 200)
+        else:
+            check(client.get(f"/lookup/barcode/{barcodes[n % 10]}"), 200)
+        return time.perf_counter() - begin
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(operation, range(len(plan))))
+    return summarize(latencies, time.perf_counter() - start)
+
+def run_suite(sizes=DEFAULT_SIZES, repeat=200, threads=8, log=print):
+    """
+    Run every scenario and return ``{name: summary}``.
+
+    Args:
+        sizes (iterable): Store sizes for the CRUD and listing scenarios
+        repeat (int): Operations per scenario
+        threads (int): Client threads in the mixed scenario
+        log (callable): Called with a line per finished scenario
+    """
+    rng = random.Random(0)
+    products = {f"{n:012d}": {"product_name": f"Product {n}", "brands": "Bench"}
+                for n in range(repeat)}
+    barcodes = list(products)
+    results = {}
+
+    def record(name, summary):
+        results[name] = summary
+        log(format_result(name, summary))
+
+    api_url = external_api.OPENFOODFACTS_API_URL
+    with OpenFoodFactsStub(products) as stub:
+        external_api.OPENFOODFACTS_API_URL = stub.product_url
+        try:
+            app = create_app(CONFIG)
+            client = app.test_client()
+            for size in sizes:
+                ids = populate(size)
+                label = size_label(size)
+                for op, summary in bench_crud(client, ids, repeat, rng).items():
+                    record(f"crud.{op}/{label}", summary)
+                for op, summary in bench_listing(client, ids, repeat, rng).items():
+                    record(f"list.{op}/{label}", summary)
+
+            ids = populate(min(sizes))
+            for op, summary in bench_lookups(client, barcodes, repeat).items():
+                record(f"lookup.{op}", summary)
+            record(f"mixed/{threads} threads", bench_mixed(app, ids, barcodes, repeat, threads))
+        finally:
+            external_api.OPENFOODFACTS_API_URL = api_url
+    return results
+
+def format_result(name, summary):
+    return (f"{name:24} {summary['throughput']:10,.0f} ops/s  "
+            f"p50 {summary['p50_ms']:8.3f}ms  p99 {summary['p99_ms']:8.3f}ms")
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Compare results with a saved baseline.
+
+    Args:
+        results (dict): Output of run_suite()
+        baseline (dict): Results of an earlier run
+        tolerance (float): Allowed relative slowdown, e.g. 0.25 for 25%
+
+    Returns:
+        list: A description of every regression; empty if none
+    """
+    regressions = []
+    for name, summary in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if summary["p50_ms"] > base["p50_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p50 {summary['p50_ms']:.3f}ms vs {base['p50_ms']:.3f}ms baseline"
+            )
+        if summary["throughput"] < base["throughput"] / (1 + tolerance):
+            regressions.append(
+                f"{name}: {summary['throughput']:,.0f} ops/s vs {base['throughput']:,.0f} baseline"
+            )
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Inventory performance benchmark suite")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated store sizes")
+    parser.add_argument("--repeat", type=int, default=200, help="Operations per scenario")
+    parser.add_argument("--threads", type=int, default=8, help="Threads in the mixed scenario")
+    parser.add_argument("--save", metavar="PATH", help="Write the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Fail on regressions against a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = run_suite(sizes, args.repeat, args.threads)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results
+            }, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare}")
+
+if __name__ == "__main__":
+    main()
@@ -2,35 +2,177 @@
 Command-line interface for the Inventory Management System.
 """
 import argparse
+import csv
+import itertools
 import json
 import requests
 import sys
 import os
+import time
 
 # Set the API base URL
 API_BASE_URL = "http://127.0.0.1:5000"
 
+# Set by --compact: print JSON on one line instead of indented
+COMPACT_OUTPUT = False
+
 def pretty_print(data):
     """Print data in a readable format."""
     if isinstance(data, (dict, list)):
-        print(json.dumps(data, indent=2))
+        if COMPACT_OUTPUT:
+            print(json.dumps(data, separators=(",", ":")))
+        else:
+            print(json.dumps(data, indent=2))
     else:
         print(data)
 
-def list_inventory():
-    """Fetch and display all inventory items."""
-    try:
-        response = requests.get(f"{API_BASE_URL}/inventory")
+# Fields fetched by the list command
+LIST_FIELDS = "product_name,brands,quantity,price"
+
+def iter_inventory(page_size=100, fields=None, **filters):
+    """
+    Lazily fetch inventory items one page at a time.
+
+    Follows the X-Next-Cursor header returned by GET /inventory, so only
+    one page is held in memory at once.
+
+    Args:
+        page_size (int): Number of items to request per page
+        fields (str, optional): Comma-separated fields to fetch
+        **filters: Extra query parameters such as brand or min_quantity
+
+    Yields:
+        dict: Inventory items
+    """
+    params = {"limit": page_size, **filters}
+    if fields:
+        params["fields"] = fields
+    while True:
+        response = requests.get(f"{API_BASE_URL}/inventory", params=params)
         response.raise_for_status()
-        items = response.json()
+        yield from response.json()
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        params["after"] = cursor
+
+def list_inventory(page_size=100, brand=None):
+    """Fetch and display all inventory items, page by page."""
+    filters = {"brand": brand} if brand else {}
+    try:
+        count = 0
+        for item in iter_inventory(page_size, fields=LIST_FIELDS, **filters):
+            count += 1
+            print(f"ID: {item['id']} | {item.get('product_name')} | Brand: {item.get('brands')} | Qty: {item.get('quantity')} | Price: ${item.get('price')}")
         
-        if not items:
+        if not count:
             print("No items in inventory.")
             return
         
-        print(f"Total items: {len(items)}")
-        for item in items:
-            print(f"ID: {item['id']} | {item['product_name']} | Brand: {item['brands']} | Qty: {item['quantity']} | Price: ${item['price']}")
+        print(f"Total items: {count}")
+    except requests.exceptions.RequestException as e:
+        print(f"Error: {str(e)}")
+
+def export_inventory(output, export_format="ndjson"):
+    """
+    Stream the whole inventory into a file.
+
+    The response is written to disk as it arrives instead of being
+    buffered in memory.
+
+    Args:
+        output (str): Path of the file to write
+        export_format (str): "ndjson" or "csv"
+    """
+    try:
+        response = requests.get(
+            f"{API_BASE_URL}/inventory/export",
+            params={"format": export_format},
+            stream=True
+        )
+        response.raise_for_status()
+        
+        written = 0
+        with open(output, "wb") as f:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                f.write(chunk)
+                written += len(chunk)
+        
+        print(f"Exported {written} bytes to {output}")
+    except requests.exceptions.RequestException as e:
+        print(f"Error: {str(e)}")
+
+# CSV columns converted from text before import
+CSV_COLUMN_TYPES = {"id": int, "quantity": int, "price": float}
+
+def read_records(path, file_format):
+    """
+    Lazily read item records from a CSV or NDJSON file.
+
+    Args:
+        path (str): File to read
+        file_format (str): "csv" or "ndjson"
+
+    Yields:
+        dict: One record per row or line
+    """
+    with open(path, newline="") as f:
+        if file_format == "csv":
+            for row in csv.DictReader(f):
+                record = {}
+                for key, value in row.items():
+                    if value:
+                        convert = CSV_COLUMN_TYPES.get(key, str)
+                        record[key] = convert(value)
+                yield record
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def import_items(path, file_format=None, batch_size=500, update=False):
+    """
+    Import items from a file using the bulk endpoints.
+
+    Records are read and sent in batches, so the file is never loaded
+    into memory in full.
+
+    Args:
+        path (str): CSV or NDJSON file to import
+        file_format (str, optional): "csv" or "ndjson"; guessed from the extension
+        batch_size (int): Number of items sent per request
+        update (bool): PATCH existing items by ID instead of creating new ones
+    """
+    if file_format is None:
+        file_format = "csv" if path.lower().endswith(".csv") else "ndjson"
+    method = requests.patch if update else requests.post
+    
+    succeeded = failed = 0
+    try:
+        records = read_records(path, file_format)
+        for batch_number in itertools.count():
+            batch = list(itertools.islice(records, batch_size))
+            if not batch:
+                break
+            if not update:
+                for record in batch:
+                    record.pop("id", None)
+            
+            response = method(f"{API_BASE_URL}/inventory/bulk", json={"items": batch})
+            response.raise_for_status()
+            result = response.json()
+            succeeded += result["succeeded"]
+            failed += result["failed"]
+            
+            for item_result in result["results"]:
+                if "error" in item_result:
+                    record_number = batch_number * batch_size + item_result["index"] + 1
+                    print(f"Record {record_number}: {item_result['error']}")
+            print(f"Imported {succeeded + failed} records...")
+        
+        print(f"Import finished: {succeeded} succeeded, {failed} failed.")
+    except (OSError, ValueError) as e:
+        print(f"Error reading {path}: {str(e)}")
     except requests.exceptions.RequestException as e:
         print(f"Error: {str(e)}")
 
@@ -196,13 +338,21 @@ def update_item(item_id):
         except ValueError:
             print("Invalid price. This field will not be updated.")
         
-        # Send update to API
+        # Send update to API; If-Match rejects it if someone else changed
+        # the item while it was being edited
         if update_data:
+            headers = {"Content-Type": "application/json"}
+            if response.headers.get("ETag"):
+                headers["If-Match"] = response.headers["ETag"]
             response = requests.patch(
                 f"{API_BASE_URL}/inventory/{item_id}",
                 json=update_data,
-                headers={"Content-Type": "application/json"}
+                headers=headers
             )
+            if response.status_code == 412:
+                print("Item was modified by someone else; no changes made. Current item:")
+                pretty_print(response.json().get("item"))
+                return
             response.raise_for_status()
             
             print("Item updated successfully:")
@@ -218,6 +368,35 @@ def update_item(item_id):
     except requests.exceptions.RequestException as e:
         print(f"Error: {str(e)}")
 
+def adjust_item(item_id, delta):
+    """Atomically add ``delta`` to an item's quantity."""
+    try:
+        response = requests.post(
+            f"{API_BASE_URL}/inventory/{item_id}/adjust",
+            json={"delta": delta},
+            headers={"Content-Type": "application/json"}
+        )
+        if response.status_code in (409, 412):
+            # Insufficient stock, a non-integer stored quantity or a stale If-Match
+            data = response.json()
+            item = data.get("item", {})
+            if data.get("error") == "Insufficient stock":
+                print(f"Insufficient stock: only {item.get('quantity', 0)} left.")
+            else:
+                print(f"{data.get('error')} (quantity: {item.get('quantity')!r}).")
+            return
+        response.raise_for_status()
+        item = response.json()
+        print(f"Quantity of {item.get('product_name')} is now {item.get('quantity')}.")
+    
+    except requests.exceptions.HTTPError as e:
+        if e.response.status_code == 404:
+            print(f"Item with ID {item_id} not found.")
+        else:
+            print(f"Error: {str(e)}")
+    except requests.exceptions.RequestException as e:
+        print(f"Error: {str(e)}")
+
 def delete_item(item_id):
     """Delete an inventory item."""
     try:
@@ -275,15 +454,121 @@ def lookup_product():
     except requests.exceptions.RequestException as e:
         print(f"Error: {str(e)}")
 
+def format_progress(progress):
+    return (f"[{progress['status']}] scanned {progress.get('scanned', 0)}, "
+            f"enriched {progress.get('enriched', 0)}, not found {progress.get('not_found', 0)}, "
+            f"failed {progress.get('failed', 0)}, conflicts {progress.get('conflicts', 0)}")
+
+def enrich_items(restart=False, follow=True, stop=False, interval=2.0):
+    """
+    Start the server-side enrichment job and follow its progress.
+
+    Args:
+        restart (bool): Scan from the start instead of resuming
+        follow (bool): Print progress until the job finishes
+        stop (bool): Stop the running job instead of starting one
+        interval (float): Seconds between progress updates
+    """
+    url = f"{API_BASE_URL}/inventory/enrichment"
+    try:
+        if stop:
+            response = requests.delete(url)
+            if response.status_code == 404:
+                print("No enrichment job is running.")
+                return
+            response.raise_for_status()
+            print("Stopping after the current batch.")
+            return
+
+        response = requests.post(url, json={"restart": restart})
+        if response.status_code == 409:
+            print("An enrichment job is already running.")
+        else:
+            response.raise_for_status()
+        progress = requests.get(url).json()
+        print(format_progress(progress))
+        while follow and progress["status"] == "running":
+            time.sleep(interval)
+            progress = requests.get(url).json()
+            print(format_progress(progress))
+        if progress.get("error"):
+            print(f"Error: {progress['error']}")
+    except requests.exceptions.RequestException as e:
+        print(f"Error: {str(e)}")
+
+def format_money(value):
+    return "-" if value is None else f"${value:,.2f}"
+
+def show_report(report, limit=20, bins=10, by="brand"):
+    """
+    Print one of the GET /reports/... reports.
+
+    Args:
+        report (str): "brands", "categories", "prices" or "turnover"
+        limit (int): Number of groups to show
+        bins (int): Histogram bins for the price report
+        by (str): Grouping of the turnover report, "brand" or "category"
+    """
+    if report == "prices":
+        params = {"bins": bins}
+    elif report == "turnover":
+        params = {"by": by, "limit": limit}
+    else:
+        params = {"limit": limit}
+    try:
+        response = requests.get(f"{API_BASE_URL}/reports/{report}", params=params)
+        response.raise_for_status()
+        result = response.json()
+    except requests.exceptions.RequestException as e:
+        print(f"Error: {str(e)}")
+        return
+
+    if COMPACT_OUTPUT:
+        pretty_print(result)
+    elif report == "prices":
+        print(f"Priced items: {result['count']} | Mean: {format_money(result['mean'])}")
+        for name, value in result["percentiles"].items():
+            print(f"{name:>4}: {format_money(value)}")
+        edges, counts = result["histogram"]["edges"], result["histogram"]["counts"]
+        for low, high, count in zip(edges, edges[1:], counts):
+            print(f"{format_money(low):>12} - {format_money(high):>12}: {count}")
+    elif report == "turnover":
+        window = result["window"]
+        print(f"Turnover over the last {window['changes']} changes")
+        for row in result["rows"]:
+            turnover = "-" if row["turnover"] is None else f"{row['turnover']:.2%}"
+            print(f"{row[by]} | Sold: {row['units_out']} | Stock: {row['stock']} | Turnover: {turnover}")
+    else:
+        key = "brand" if report == "brands" else "category"
+        for row in result["rows"]:
+            print(f"{row[key]} | Items: {row['items']} | Units: {row['units']} | "
+                  f"Value: {format_money(row['value'])} | Avg price: {format_money(row['avg_price'])}")
+        print(f"Showing {len(result['rows'])} of {result['groups']} {report}")
+
 def main():
     """Main CLI function."""
     parser = argparse.ArgumentParser(description="Inventory Management System CLI")
+    parser.add_argument("--compact", action="store_true", help="Print JSON on one line")
     
     # Create subparsers for commands
     subparsers = parser.add_subparsers(dest="command", help="Command to run")
     
     # List command
     list_parser = subparsers.add_parser("list", help="List all inventory items")
+    list_parser.add_argument("--page-size", type=int, default=100, help="Items fetched per request")
+    list_parser.add_argument("--brand", help="Only list items of this brand")
+    
+    # Export command
+    export_parser = subparsers.add_parser("export", help="Export the inventory to a file")
+    export_parser.add_argument("output", help="File to write")
+    export_parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson", help="Export format")
+    
+    # Import command
+    import_parser = subparsers.add_parser("import", help="Import items from a CSV or NDJSON file")
+    import_parser.add_argument("path", help="File to import")
+    import_parser.add_argument("--format", choices=["ndjson", "csv"], help="File format (default: from extension)")
+    import_parser.add_argument("--batch-size", type=int, default=500, help="Items sent per request")
+    import_parser.add_argument("--update", action="store_true", help="Update existing items by ID")
     
     # Get command
     get_parser = subparsers.add_parser("get", help="Get a specific inventory item")
@@ -296,6 +581,11 @@ def main():
     update_parser = subparsers.add_parser("update", help="Update an inventory item")
     update_parser.add_argument("id", type=int, help="Item ID to update")
     
+    # Adjust command
+    adjust_parser = subparsers.add_parser("adjust", help="Change an item's quantity by a relative amount")
+    adjust_parser.add_argument("id", type=int, help="Item ID to adjust")
+    adjust_parser.add_argument("delta", type=int, help="Amount to add; negative to remove stock")
+    
     # Delete command
     delete_parser = subparsers.add_parser("delete", help="Delete an inventory item")
     delete_parser.add_argument("id", type=int, help="Item ID to delete")
@@ -303,9 +593,25 @@ def main():
     # Lookup command
     lookup_parser = subparsers.add_parser("lookup", help="Look up a product in OpenFoodFacts")
     
+    # Enrich command
+    enrich_parser = subparsers.add_parser("enrich", help="Fill in missing brands and ingredients from OpenFoodFacts")
+    enrich_parser.add_argument("--restart", action="store_true", help="Scan from the start instead of resuming")
+    enrich_parser.add_argument("--no-follow", action="store_true", help="Start the job without waiting for it")
+    enrich_parser.add_argument("--stop", action="store_true", help="Stop the running job")
+    
+    # Report command
+    report_parser = subparsers.add_parser("report", help="Show a catalog report")
+    report_parser.add_argument("report", choices=["brands", "categories", "prices", "turnover"], help="Report to show")
+    report_parser.add_argument("--limit", type=int, default=20, help="Number of groups to show")
+    report_parser.add_argument("--bins", type=int, default=10, help="Histogram bins of the price report")
+    report_parser.add_argument("--by", choices=["brand", "category"], default="brand", help="Grouping of the turnover report")
+    
     # Parse arguments
     args = parser.parse_args()
     
+    global COMPACT_OUTPUT
+    COMPACT_OUTPUT = args.compact
+    
     # Check if a command was provided
     if not args.command:
         parser.print_help()
@@ -313,17 +619,27 @@ def main():
     
     # Execute command
     if args.command == "list":
-        list_inventory()
+        list_inventory(args.page_size, args.brand)
+    elif args.command == "export":
+        export_inventory(args.output, args.format)
+    elif args.command == "import":
+        import_items(args.path, args.format, args.batch_size, args.update)
     elif args.command == "get":
         get_item(args.id)
     elif args.command == "add":
         add_item()
     elif args.command == "update":
         update_item(args.id)
+    elif args.command == "adjust":
+        adjust_item(args.id, args.delta)
     elif args.command == "delete":
         delete_item(args.id)
     elif args.command == "lookup":
         lookup_product()
+    elif args.command == "enrich":
+        enrich_items(args.restart, not args.no_follow, args.stop)
+    elif args.command == "report":
+        show_report(args.report, args.limit, args.bins, args.by)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,9 +1,19 @@
 """
 Entry point for the Flask application.
+
+Runs the development server with the debugger and reloader, or the
+production server (app.server) when started with ``--production`` or
+with INVENTORY_PRODUCTION=1 in the environment.
 """
+import os
+import sys
 from app import create_app
 
 app = create_app()
 
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    if "--production" in sys.argv[1:] or os.environ.get("INVENTORY_PRODUCTION") == "1":
+        from app.server import serve
+        serve(app)
+    else:
+        app.run(debug=True)
@@ -0,0 +1,134 @@
+"""
+Local stand-in for the OpenFoodFacts API, used by tests and benchmarks.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Products served by default, keyed by barcode
+DEFAULT_PRODUCTS = {
+    "003766200063": {
+        "product_name": "Organic Almond Milk",
+        "brands": "Silk",
+        "ingredients_text": "Filtered water, almonds, cane sugar, sea salt",
+        "categories": "Plant-based milks"
+    },
+    "007225002035": {
+        "product_name": "Whole Grain Bread",
+        "brands": "Nature's Own",
+        "ingredients_text": "Whole wheat flour, water, honey, yeast, wheat gluten",
+        "categories": "Breads"
+    }
+}
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Accept bursts of concurrent connections from benchmarks
+    request_queue_size = 1024
+
+
+class OpenFoodFactsStub:
+    """
+    Threaded HTTP server mimicking the OpenFoodFacts product and search APIs.
+
+    Attributes:
+        products (dict): Products served, keyed by barcode
+        latency (float): Seconds to sleep before answering each request
+        fail (bool): Answer every request with HTTP 503 when True
+        not_found_status (int): HTTP status of the "product not found"
+            answer; the live API has sent both 200 and 404
+        requests (list): Paths of the requests received so far
+    """
+
+    def __init__(self, products=None, latency=0.0):
+        self.products = dict(DEFAULT_PRODUCTS if products is None else products)
+        self.latency = latency
+        self.fail = False
+        self.not_found_status = 200
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def product_url(self):
+        """Value for external_api.OPENFOODFACTS_API_URL."""
+        return f"{self.url}/api/v0/product/"
+
+    @property
+    def search_url(self):
+        """Value for external_api.OPENFOODFACTS_SEARCH_URL."""
+        return f"{self.url}/cgi/search.pl"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _record(self, path):
+        with self._lock:
+            self.requests.append(path)
+
+    def _respond(self, path, query):
+        """Return (status, body) for a request."""
+        if self.fail:
+            return 503, {"error": "unavailable"}
+        if path.startswith("/api/v0/product/") and path.endswith(".json"):
+            barcode = path[len("/api/v0/product/"):-len(".json")]
+            product = self.products.get(barcode)
+            if product is None:
+                return self.not_found_status, {"status": 0, "status_verbose": "product not found"}
+            return 200, {"status": 1, "code": barcode, "product": product}
+        if path == "/cgi/search.pl":
+            terms = query.get("search_terms", [""])[0].lower()
+            page_size = int(query.get("page_size", ["20"])[0])
+            products = [
+                dict(product, code=barcode)
+                for barcode, product in self.products.items()
+                if terms in product.get("product_name", "").lower()
+            ]
+            return 200, {"count": len(products), "products": products[:page_size]}
+        return 404, {"error": "not found"}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                stub._record(self.path)
+                if stub.latency:
+                    time.sleep(stub.latency)
+                status, payload = stub._respond(parsed.path, parse_qs(parsed.query))
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
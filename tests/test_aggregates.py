@@ -0,0 +1,54 @@
+"""
+Unit tests for the incrementally maintained inventory aggregates.
+"""
+import random
+from app.aggregates import InventoryAggregates, SortedIndex
+
+def test_sorted_index_matches_sorted_list():
+    """Test adds, removes and range queries across bucket splits."""
+    rng = random.Random(0)
+    index = SortedIndex(bucket_size=4)
+    expected = []
+    for item_id in range(200):
+        entry = (rng.randint(0, 20), item_id)
+        index.add(entry)
+        expected.append(entry)
+    for entry in rng.sample(expected, 120):
+        index.remove(entry)
+        expected.remove(entry)
+        assert index.count_below(10) == sum(1 for e in expected if e[0] < 10)
+    expected.sort()
+
+    assert len(index) == len(expected)
+    for key in (-1, 0, 5, 10.5, 21):
+        assert list(index.below(key)) == [e for e in expected if e[0] < key]
+        assert index.count_below(key) == sum(1 for e in expected if e[0] < key)
+    for low, high in ((None, 5), (5, None), (3, 3), (2.5, 17), (21, None), (8, 2)):
+        matching = [e for e in expected if (low is None or e[0] >= low) and (high is None or e[0] <= high)]
+        assert list(index.between(low, high)) == matching
+        assert index.count_between(low, high) == len(matching)
+
+def test_totals_survive_add_and_remove_without_drift():
+    """Test that float prices cancel out exactly."""
+    aggregates = InventoryAggregates()
+    items = [{"id": n, "quantity": 3, "price": 0.1} for n in range(10)]
+    for item in items:
+        aggregates.add(item)
+    assert aggregates.stats(5)["total_value"] == 3.0
+    for item in items[1:]:
+        aggregates.remove(item)
+    assert aggregates.stats(5) == {
+        "items": 1, "total_quantity": 3, "total_value": 0.3,
+        "out_of_stock": 0, "low_stock": 1, "low_stock_threshold": 5
+    }
+
+def test_items_without_numbers_are_counted_but_not_indexed():
+    """Test items with missing or non-numeric quantity and price."""
+    aggregates = InventoryAggregates()
+    aggregates.add({"id": 1, "quantity": "many", "price": 2.0})
+    aggregates.add({"id": 2, "quantity": 4})
+    aggregates.add({"id": 3, "quantity": True, "price": 1.0})
+    stats = aggregates.stats(10)
+    assert (stats["items"], stats["total_quantity"], stats["total_value"]) == (3, 4, 0.0)
+    assert list(aggregates.by_quantity.below(10)) == [(4, 2)]
+    assert list(aggregates.by_price.between()) == [(1.0, 3), (2.0, 1)]
@@ -3,7 +3,9 @@ Unit tests for the API endpoints.
 """
 import pytest
 import json
+import threading
 from app import create_app
+from app.db import get_items_by_barcode
 
 @pytest.fixture
 def client():
@@ -76,6 +78,17 @@ def test_update_item(client):
         updated_item = json.loads(response.data)
         assert updated_item["price"] == update_data["price"]
 
+def test_any_field_name_is_accepted(client):
+    """Test that fields named like constructor parameters are stored as extras."""
+    response = client.post("/inventory", json={"product_name": "Odd", "self": 1, "fields": 2})
+    assert response.status_code == 201
+    item = response.get_json()
+    assert (item["self"], item["fields"]) == (1, 2)
+
+    response = client.patch(f"/inventory/{item['id']}", json={"self": 3})
+    assert response.status_code == 200
+    assert response.get_json()["self"] == 3
+
 def test_delete_item(client):
     """Test DELETE /inventory/<id> endpoint."""
     # First, create an item to delete
@@ -100,4 +113,277 @@ def test_delete_item(client):
     
     # Verify it's gone
     response = client.get(f"/inventory/{item_id}")
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+def test_concurrent_writes_keep_invariants():
+    """Hammer the API from many threads and check the store stays consistent."""
+    app = create_app({"TESTING": True})
+    threads_count, items_per_thread = 8, 50
+    created = [[] for _ in range(threads_count)]
+    errors = []
+
+    def worker(n):
+        client = app.test_client()
+        try:
+            for i in range(items_per_thread):
+                response = client.post("/inventory", json={
+                    "product_name": f"Stress {n}-{i}",
+                    "quantity": 0,
+                    "barcode": f"stress-{n}-{i}"
+                })
+                assert response.status_code == 201
+                item_id = response.get_json()["id"]
+                created[n].append(item_id)
+
+                response = client.patch(f"/inventory/{item_id}", json={"quantity": i})
+                assert response.get_json()["quantity"] == i
+                client.get("/inventory")
+
+                if i % 2:
+                    assert client.delete(f"/inventory/{item_id}").status_code == 200
+        except AssertionError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    all_ids = [item_id for ids in created for item_id in ids]
+    assert len(set(all_ids)) == len(all_ids)
+
+    client = app.test_client()
+    live = {item["id"]: item for item in client.get("/inventory").get_json()}
+    for n, ids in enumerate(created):
+        for i, item_id in enumerate(ids):
+            if i % 2:
+                assert item_id not in live
+                assert get_items_by_barcode(f"stress-{n}-{i}") == []
+            else:
+                assert live[item_id]["quantity"] == i
+                assert [item["id"] for item in get_items_by_barcode(f"stress-{n}-{i}")] == [item_id]
+
+def test_paginate_inventory(client):
+    """Test keyset pagination with ?limit= and ?after=."""
+    ids = [client.post("/inventory", json={"product_name": f"Page {n}"}).get_json()["id"]
+           for n in range(5)]
+    after = ids[0]
+
+    response = client.get(f"/inventory?limit=2&after={after}")
+    assert [item["id"] for item in response.get_json()] == ids[1:3]
+    assert response.headers["X-Next-Cursor"] == str(ids[2])
+    assert f"after={ids[2]}" in response.headers["Link"]
+
+    client.delete(f"/inventory/{ids[3]}")
+    response = client.get(f"/inventory?limit=2&after={ids[2]}")
+    assert [item["id"] for item in response.get_json()] == [ids[4]]
+
+    assert client.get("/inventory?limit=0").status_code == 400
+    assert client.get("/inventory?after=abc").status_code == 400
+
+def test_project_and_filter_inventory(client):
+    """Test ?fields= projection and the brand/quantity/price filters."""
+    client.post("/inventory", json={"product_name": "Cheap", "brands": "Filter Co",
+                                    "quantity": 3, "price": 1.0})
+    client.post("/inventory", json={"product_name": "Pricey", "brands": "Filter Co",
+                                    "quantity": 30, "price": 20.0})
+
+    response = client.get("/inventory?brand=filter co&fields=product_name")
+    assert [item["product_name"] for item in response.get_json()] == ["Cheap", "Pricey"]
+    assert set(response.get_json()[0]) == {"id", "product_name"}
+
+    response = client.get("/inventory?brand=Filter Co&min_quantity=10&max_price=25")
+    assert [item["product_name"] for item in response.get_json()] == ["Pricey"]
+
+    response = client.get("/inventory?brand=Filter Co&min_quantity=30&max_quantity=30")
+    assert [item["product_name"] for item in response.get_json()] == ["Pricey"]
+
+    # A range narrower than the brand must still be limited to the brand
+    client.post("/inventory", json={"product_name": "Elsewhere", "brands": "Other Co", "quantity": 777})
+    assert client.get("/inventory?brand=Filter Co&min_quantity=777").get_json() == []
+
+    assert client.get("/inventory?min_price=cheap").status_code == 400
+    assert client.get("/inventory?max_price=nan").status_code == 400
+
+def test_export_inventory(client):
+    """Test streaming NDJSON and CSV exports."""
+    response = client.get("/inventory/export?format=ndjson")
+    assert response.status_code == 200
+    assert response.is_streamed
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines[0]["product_name"] == "Organic Almond Milk"
+
+    response = client.get("/inventory/export?format=csv&fields=product_name,price")
+    rows = response.get_data(as_text=True).splitlines()
+    assert rows[0] == "id,product_name,price"
+    assert rows[1].startswith("1,Organic Almond Milk,")
+
+    assert client.get("/inventory/export?format=xml").status_code == 400
+
+def test_bulk_endpoints(client):
+    """Test bulk create, update and delete with per-item errors."""
+    response = client.post("/inventory/bulk", json={"items": [
+        {"product_name": "Bulk A", "quantity": 1},
+        {"quantity": 2},
+        {"product_name": "Bulk B", "quantity": 3}
+    ]})
+    data = response.get_json()
+    assert response.status_code == 200
+    assert (data["succeeded"], data["failed"]) == (2, 1)
+    assert [result["status"] for result in data["results"]] == [201, 400, 201]
+    ids = [data["results"][0]["item"]["id"], data["results"][2]["item"]["id"]]
+
+    response = client.patch("/inventory/bulk", json={"items": [
+        {"id": ids[0], "quantity": 10},
+        {"id": 999999, "quantity": 1},
+        {"id": True, "quantity": 1}
+    ]})
+    data = response.get_json()
+    assert [result["status"] for result in data["results"]] == [200, 404, 400]
+    assert client.get(f"/inventory/{ids[0]}").get_json()["quantity"] == 10
+
+    response = client.delete("/inventory/bulk", json={"ids": ids + [ids[0], True]})
+    assert [result["status"] for result in response.get_json()["results"]] == [200, 200, 404, 400]
+    assert client.get(f"/inventory/{ids[1]}").status_code == 404
+
+    assert client.post("/inventory/bulk", json={"items": []}).status_code == 400
+
+def test_search_inventory(client):
+    """Test GET /inventory/search."""
+    response = client.get("/inventory/search?q=almond")
+    assert response.get_json()[0]["product_name"] == "Organic Almond Milk"
+    assert client.get("/inventory/search").status_code == 400
+
+def test_lookup_by_name_uses_local_index(client):
+    """Test that name lookups matching the inventory skip OpenFoodFacts."""
+    response = client.get("/lookup/name/whole grain")
+    data = response.get_json()
+    assert data["source"] == "inventory"
+    assert data["products"][0]["barcode"] == "007225002035"
+
+def test_adjust_item(client):
+    """Test POST /inventory/<id>/adjust."""
+    item = client.post("/inventory", json={"product_name": "Tea", "quantity": 3}).get_json()
+    url = f"/inventory/{item['id']}/adjust"
+
+    response = client.post(url, json={"delta": -2})
+    assert response.status_code == 200
+    assert response.get_json()["quantity"] == 1
+    assert response.headers["ETag"] == f'"{item["id"]}-2"'
+
+    assert client.post(url, json={"delta": -2}).status_code == 409
+    assert client.post(url, json={"delta": "1"}).status_code == 400
+    assert client.post(url, json={"delta": True}).status_code == 400
+    assert client.post("/inventory/9999/adjust", json={"delta": 1}).status_code == 404
+
+    assert client.patch(f"/inventory/{item['id']}", json={"quantity": "3"}).status_code == 200
+    response = client.post(url, json={"delta": -1})
+    assert response.status_code == 409
+    assert response.get_json()["item"]["quantity"] == "3"
+
+def test_patch_if_match(client):
+    """Test that PATCH with a stale If-Match is rejected."""
+    response = client.get("/inventory/2")
+    etag = response.headers["ETag"]
+
+    response = client.patch("/inventory/2", json={"quantity": 10}, headers={"If-Match": etag})
+    assert response.status_code == 200
+
+    response = client.patch("/inventory/2", json={"quantity": 20}, headers={"If-Match": etag})
+    assert response.status_code == 412
+    assert response.get_json()["item"]["quantity"] == 10
+
+    response = client.patch("/inventory/2", json={"quantity": 20}, headers={"If-Match": "*"})
+    assert response.status_code == 200
+
+def test_change_feed(client):
+    """Test following GET /inventory/changes from a full listing."""
+    seq = int(client.get("/inventory").headers["X-Change-Seq"])
+    item = client.post("/inventory", json={"product_name": "Feed"}).get_json()
+    client.post(f"/inventory/{item['id']}/adjust", json={"delta": 4})
+    client.delete(f"/inventory/{item['id']}")
+
+    data = client.get(f"/inventory/changes?since={seq}").get_json()
+    assert [(c["op"], c["id"]) for c in data["changes"]] == [("put", item["id"])] * 2 + [("delete", item["id"])]
+    assert data["changes"][1]["item"]["quantity"] == 4
+    assert data["seq"] == seq + 3
+
+    data = client.get(f"/inventory/changes?since={data['seq']}&wait=0.01").get_json()
+    assert data["changes"] == []
+
+    response = client.get(f"/inventory/changes?since={seq - 100000}")
+    assert response.status_code == 410
+    assert response.get_json()["resync"] is True
+    assert client.get("/inventory/changes").status_code == 400
+
+def test_change_stream(client):
+    """Test the server-sent event stream of changes."""
+    seq = int(client.get("/inventory").headers["X-Change-Seq"])
+    item = client.post("/inventory", json={"product_name": "Streamed"}).get_json()
+
+    response = client.get(f"/inventory/changes/stream?since={seq}", buffered=False)
+    event = next(iter(response.response))
+    response.close()
+    event = event.decode() if isinstance(event, bytes) else event
+    assert event.startswith(f"id: {seq + 1}\nevent: change\n")
+    assert json.loads(event.split("data: ", 1)[1])["id"] == item["id"]
+
+def test_conditional_get(client):
+    """Test ETags, 304s and the inventory response cache."""
+    response = client.get("/inventory?limit=1")
+    etag = response.headers["ETag"]
+    assert client.get("/inventory?limit=1", headers={"If-None-Match": etag}).status_code == 304
+
+    cached = client.get("/inventory?limit=1")
+    assert cached.data == response.data
+    assert cached.headers["X-Next-Cursor"] == response.headers["X-Next-Cursor"]
+
+    client.post("/inventory/1/adjust", json={"delta": 1})
+    response = client.get("/inventory?limit=1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+    item = client.get("/inventory/1")
+    assert client.get("/inventory/1", headers={"If-None-Match": item.headers["ETag"]}).status_code == 304
+
+def test_compression(client):
+    """Test negotiated gzip compression above the size threshold."""
+    import gzip
+    for n in range(20):
+        client.post("/inventory", json={"product_name": f"Compressible {n}"})
+
+    response = client.get("/inventory", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"].startswith('W/"inventory-')
+    assert json.loads(gzip.decompress(response.data)) == client.get("/inventory").get_json()
+
+    etag = response.headers["ETag"]
+    assert client.get("/inventory", headers={"If-None-Match": etag}).status_code == 304
+    response = client.get("/inventory", headers={"If-None-Match": etag, "Accept-Encoding": "gzip"})
+    assert (response.status_code, response.headers["ETag"]) == (304, etag)
+    assert "Content-Encoding" not in client.get("/inventory/1", headers={"Accept-Encoding": "gzip"}).headers
+
+    response = client.get("/inventory/export", headers={"Accept-Encoding": "gzip"})
+    assert b"Compressible 19" in gzip.decompress(response.data)
+
+def test_low_stock_and_stats(client):
+    """Test GET /inventory/low-stock and GET /inventory/stats."""
+    before = client.get("/inventory/stats").get_json()
+    client.post("/inventory", json={"product_name": "Salt", "quantity": -20, "price": 0.5})
+    client.post("/inventory", json={"product_name": "Pepper", "quantity": -10, "price": 2.0})
+
+    data = client.get("/inventory/low-stock?threshold=-5&limit=2").get_json()
+    assert data["threshold"] == -5
+    assert data["count"] == 2
+    assert [item["product_name"] for item in data["items"]] == ["Salt", "Pepper"]
+    assert client.get("/inventory/low-stock?threshold=x").status_code == 400
+    assert client.get("/inventory/low-stock?limit=0").status_code == 400
+
+    stats = client.get("/inventory/stats").get_json()
+    assert stats["items"] == before["items"] + 2
+    assert stats["total_quantity"] == before["total_quantity"] - 30
+    assert round(stats["total_value"] - before["total_value"], 2) == -30.0
+    assert stats["out_of_stock"] == before["out_of_stock"] + 2
+    assert stats["low_stock_threshold"] == 10
@@ -0,0 +1,81 @@
+"""
+Unit tests for the ASGI entry point and async lookups, run against a local stub server.
+"""
+import asyncio
+import pytest
+from app import async_external_api, external_api
+from tests.openfoodfacts_stub import OpenFoodFactsStub
+
+pytest.importorskip("aiohttp")
+httpx = pytest.importorskip("httpx")  # drives the ASGI app in-process
+asgi = pytest.importorskip("app.asgi")
+
+@pytest.fixture
+def stub(monkeypatch):
+    with OpenFoodFactsStub() as stub:
+        monkeypatch.setattr(external_api, "OPENFOODFACTS_API_URL", stub.product_url)
+        monkeypatch.setattr(external_api, "OPENFOODFACTS_SEARCH_URL", stub.search_url)
+        external_api.configure_cache()
+        yield stub
+
+def run(requests):
+    """Drive a fresh ASGI app with ``requests(client)`` on a new event loop."""
+    app = asgi.create_asgi_app({"TESTING": True, "UPSTREAM_RETRIES": 1, "UPSTREAM_BACKOFF": 0})
+
+    async def main():
+        async_external_api.http_client = None
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            try:
+                return await requests(client)
+            finally:
+                await async_external_api.http_client.close()
+    return asyncio.run(main())
+
+def test_concurrent_lookups_are_coalesced(stub):
+    """Test async barcode lookups, with identical concurrent ones sharing a request."""
+    stub.latency = 0.05
+
+    async def requests(client):
+        return await asyncio.gather(*(client.get("/lookup/barcode/003766200063") for _ in range(10)))
+
+    responses = run(requests)
+    assert all(r.status_code == 200 and r.json()["product"]["brands"] == "Silk" for r in responses)
+    assert len(stub.requests) == 1
+
+def test_batch_and_name_lookups(stub):
+    """Test the async batch and name routes and the fallback to Flask."""
+    async def requests(client):
+        batch = await client.post("/lookup/barcode/batch", json={"barcodes": ["003766200063", "000"]})
+        bad = await client.post("/lookup/barcode/batch", json={"barcodes": []})
+        local = await client.get("/lookup/name/almond milk")
+        remote = await client.get("/lookup/name/nothing in stock")
+        item = await client.get("/inventory/1")
+        return batch, bad, local, remote, item
+
+    batch, bad, local, remote, item = run(requests)
+    assert [r["status"] for r in batch.json()["results"]] == [200, 404]
+    assert bad.status_code == 400
+    assert local.json()["source"] == "inventory"
+    assert remote.json()["source"] == "openfoodfacts"
+    assert item.json()["id"] == 1
+
+def test_async_routes_are_timed(stub):
+    """Test that routes served on the event loop show up in the request metrics."""
+    from app.metrics import registry
+
+    async def requests(client):
+        return await client.get("/lookup/name/almond milk")
+
+    assert run(requests).status_code == 200
+    assert 'http_request_duration_seconds_count{method="GET",route="/lookup/name/<name>",status="200"}' \
+        in registry.render()
+
+def test_not_found_answered_with_404(stub):
+    """Test that a 404 "product not found" answer is reported as missing."""
+    stub.not_found_status = 404
+
+    async def requests(client):
+        return await client.get("/lookup/barcode/000")
+
+    assert run(requests).status_code == 404
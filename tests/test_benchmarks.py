@@ -0,0 +1,37 @@
+"""
+Tests for the benchmark suite's regression check.
+"""
+import pytest
+from app import db
+from benchmarks.suite import compare, run_suite, size_label
+
+@pytest.fixture(autouse=True)
+def restore_store():
+    """Put the shared mock store back after the suite replaces it."""
+    original = db.store
+    yield
+    if db.store is not original:
+        db.store.close()
+        db.store = original
+
+def summary(p50_ms, throughput):
+    return {"ops": 100, "p50_ms": p50_ms, "p99_ms": p50_ms * 2, "throughput": throughput}
+
+def test_compare_flags_regressions_beyond_tolerance():
+    """Test that only slowdowns larger than the tolerance are reported."""
+    baseline = {"fast": summary(1.0, 1000), "slow": summary(1.0, 1000), "gone": summary(1.0, 1000)}
+    results = {"fast": summary(1.2, 850), "slow": summary(1.5, 600), "new": summary(9.0, 1)}
+    regressions = compare(results, baseline, tolerance=0.25)
+    assert len(regressions) == 2
+    assert all(regression.startswith("slow:") for regression in regressions)
+
+def test_suite_runs_every_scenario():
+    """Test a tiny run of the suite end to end."""
+    results = run_suite(sizes=[50], repeat=10, threads=2, log=lambda line: None)
+    assert set(results) == {
+        "crud.create/50", "crud.get/50", "crud.update/50", "crud.delete/50",
+        "list.page/50", "list.full/50", "lookup.cold", "lookup.warm", "mixed/2 threads"
+    }
+    assert results["mixed/2 threads"]["ops"] == 20
+    assert all(result["p50_ms"] <= result["p99_ms"] for result in results.values())
+    assert size_label(1000000) == "1M" and size_label(1500) == "1500"
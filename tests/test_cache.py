@@ -0,0 +1,61 @@
+"""
+Unit tests for the lookup and response caches.
+"""
+from app.cache import DiskCache, LookupCache, ResponseCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted first."""
+    cache = LookupCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+def test_ttl_and_negative_ttl():
+    """Test that negative results expire sooner than positive ones."""
+    clock = FakeClock()
+    cache = LookupCache(ttl=60, negative_ttl=10, clock=clock)
+    cache.set("found", {"success": True})
+    cache.set("missing", {"success": False}, negative=True)
+
+    clock.now = 30
+    assert cache.get("found") == {"success": True}
+    assert cache.get("missing") is None
+
+    clock.now = 61
+    assert cache.get("found") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 2, 2)
+
+def test_disk_tier_survives_restart(tmp_path):
+    """Test that a new cache over the same file sees earlier entries."""
+    path = str(tmp_path / "lookups.sqlite")
+    LookupCache(disk=DiskCache(path)).set("123", {"success": True})
+
+    cache = LookupCache(disk=DiskCache(path))
+    assert cache.get("123") == {"success": True}
+    assert len(cache) == 1
+
+def test_response_cache_versions_and_size():
+    """Test that response cache entries go stale with the data version."""
+    cache = ResponseCache(max_bytes=10)
+    cache.set("a", 1, b"12345", {})
+    assert cache.get("a", 1) == (b"12345", {})
+    assert cache.get("a", 2) is None
+
+    cache.set("b", 1, b"123456", {})
+    assert cache.get("a", 1) is None
+    cache.set("c", 1, b"x" * 11, {})
+    assert cache.get("c", 1) is None
+    assert cache.stats()["bytes"] == 6
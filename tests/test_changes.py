@@ -0,0 +1,45 @@
+"""
+Unit tests for the change feed.
+"""
+import threading
+from app.changes import ChangeFeed
+
+def test_since_and_retention():
+    """Test reading changes and falling out of the retention ring."""
+    feed = ChangeFeed(retention=3, start=0)
+    for item_id in range(1, 6):
+        feed.record("put", item_id, {"id": item_id})
+
+    assert feed.seq == 5
+    assert [c["seq"] for c in feed.since(2)] == [3, 4, 5]
+    assert [c["seq"] for c in feed.since(3, limit=1)] == [4]
+    assert feed.since(5) == []
+    assert feed.since(1) is None
+    assert feed.since(6) is None
+
+    feed.retention = 2
+    assert feed.since(2) is None
+    assert [c["seq"] for c in feed.since(3)] == [4, 5]
+
+def test_zero_retention():
+    """Test a feed that keeps no changes."""
+    feed = ChangeFeed(retention=3, start=0)
+    feed.record("put", 1, {"id": 1})
+    feed.retention = 0
+    assert feed.since(0) is None
+    assert feed.since(1) == []
+
+    feed.record("delete", 1)
+    assert feed.seq == 2
+    assert feed.since(1) is None
+    assert feed.since(2) == []
+
+def test_wait_wakes_on_change():
+    """Test that a waiting reader is woken by a new change."""
+    feed = ChangeFeed(start=0)
+    assert feed.wait(0, timeout=0.01) is False
+
+    timer = threading.Timer(0.05, feed.record, args=("delete", 1))
+    timer.start()
+    assert feed.wait(0, timeout=5) is True
+    assert feed.since(0) == [{"seq": 1, "op": "delete", "id": 1}]
@@ -0,0 +1,116 @@
+"""
+Unit tests for the command-line interface.
+"""
+import pytest
+from app import create_app
+from cli import inventory_cli
+
+class FakeResponse:
+    """Adapt a Flask test response to the parts of requests.Response the CLI uses."""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+
+    def json(self):
+        return self._response.get_json()
+
+    def iter_content(self, chunk_size=1):
+        yield from self._response.response
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise inventory_cli.requests.exceptions.HTTPError(response=self)
+
+@pytest.fixture
+def client(monkeypatch):
+    """Route the CLI's HTTP calls to a Flask test client."""
+    app = create_app({"TESTING": True})
+    client = app.test_client()
+
+    def fake_get(url, params=None, **kwargs):
+        path = url[len(inventory_cli.API_BASE_URL):]
+        return FakeResponse(client.get(path, query_string=params))
+
+    def fake_send(method):
+        def send(url, json=None, headers=None, **kwargs):
+            path = url[len(inventory_cli.API_BASE_URL):]
+            return FakeResponse(client.open(path, method=method, json=json, headers=headers))
+        return send
+
+    monkeypatch.setattr(inventory_cli.requests, "get", fake_get)
+    monkeypatch.setattr(inventory_cli.requests, "post", fake_send("POST"))
+    monkeypatch.setattr(inventory_cli.requests, "patch", fake_send("PATCH"))
+    return client
+
+def test_iter_inventory_follows_cursor(client):
+    """Test that the CLI pages through the inventory lazily."""
+    for n in range(5):
+        client.post("/inventory", json={"product_name": f"CLI {n}", "brands": "CLI Brand"})
+
+    pages = inventory_cli.iter_inventory(page_size=2, brand="CLI Brand")
+    assert [item["product_name"] for item in pages] == [f"CLI {n}" for n in range(5)]
+
+def test_list_inventory(client, capsys):
+    """Test the list command output."""
+    inventory_cli.list_inventory(page_size=1)
+    output = capsys.readouterr().out
+    assert "Organic Almond Milk" in output
+    assert "Total items:" in output
+
+def test_export_inventory(client, tmp_path):
+    """Test that the export command streams the response into a file."""
+    output = tmp_path / "inventory.csv"
+    inventory_cli.export_inventory(str(output), "csv")
+    assert output.read_text().startswith("id,product_name,brands")
+
+def test_import_items(client, tmp_path, capsys):
+    """Test batched CSV import, including a record the API rejects."""
+    path = tmp_path / "manifest.csv"
+    path.write_text(
+        "product_name,brands,quantity,price\n"
+        "Import A,Importer,5,1.50\n"
+        ",Importer,1,1.00\n"
+        "Import B,Importer,7,2.25\n"
+    )
+
+    inventory_cli.import_items(str(path), batch_size=2)
+    output = capsys.readouterr().out
+    assert "Record 2: Missing required fields" in output
+    assert "2 succeeded, 1 failed" in output
+
+    items = client.get("/inventory?brand=Importer").get_json()
+    assert [(item["product_name"], item["quantity"]) for item in items] == [("Import A", 5), ("Import B", 7)]
+
+def test_adjust_item(client, capsys):
+    """Test the adjust command, including overselling."""
+    item = client.post("/inventory", json={"product_name": "CLI Adjust", "quantity": 2}).get_json()
+    inventory_cli.adjust_item(item["id"], -2)
+    assert "is now 0" in capsys.readouterr().out
+
+    inventory_cli.adjust_item(item["id"], -1)
+    assert "Insufficient stock" in capsys.readouterr().out
+
+    client.patch(f"/inventory/{item['id']}", json={"quantity": "3"})
+    inventory_cli.adjust_item(item["id"], -1)
+    output = capsys.readouterr().out
+    assert "not an integer" in output and "Insufficient" not in output
+
+def test_compact_output(monkeypatch, capsys):
+    """Test that --compact prints JSON on one line."""
+    monkeypatch.setattr(inventory_cli, "COMPACT_OUTPUT", True)
+    inventory_cli.pretty_print({"id": 1, "quantity": 2})
+    assert capsys.readouterr().out == '{"id":1,"quantity":2}\n'
+
+def test_show_report(client, capsys):
+    """Test the report command for a rollup and the price distribution."""
+    inventory_cli.show_report("brands", limit=100)
+    output = capsys.readouterr().out
+    assert "Silk | Items:" in output
+    assert "brands" in output.splitlines()[-1]
+
+    inventory_cli.show_report("prices", bins=2)
+    output = capsys.readouterr().out
+    assert "Priced items:" in output
+    assert " p50: $" in output
@@ -0,0 +1,163 @@
+"""
+Unit tests for the in-memory inventory store.
+"""
+import threading
+import pytest
+from app.db import InventoryStore, SEED_ITEMS
+
+@pytest.fixture
+def store():
+    return InventoryStore(SEED_ITEMS)
+
+def test_get_by_id(store):
+    """Test O(1) lookup by ID."""
+    assert store.get(1)["product_name"] == "Organic Almond Milk"
+    assert store.get(9999) is None
+
+def test_seed_items_are_copied(store):
+    """Test that stores do not share the seed dicts."""
+    store.update(1, {"quantity": 0})
+    assert SEED_ITEMS[0]["quantity"] == 25
+
+def test_barcode_index_follows_updates(store):
+    """Test that the barcode index is updated when an item changes."""
+    assert [item["id"] for item in store.find_by_barcode("003766200063")] == [1]
+
+    store.update(1, {"barcode": "111"})
+    assert store.find_by_barcode("003766200063") == []
+    assert [item["id"] for item in store.find_by_barcode("111")] == [1]
+
+    store.delete(1)
+    assert store.find_by_barcode("111") == []
+
+def test_brand_index(store):
+    """Test case-insensitive, multi-brand lookups."""
+    item = store.add({"product_name": "Yogurt", "brands": "Silk, Danone"})
+
+    assert [i["id"] for i in store.find_by_brand("SILK")] == [1, item["id"]]
+    assert [i["id"] for i in store.find_by_brand("danone")] == [item["id"]]
+
+    store.update(item["id"], {"brands": "Danone"})
+    assert [i["id"] for i in store.find_by_brand("silk")] == [1]
+
+    store.delete(item["id"])
+    assert store.find_by_brand("danone") == []
+
+def test_ids_are_not_reused(store):
+    """Test that deleting the newest item does not recycle its ID."""
+    item = store.add({"product_name": "Temp"})
+    store.delete(item["id"])
+    assert store.add({"product_name": "Next"})["id"] == item["id"] + 1
+
+def test_concurrent_adds_get_unique_ids(store):
+    """Test that parallel inserts never hand out duplicate IDs."""
+    def worker():
+        for _ in range(500):
+            store.add({"product_name": "Parallel"})
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(store) == len(SEED_ITEMS) + 8 * 500
+    assert len({item["id"] for item in store.all()}) == len(store)
+
+def test_iter_items_after_compaction(store):
+    """Test that cursors survive deletes and tombstone compaction."""
+    ids = [store.add({"product_name": f"Item {n}"})["id"] for n in range(10)]
+    for item_id in ids[:8]:
+        store.delete(item_id)
+
+    assert [item["id"] for item in store.iter_items()] == [1, 2] + ids[8:]
+    assert [item["id"] for item in store.iter_items(after=ids[5])] == ids[8:]
+    assert [item["id"] for item in store.iter_items(brand="silk")] == [1]
+
+def test_iter_items_ranges(store, monkeypatch):
+    """Test quantity and price ranges, read from an index or checked during the walk."""
+    import app.db
+    items = [store.add({"product_name": f"Item {n}", "quantity": n, "price": n / 2})
+             for n in range(40)]
+    store.add({"product_name": "Uncounted", "quantity": "many", "price": 1.0})
+
+    def ids(**options):
+        return [item["id"] for item in store.iter_items(**options)]
+
+    expected = [item["id"] for item in items[10:13]]
+    for share in (1.0, 0.0):
+        monkeypatch.setattr(app.db, "RANGE_INDEX_MAX_SHARE", share)
+        assert ids(quantity=(10, 12)) == expected
+        assert ids(quantity=(10, None), price=(None, 6.0)) == [1, 2] + expected
+        assert ids(after=expected[0], quantity=(10, 12)) == expected[1:]
+        assert ids(price=(0.5, 1.0), brand="silk") == []
+        # The quantity range selects fewer items than the brand
+        assert ids(quantity=(39, None), brand="silk") == []
+        assert ids(quantity=(25, 25), brand="silk") == [1]
+
+def test_search_follows_mutations(store):
+    """Test that the full-text index is updated incrementally."""
+    item = store.add({"product_name": "Sparkling Water", "brands": "Fizz"})
+    assert [i["id"] for i in store.search("sparkl")] == [item["id"]]
+
+    store.update(item["id"], {"product_name": "Still Water"})
+    assert store.search("sparkling") == []
+    assert [i["id"] for i in store.search("still fizz")] == [item["id"]]
+
+    store.delete(item["id"])
+    assert store.search("still") == []
+
+def test_versions_and_adjust(store):
+    """Test optimistic concurrency and atomic quantity adjustments."""
+    from app.db import VersionConflict, InsufficientStock, InvalidQuantity
+    assert store.get(1)["version"] == 1
+    assert store.update(1, {"price": 5.0}, expected_versions={1})["version"] == 2
+    with pytest.raises(VersionConflict):
+        store.update(1, {"price": 6.0}, expected_versions={1})
+
+    item = store.adjust(1, -5)
+    assert (item["quantity"], item["version"]) == (20, 3)
+    with pytest.raises(InsufficientStock):
+        store.adjust(1, -21)
+    assert store.adjust(9999, 1) is None
+
+    store.update(1, {"quantity": "20"})
+    with pytest.raises(InvalidQuantity):
+        store.adjust(1, 1)
+
+def test_concurrent_adjustments_are_not_lost(store):
+    """Test that concurrent decrements all apply."""
+    threads = [threading.Thread(target=lambda: [store.adjust(1, -1) for _ in range(3)])
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert store.get(1)["quantity"] == 25 - 24
+
+def test_aggregates_follow_mutations(store):
+    """Test that stats and low-stock answers match a scan after every kind of change."""
+    def scan(threshold):
+        items = store.all()
+        low = sorted((item["quantity"], item["id"]) for item in items if item["quantity"] < threshold)
+        value = sum(item["quantity"] * item["price"] for item in items)
+        return len(items), sum(item["quantity"] for item in items), round(value, 2), low
+
+    def answer(threshold):
+        stats = store.stats(threshold)
+        low, count = store.low_stock(threshold, limit=1000)
+        assert count == len(low) == stats["low_stock"]
+        return (stats["items"], stats["total_quantity"], round(stats["total_value"], 2),
+                [(item["quantity"], item["id"]) for item in low])
+
+    added = store.add_many([{"product_name": f"P{n}", "quantity": n, "price": 1.25} for n in range(30)])
+    store.update(added[0]["id"], {"price": 9.99})
+    store.adjust(added[5]["id"], 20)
+    store.update_many([(added[7]["id"], {"quantity": 0}), (1, {"product_name": "Renamed"})])
+    store.delete_many([added[3]["id"], 2])
+    for threshold in (0, 1, 10, 100):
+        assert answer(threshold) == scan(threshold)
+    items, count = store.low_stock(10, limit=3)
+    assert count == 8
+    assert [item["quantity"] for item in items] == [0, 0, 1]
@@ -0,0 +1,104 @@
+"""
+Unit tests for the background enrichment job, run against a local stub server.
+"""
+import json
+import pytest
+from app import create_app, db, enrichment, external_api
+from app.storage import MemoryBackend
+from tests.openfoodfacts_stub import OpenFoodFactsStub
+
+CONFIG = {"TESTING": True, "UPSTREAM_RETRIES": 0, "ENRICHMENT_RATE": 0}
+
+@pytest.fixture
+def stub(monkeypatch):
+    with OpenFoodFactsStub() as stub:
+        monkeypatch.setattr(external_api, "OPENFOODFACTS_API_URL", stub.product_url)
+        yield stub
+
+@pytest.fixture
+def app(stub):
+    return create_app(CONFIG)
+
+@pytest.fixture
+def store(app):
+    """A fresh, empty inventory store."""
+    previous = db.store
+    yield db.configure_storage(MemoryBackend())
+    db.store = previous
+    enrichment.job = None
+
+def add_items(store):
+    return store.add_many([
+        {"product_name": "Milk", "barcode": "003766200063"},
+        {"product_name": "Bread", "barcode": "007225002035", "brands": "Own Label"},
+        {"product_name": "Mystery", "barcode": "000000000000"},
+        {"product_name": "Loose", "brands": ""}
+    ])
+
+def test_job_fills_in_missing_fields_only(store):
+    """Test that empty fields are filled and existing ones kept."""
+    milk, bread, mystery, loose = add_items(store)
+    job = enrichment.EnrichmentJob(batch_size=2, rate=0)
+    job.run()
+
+    assert job.progress["status"] == enrichment.DONE
+    assert job.progress["scanned"] == 4
+    assert job.progress["candidates"] == 3
+    assert job.progress["enriched"] == 2
+    assert job.progress["not_found"] == 1
+    assert store.get(milk["id"])["brands"] == "Silk"
+    assert store.get(bread["id"])["brands"] == "Own Label"
+    assert store.get(bread["id"])["ingredients_text"].startswith("Whole wheat flour")
+    assert store.get(loose["id"]).version == loose.version
+
+def test_paced_job_looks_each_barcode_up_once(store, stub):
+    """Test that pacing does not add cache lookups of its own."""
+    add_items(store)
+    external_api.configure_cache()
+    for _ in range(2):
+        enrichment.EnrichmentJob(rate=1000).run()
+
+    # The second pass looks up only the barcode that was not found
+    stats = external_api.get_lookup_stats()["cache"]
+    assert (stats["hits"], stats["misses"]) == (1, 3)
+    assert len(stub.requests) == 3
+
+def test_job_resumes_from_checkpoint(store, stub, tmp_path):
+    """Test that a failed job keeps its cursor and a later one resumes there."""
+    milk, bread, mystery, loose = add_items(store)
+    checkpoint = str(tmp_path / "enrichment.json")
+
+    job = enrichment.EnrichmentJob(checkpoint, batch_size=1, rate=0)
+    stub.fail = True
+    job.run()
+    saved = enrichment.load_checkpoint(checkpoint)
+    assert saved["status"] == enrichment.FAILED
+    assert saved["after"] == 0
+
+    # Pretend the first item was done before the failure
+    with open(checkpoint, "w") as f:
+        json.dump(dict(saved, after=milk["id"]), f)
+    stub.fail = False
+    job = enrichment.EnrichmentJob(checkpoint, batch_size=1, rate=0)
+    job.run()
+    assert enrichment.load_checkpoint(checkpoint)["status"] == enrichment.DONE
+    assert not store.get(milk["id"]).get("brands")
+    assert store.get(bread["id"])["ingredients_text"]
+
+    # A finished job starts a new pass
+    job = enrichment.EnrichmentJob(checkpoint, rate=0)
+    assert job.progress["after"] == 0
+
+def test_enrichment_endpoints(app, store):
+    """Test starting, following and stopping the job over HTTP."""
+    milk = add_items(store)[0]
+    client = app.test_client()
+    response = client.post("/inventory/enrichment", json={})
+    assert response.status_code == 202
+    enrichment.job.thread.join(5)
+
+    progress = client.get("/inventory/enrichment").get_json()
+    assert progress["status"] == enrichment.DONE
+    assert progress["enriched"] == 2
+    assert store.get(milk["id"])["brands"] == "Silk"
+    assert client.delete("/inventory/enrichment").status_code == 404
@@ -0,0 +1,145 @@
+"""
+Unit tests for the OpenFoodFacts integration, run against a local stub server.
+"""
+import threading
+import time
+import pytest
+from app import create_app, external_api
+from app.ratelimit import BACKGROUND
+from app.singleflight import SingleFlight
+from tests.openfoodfacts_stub import OpenFoodFactsStub
+
+@pytest.fixture
+def stub(monkeypatch):
+    with OpenFoodFactsStub() as stub:
+        monkeypatch.setattr(external_api, "OPENFOODFACTS_API_URL", stub.product_url)
+        monkeypatch.setattr(external_api, "OPENFOODFACTS_SEARCH_URL", stub.search_url)
+        external_api.configure_cache()
+        external_api.configure_client(retries=1, backoff=0)
+        yield stub
+
+def test_fetch_product_by_barcode(stub):
+    """Test a successful barcode lookup."""
+    result = external_api.fetch_product_by_barcode("003766200063")
+    assert result["success"]
+    assert result["product"]["brands"] == "Silk"
+
+def test_barcode_lookups_are_cached(stub):
+    """Test that repeated lookups, including misses, hit the cache."""
+    for _ in range(3):
+        assert external_api.fetch_product_by_barcode("003766200063")["success"]
+        assert external_api.fetch_product_by_barcode("000") == {
+            "success": False, "message": external_api.PRODUCT_NOT_FOUND
+        }
+
+    assert len(stub.requests) == 2
+    stats = external_api.get_lookup_stats()["cache"]
+    assert (stats["hits"], stats["misses"]) == (4, 2)
+
+def test_not_found_answered_with_404(stub):
+    """Test that a 404 "product not found" answer is a cached miss, not a failure."""
+    stub.not_found_status = 404
+    client = create_app({"TESTING": True}).test_client()
+    for _ in range(2):
+        assert client.get("/lookup/barcode/000").status_code == 404
+    assert len(stub.requests) == 1
+
+def test_failed_requests_are_not_cached(stub):
+    """Test that transport errors are retried on the next lookup."""
+    stub.fail = True
+    result = external_api.fetch_product_by_barcode("003766200063")
+    assert result["message"].startswith("API request failed")
+    stub.fail = False
+    assert external_api.fetch_product_by_barcode("003766200063")["success"]
+
+def test_search_products_by_name(stub):
+    """Test a name search."""
+    result = external_api.search_products_by_name("bread")
+    assert result["success"]
+    assert result["products"][0]["barcode"] == "007225002035"
+
+def test_lookup_barcodes_dedupes_and_keeps_order(stub):
+    """Test that batch lookups fetch each barcode once and keep input order."""
+    barcodes = ["007225002035", "000", "003766200063", "007225002035"]
+    results = external_api.lookup_barcodes(barcodes, max_workers=4)
+
+    assert [result["barcode"] for result in results] == barcodes
+    assert [result["success"] for result in results] == [True, False, True, True]
+    assert len(stub.requests) == 3
+
+def test_lookup_barcode_batch_endpoint(stub):
+    """Test POST /lookup/barcode/batch per-barcode statuses."""
+    client = create_app({"TESTING": True, "UPSTREAM_RETRIES": 0}).test_client()
+    response = client.post("/lookup/barcode/batch", json={"barcodes": ["003766200063", "000"]})
+    assert [result["status"] for result in response.get_json()["results"]] == [200, 404]
+
+    stub.fail = True
+    response = client.post("/lookup/barcode/batch", json={"barcodes": ["007225002035"]})
+    assert response.get_json()["results"][0]["status"] == 502
+
+    assert client.post("/lookup/barcode/batch", json={"barcodes": []}).status_code == 400
+
+def test_concurrent_lookups_are_coalesced(stub, monkeypatch):
+    """Test that simultaneous lookups of one barcode share a single request."""
+    stub.latency = 0.2
+    external_api.configure_cache(ttl=0, negative_ttl=0)
+    flights = SingleFlight()
+    monkeypatch.setattr(external_api, "barcode_flights", flights)
+    results = []
+
+    def lookup():
+        results.append(external_api.fetch_product_by_barcode("003766200063"))
+
+    threads = [threading.Thread(target=lookup) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(result["success"] for result in results)
+    assert len(stub.requests) == 1
+    assert flights.stats() == {"in_flight": 0, "executed": 1, "coalesced": 9}
+
+def test_interactive_lookup_does_not_join_background_one(stub, monkeypatch):
+    """Test that an interactive lookup is not held up by a throttled background one."""
+    # Background lookups must leave one token, which a burst of one never allows
+    external_api.configure_client(retries=0, rate_limit={
+        "rate": 5, "burst": 1, "reserve": 1, "background_wait": 1
+    })
+    flights = SingleFlight()
+    monkeypatch.setattr(external_api, "barcode_flights", flights)
+    background = threading.Thread(
+        target=external_api.fetch_product_by_barcode, args=("003766200063", BACKGROUND))
+    background.start()
+    while not flights.stats()["in_flight"]:
+        time.sleep(0.01)
+
+    start = time.monotonic()
+    assert external_api.fetch_product_by_barcode("003766200063")["success"]
+    assert time.monotonic() - start < 0.5
+    background.join()
+    assert flights.stats()["coalesced"] == 0
+
+def test_lookup_by_name_falls_back_to_upstream(stub):
+    """Test that names missing from the inventory are searched upstream."""
+    stub.products["999"] = {"product_name": "Kombucha Zeta", "brands": "Brewers"}
+    client = create_app({"TESTING": True}).test_client()
+
+    data = client.get("/lookup/name/kombucha").get_json()
+    assert data["source"] == "openfoodfacts"
+    assert data["products"][0]["barcode"] == "999"
+
+def test_lookup_failures_are_not_reported_as_missing(stub):
+    """Test that upstream failures and an exhausted budget are not 404s."""
+    app = create_app({"TESTING": True, "UPSTREAM_RETRIES": 0, "UPSTREAM_RATE": 0.1,
+                      "UPSTREAM_BURST": 1, "UPSTREAM_INTERACTIVE_WAIT": 0})
+    client = app.test_client()
+    stub.fail = True
+    assert client.get("/lookup/barcode/003766200063").status_code == 502
+
+    stub.fail = False
+    response = client.get("/lookup/barcode/007225002035")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "10"
+    assert response.get_json()["retry_after"] == pytest.approx(10, abs=0.1)
+    assert len(stub.requests) == 1
@@ -0,0 +1,60 @@
+"""
+Unit tests for request metrics, the /metrics endpoint and request profiling.
+"""
+from app import create_app
+from app.metrics import Histogram, registry, upstream_errors, upstream_request_seconds
+from app.upstream import UpstreamClient
+from tests.openfoodfacts_stub import OpenFoodFactsStub
+
+def test_histogram_renders_cumulative_buckets():
+    """Test the Prometheus text output of a histogram."""
+    histogram = Histogram("op_seconds", "Op time.", ("op",), buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.7, 3):
+        histogram.observe(value, "get")
+    lines = list(histogram.render())
+    assert lines == [
+        'op_seconds_bucket{op="get",le="0.1"} 1',
+        'op_seconds_bucket{op="get",le="1"} 3',
+        'op_seconds_bucket{op="get",le="+Inf"} 4',
+        'op_seconds_sum{op="get"} 4.25',
+        'op_seconds_count{op="get"} 4'
+    ]
+
+def test_metrics_endpoint_reports_requests_store_and_caches():
+    """Test that API requests show up on GET /metrics."""
+    client = create_app({"TESTING": True}).test_client()
+    client.get("/inventory/1")
+    client.get("/inventory")
+    client.get("/inventory")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    text = response.get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{method="GET",route="/inventory/<int:item_id>",status="200"}' in text
+    assert 'inventory_store_operation_seconds_count{operation="get"}' in text
+    assert 'cache_hit_ratio{cache="response"} 0.5' in text
+    assert 'cache_hits_total{cache="lookup"}' in text
+
+def test_upstream_errors_are_counted():
+    """Test that failed upstream attempts are timed and counted by reason."""
+    errors = upstream_errors.value("http_error")
+    attempts = upstream_request_seconds.count("http_error")
+    with OpenFoodFactsStub() as stub:
+        stub.fail = True
+        UpstreamClient(retries=1, backoff=0).get(f"{stub.product_url}1.json")
+    assert upstream_errors.value("http_error") == errors + 2
+    assert upstream_request_seconds.count("http_error") == attempts + 2
+    assert "upstream_errors_total" in registry.render()
+
+def test_profile_query_returns_summary_when_enabled():
+    """Test that ?profile=1 is answered with a cProfile summary only when enabled."""
+    client = create_app({"TESTING": True, "PROFILE_REQUESTS": True}).test_client()
+    response = client.get("/inventory?profile=1")
+    text = response.get_data(as_text=True)
+    assert response.content_type.startswith("text/plain")
+    assert text.startswith("GET /inventory: 200 OK")
+    assert "function calls" in text
+
+    client = create_app({"TESTING": True}).test_client()
+    assert client.get("/inventory?profile=1").is_json
@@ -0,0 +1,38 @@
+"""
+Unit tests for the compact inventory item model.
+"""
+import json
+import pytest
+from app.models import InventoryItem, to_json_default
+
+def test_round_trip_and_extra_fields():
+    """Test that known and unknown fields survive conversion to a dict."""
+    data = {"id": 1, "product_name": "Tea", "price": 2.5, "categories": "Drinks"}
+    item = InventoryItem.from_dict(data)
+
+    assert item.to_dict() == data
+    assert item["categories"] == "Drinks"
+    assert "barcode" not in item
+    assert item.get("barcode", "") == ""
+    with pytest.raises(KeyError):
+        item["barcode"]
+
+def test_brands_are_interned():
+    """Test that equal brand strings share one object."""
+    first = InventoryItem({"brands": "".join(["Si", "lk"])})
+    second = InventoryItem({"brands": "".join(["Sil", "k"])})
+    assert first.brands is second.brands
+
+def test_replace_is_copy_on_write():
+    """Test that replace() returns a new record and keeps the ID."""
+    item = InventoryItem({"id": 1, "quantity": 5})
+    updated = item.replace({"id": 99, "quantity": 4})
+
+    assert (item["quantity"], updated["quantity"], updated["id"]) == (5, 4, 1)
+    with pytest.raises(AttributeError):
+        item.quantity = 0
+
+def test_json_default():
+    """Test serializing records with the json.dumps hook."""
+    item = InventoryItem({"id": 1, "product_name": "Tea"})
+    assert json.loads(json.dumps([item], default=to_json_default)) == [{"id": 1, "product_name": "Tea"}]
@@ -0,0 +1,75 @@
+"""
+Unit tests for the upstream rate limiter.
+"""
+import asyncio
+import threading
+import time
+import pytest
+from app.ratelimit import BACKGROUND, INTERACTIVE, RateLimiter, TokenBucket, create_limiter, fcntl
+from tests.test_upstream import FakeClock
+
+def test_bucket_allows_bursts_then_refills():
+    """Test that a full bucket allows a burst and then one token per interval."""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock)
+    assert [bucket.take() for _ in range(3)] == [0, 0, 0]
+    assert bucket.take() == 0.5
+    clock.now = 0.5
+    assert bucket.take() == 0
+    clock.now = 100
+    assert [bucket.take() for _ in range(4)] == [0, 0, 0, 0.5]
+
+def test_background_callers_leave_the_reserve():
+    """Test that only interactive callers may take the reserved tokens."""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, burst=3, clock=clock)
+    assert bucket.take(reserve=2) == 0
+    assert bucket.take(reserve=2) == 1
+    assert bucket.take() == 0
+    assert bucket.take() == 0
+    assert bucket.take() == 1
+
+@pytest.mark.skipif(fcntl is None, reason="Shared buckets need fcntl")
+def test_buckets_on_one_file_share_a_budget(tmp_path):
+    """Test that buckets opened on the same file draw from one budget."""
+    path = str(tmp_path / "upstream.bucket")
+    first, second = TokenBucket(1, 2, path), TokenBucket(1, 2, path)
+    try:
+        assert first.take() == 0
+        assert second.take() == 0
+        assert first.take() > 0
+        assert second.take() > 0
+    finally:
+        first.close()
+        second.close()
+
+def test_waits_are_bounded_per_lane():
+    """Test that callers queue up to their lane's wait and then give up."""
+    limiter = RateLimiter(TokenBucket(rate=20, burst=1), interactive_wait=0.2, background_wait=0.01)
+    assert limiter.acquire() == 0
+    # The next token is 50ms away: too long for the background lane
+    assert limiter.acquire(BACKGROUND) > 0
+    assert limiter.acquire(INTERACTIVE) == 0
+    assert asyncio.run(limiter.acquire_async(BACKGROUND)) > 0
+    assert asyncio.run(limiter.acquire_async(INTERACTIVE)) == 0
+
+def test_interactive_callers_go_first():
+    """Test that a background caller stands aside while an interactive one waits."""
+    limiter = RateLimiter(TokenBucket(rate=20, burst=1), interactive_wait=1, background_wait=1)
+    assert limiter.acquire() == 0
+    order = []
+
+    def acquire(lane):
+        assert limiter.acquire(lane) == 0
+        order.append(lane)
+
+    interactive = threading.Thread(target=acquire, args=(INTERACTIVE,))
+    interactive.start()
+    time.sleep(0.01)
+    acquire(BACKGROUND)
+    interactive.join()
+    assert order == [INTERACTIVE, BACKGROUND]
+
+def test_no_rate_means_no_limiter():
+    assert create_limiter(None) is None
+    assert create_limiter(0) is None
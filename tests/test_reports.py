@@ -0,0 +1,133 @@
+"""
+Unit tests for the catalog reports.
+"""
+import random
+import pytest
+from app import create_app, db, reports
+from app.storage import MemoryBackend
+
+def make_items(count, seed=0):
+    rng = random.Random(seed)
+    items = []
+    for n in range(count):
+        item = {"id": n + 1, "brands": rng.choice(["Acme", "Globex, Initech", "", None])}
+        if rng.random() < 0.9:
+            item["quantity"] = rng.randint(0, 50)
+        if rng.random() < 0.9:
+            item["price"] = rng.choice([0.99, 1.5, 2.25, 10.0, rng.uniform(0, 20)])
+        if rng.random() < 0.5:
+            item["categories"] = rng.choice(["Snacks", "Drinks, Juices"])
+        items.append(item)
+    return items
+
+def make_changes(items, count, seed=0):
+    rng = random.Random(seed)
+    changes = []
+    for seq in range(count):
+        item = rng.choice(items)
+        if rng.random() < 0.05:
+            changes.append({"seq": seq, "op": "delete", "id": item["id"]})
+        else:
+            changes.append({"seq": seq, "op": "put", "id": item["id"],
+                            "item": dict(item, quantity=rng.randint(0, 50))})
+    return changes
+
+@pytest.fixture
+def pure_python(monkeypatch):
+    monkeypatch.setattr(reports, "np", None)
+
+@pytest.mark.skipif(reports.np is None, reason="NumPy is not installed")
+def test_numpy_and_pure_python_agree(monkeypatch):
+    """Test that the vectorized reports match the pure-Python ones."""
+    items = make_items(2000)
+    changes = make_changes(items[:1500], 5000)
+
+    def run():
+        snapshot = reports.Snapshot(items)
+        return (reports.rollup(snapshot, "brand"), reports.rollup(snapshot, "category"),
+                reports.price_distribution(snapshot, 7), reports.turnover(snapshot, changes, "brand"))
+
+    vectorized = run()
+    monkeypatch.setattr(reports, "np", None)
+    assert run() == vectorized
+
+def test_equal_prices_fill_one_bin(monkeypatch):
+    """Test the histogram of a catalog where every item has the same price."""
+    items = [{"id": n, "price": 2.5} for n in range(1, 4)]
+    expected = {"edges": [2.5, 2.5], "counts": [3]}
+    assert reports.price_distribution(reports.Snapshot(items), 4)["histogram"] == expected
+    monkeypatch.setattr(reports, "np", None)
+    assert reports.price_distribution(reports.Snapshot(items), 4)["histogram"] == expected
+
+def test_rollup_and_turnover(pure_python):
+    """Test group totals and units out on a small catalog."""
+    items = [
+        {"id": 1, "brands": "Acme, Other", "quantity": 4, "price": 2.5},
+        {"id": 2, "brands": "Acme", "quantity": 6, "price": 1.0},
+        {"id": 3, "quantity": 10},
+        {"id": 4, "brands": "Globex", "quantity": "lots", "price": 8.0}
+    ]
+    snapshot = reports.Snapshot(items)
+    assert reports.rollup(snapshot) == [
+        {"brand": "Acme", "items": 2, "units": 10, "value": 16.0,
+         "avg_price": 1.75, "min_price": 1.0, "max_price": 2.5},
+        {"brand": reports.NO_GROUP, "items": 1, "units": 10, "value": 0.0,
+         "avg_price": None, "min_price": None, "max_price": None},
+        {"brand": "Globex", "items": 1, "units": 0, "value": 0.0,
+         "avg_price": 8.0, "min_price": 8.0, "max_price": 8.0}
+    ]
+
+    changes = [
+        {"seq": 1, "op": "put", "id": 1, "item": {"id": 1, "quantity": 9}},
+        {"seq": 2, "op": "put", "id": 2, "item": {"id": 2, "quantity": 8}},
+        {"seq": 3, "op": "put", "id": 1, "item": {"id": 1, "quantity": 6}},
+        {"seq": 4, "op": "put", "id": 1, "item": {"id": 1, "quantity": 7}},
+        {"seq": 5, "op": "put", "id": 2, "item": {"id": 2, "quantity": 6}},
+        {"seq": 6, "op": "put", "id": 1, "item": {"id": 1, "quantity": 4}},
+        {"seq": 7, "op": "put", "id": 9, "item": {"id": 9, "quantity": 5}},
+        {"seq": 8, "op": "put", "id": 9, "item": {"id": 9, "quantity": 1}},
+        {"seq": 9, "op": "delete", "id": 9}
+    ]
+    rows = reports.turnover(snapshot, changes)
+    assert rows[0] == {"brand": "Acme", "units_out": 8, "stock": 10, "turnover": 0.8}
+
+def test_price_distribution(pure_python):
+    """Test percentiles and a histogram including the top price."""
+    snapshot = reports.Snapshot([{"id": n, "price": float(n)} for n in range(1, 11)])
+    result = reports.price_distribution(snapshot, bins=3)
+    assert result["count"] == 10
+    assert result["mean"] == 5.5
+    assert result["percentiles"]["p50"] == 5.5
+    assert result["percentiles"]["p90"] == 9.1
+    assert result["histogram"] == {"edges": [1.0, 4.0, 7.0, 10.0], "counts": [3, 3, 4]}
+    assert reports.price_distribution(reports.Snapshot([]))["count"] == 0
+
+def test_report_endpoints():
+    """Test the GET /reports/... endpoints against a fresh store."""
+    app = create_app({"TESTING": True})
+    client = app.test_client()
+    previous = db.store
+    store = db.configure_storage(MemoryBackend())
+    try:
+        store.add_many([{"product_name": f"R{n}", "brands": "Acme" if n % 2 else "Globex",
+                         "quantity": 10, "price": 1.0 + n} for n in range(4)])
+        for item_id in (1, 3):
+            client.post(f"/inventory/{item_id}/adjust", json={"delta": -4})
+
+        brands = client.get("/reports/brands").get_json()
+        assert brands["groups"] == 2
+        assert brands["rows"][0] == {"brand": "Acme", "items": 2, "units": 20, "value": 60.0,
+                                     "avg_price": 3.0, "min_price": 2.0, "max_price": 4.0}
+        assert client.get("/reports/brands?limit=1").get_json()["rows"] == brands["rows"][:1]
+        assert client.get("/reports/categories").get_json()["rows"][0]["category"] == reports.NO_GROUP
+        assert client.get("/reports/prices?bins=3").get_json()["histogram"]["counts"] == [1, 1, 2]
+
+        turnover = client.get("/reports/turnover").get_json()
+        assert turnover["window"]["changes"] == 6
+        assert turnover["rows"][0] == {"brand": "Globex", "units_out": 8, "stock": 12,
+                                       "turnover": 0.6667}
+
+        assert client.get("/reports/prices?bins=0").status_code == 400
+        assert client.get("/reports/turnover?by=colour").status_code == 400
+    finally:
+        db.store = previous
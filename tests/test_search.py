@@ -0,0 +1,45 @@
+"""
+Unit tests for the full-text search index.
+"""
+from app.search import SearchIndex, tokenize
+
+def test_tokenize():
+    """Test lower-casing and punctuation handling."""
+    assert tokenize("Nature's Own, Whole-Wheat") == ["nature", "s", "own", "whole", "wheat"]
+    assert tokenize(None) == []
+
+def test_prefix_match_and_ranking():
+    """Test that name matches outrank ingredient matches and prefixes work."""
+    index = SearchIndex()
+    index.add(1, {"product_name": "Organic Almond Milk", "ingredients_text": "water, almonds"})
+    index.add(2, {"product_name": "Granola", "ingredients_text": "oats, almond pieces"})
+    index.add(3, {"product_name": "Oat Milk", "brands": "Oatly"})
+
+    assert index.search("almond") == [1, 2]
+    assert index.search("alm") == [1, 2]
+    assert index.search("milk oat") == [3]
+    assert index.search("milk", limit=1) == [1]
+    assert index.search("cheese") == []
+
+def test_remove():
+    """Test that removed documents and their terms disappear."""
+    index = SearchIndex()
+    index.add(1, {"product_name": "Oat Milk"})
+    index.add(2, {"product_name": "Oat Bar"})
+    index.remove(1)
+
+    assert index.search("oat") == [2]
+    assert index.search("mil") == []
+    assert len(index) == 1
+
+def test_vocabulary_merge(monkeypatch):
+    """Test prefix matches across buffered and merged vocabulary terms."""
+    monkeypatch.setattr("app.search.MIN_MERGE_THRESHOLD", 4)
+    index = SearchIndex()
+    for n in range(20):
+        index.add(n, {"product_name": f"Widget w{n:02d}"})
+    index.remove(3)
+
+    assert index._vocabulary
+    assert sorted(index.search("w0")) == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+    assert index.search("w19") == [19]
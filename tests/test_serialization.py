@@ -0,0 +1,24 @@
+"""
+Unit tests for JSON serialization.
+"""
+import json
+import pytest
+from app import create_app, serialization
+from app.models import InventoryItem
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_provider_round_trip(monkeypatch, use_orjson):
+    """Test that both encoders produce the same data."""
+    if not use_orjson:
+        monkeypatch.setattr(serialization, "orjson", None)
+    elif serialization.orjson is None:
+        pytest.skip("orjson is not installed")
+    app = create_app({"TESTING": True})
+    item = InventoryItem({"id": 1, "product_name": "Café", "quantity": 2, "extra_field": {3: "x"}})
+
+    with app.app_context():
+        body = app.json.response([item]).get_data()
+        assert json.loads(body) == [{"id": 1, "product_name": "Café", "quantity": 2,
+                                     "extra_field": {"3": "x"}}]
+        assert app.json.loads(app.json.dumps({"big": 2 ** 70})) == {"big": 2 ** 70}
+    assert json.loads(serialization.dumps(item))["product_name"] == "Café"
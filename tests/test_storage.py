@@ -0,0 +1,148 @@
+"""
+Unit tests for the persistent storage backends.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app import create_app, db
+from app.db import InventoryStore, VersionConflict, configure_storage
+from app.storage import SharedSQLiteBackend, SQLiteBackend, WALBackend
+
+@pytest.fixture(autouse=True)
+def restore_store():
+    """Put the shared mock store back after tests that replace it."""
+    original = db.store
+    yield
+    if db.store is not original:
+        db.store.close()
+        db.store = original
+
+def reopen(backend_factory):
+    """Close the current store and load a new one from a fresh backend."""
+    db.store.close()
+    return configure_storage(backend_factory())
+
+@pytest.mark.parametrize("factory", [
+    lambda path: WALBackend(str(path / "wal")),
+    lambda path: SQLiteBackend(str(path / "inventory.sqlite")),
+    lambda path: SharedSQLiteBackend(str(path / "inventory.sqlite"))
+], ids=["wal", "sqlite", "shared"])
+def test_state_survives_restart(tmp_path, factory):
+    """Test that adds, updates and deletes are recovered after a restart."""
+    store = configure_storage(factory(tmp_path))
+    milk = store.add({"product_name": "Milk", "quantity": 1})
+    bread = store.add({"product_name": "Bread", "quantity": 2})
+    store.update(milk["id"], {"quantity": 5})
+    store.delete(bread["id"])
+
+    store = reopen(lambda: factory(tmp_path))
+    assert [(item["product_name"], item["quantity"]) for item in store.all()] == [("Milk", 5)]
+    assert store.add({"product_name": "Eggs"})["id"] == bread["id"] + 1
+
+def shared_stores(path, count=2):
+    """Open stores over one database, as separate worker processes would."""
+    stores = []
+    for _ in range(count):
+        backend = SharedSQLiteBackend(str(path / "inventory.sqlite"))
+        state = backend.load()
+        items, next_id = state if state is not None else ([], 1)
+        stores.append(InventoryStore(items, next_id=next_id, backend=backend))
+    return stores
+
+def test_shared_backend_keeps_stores_consistent(tmp_path):
+    """Test that stores sharing a backend see each other's writes and IDs."""
+    first, second = shared_stores(tmp_path)
+    milk = first.add({"product_name": "Milk", "quantity": 1})
+    bread = second.add({"product_name": "Bread", "quantity": 2})
+    assert bread["id"] == milk["id"] + 1
+
+    first.sync()
+    assert [item["product_name"] for item in first.all()] == ["Milk", "Bread"]
+    second.update(milk["id"], {"quantity": 5})
+    second.delete(bread["id"])
+    first.sync()
+    assert [(item["product_name"], item["quantity"]) for item in first.all()] == [("Milk", 5)]
+    # Both stores number their change feeds the same way
+    assert first.changes.seq == second.changes.seq == 4
+    assert [change["op"] for change in first.changes.since(0)] == ["put", "put", "put", "delete"]
+
+def test_shared_backend_checks_versions_across_stores(tmp_path):
+    """Test that a write catches up with other stores before checking versions."""
+    first, second = shared_stores(tmp_path)
+    milk = first.add({"product_name": "Milk", "quantity": 1})
+    second.sync()
+    second.update(milk["id"], {"quantity": 2}, expected_versions={1})
+    with pytest.raises(VersionConflict):
+        first.update(milk["id"], {"quantity": 3}, expected_versions={1})
+    assert first.get(milk["id"])["quantity"] == 2
+
+def test_shared_backend_concurrent_adjustments(tmp_path):
+    """Test that adjustments from several stores and threads are all applied."""
+    stores = shared_stores(tmp_path, 3)
+    item_id = stores[0].add({"product_name": "Milk", "quantity": 0})["id"]
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        list(pool.map(lambda n: stores[n % 3].adjust(item_id, 1), range(300)))
+    for store in stores:
+        store.sync()
+        assert store.get(item_id)["quantity"] == 300
+        assert store.get(item_id)["version"] == 301
+
+def test_shared_backend_reloads_after_log_pruning(tmp_path):
+    """Test that a store too far behind the log reloads every item."""
+    first, second = shared_stores(tmp_path)
+    second._backend.log_retention = 10
+    second.add_many([{"product_name": f"Item {n}"} for n in range(1000)])
+    first.sync()
+    assert len(first) == 1000
+    assert first.changes.seq == 1000
+    assert first.changes.since(0) is None
+
+def test_wal_snapshot_and_compaction(tmp_path):
+    """Test that snapshots replace old log segments and recovery replays the tail."""
+    directory = str(tmp_path / "wal")
+    store = configure_storage(WALBackend(directory, snapshot_every=10))
+    for n in range(25):
+        store.add({"product_name": f"Item {n}", "quantity": n})
+    store.delete(1)
+
+    store = reopen(lambda: WALBackend(directory))
+    assert os.path.exists(os.path.join(directory, WALBackend.SNAPSHOT))
+    assert len(os.listdir(directory)) <= 3
+    assert len(store) == 24
+    assert store.get(25)["quantity"] == 24
+    assert store.next_id == 26
+
+def test_wal_ignores_torn_write(tmp_path):
+    """Test that a partially written last record does not prevent startup."""
+    directory = str(tmp_path / "wal")
+    configure_storage(WALBackend(directory)).add({"product_name": "Kept"})
+    db.store.close()
+    segment = WALBackend(directory)._segments()[-1]
+    with open(segment, "ab") as f:
+        f.write(b'{"op": "put", "item": {"id": 9')
+
+    store = configure_storage(WALBackend(directory))
+    assert [item["product_name"] for item in store.all()] == ["Kept"]
+
+def test_create_app_with_storage(tmp_path):
+    """Test that INVENTORY_STORAGE makes API writes durable."""
+    config = {"TESTING": True, "INVENTORY_STORAGE": f"sqlite:///{tmp_path / 'api.sqlite'}"}
+    client = create_app(config).test_client()
+    assert client.get("/inventory").get_json() == []
+    client.post("/inventory", json={"product_name": "Persisted"})
+
+    client = create_app(config).test_client()
+    assert client.get("/inventory").get_json()[0]["product_name"] == "Persisted"
+
+def test_server_workers_need_shared_storage(tmp_path, monkeypatch):
+    """Test that several server workers are only allowed with a shared backend."""
+    from app.server import server_options
+    monkeypatch.setenv("FLASK_SERVER_WORKERS", "4")
+    app = create_app({"TESTING": True})
+    with pytest.raises(ValueError):
+        server_options(app.config)
+
+    monkeypatch.setenv("FLASK_INVENTORY_STORAGE", f"sqlite+shared:///{tmp_path / 'api.sqlite'}")
+    app = create_app({"TESTING": True})
+    assert db.store.shared
+    assert server_options(app.config)["workers"] == 4
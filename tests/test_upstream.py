@@ -0,0 +1,135 @@
+"""
+Unit tests for the upstream HTTP client, run against a local stub server.
+"""
+import threading
+from contextlib import contextmanager
+import pytest
+import requests
+from app.ratelimit import RateLimiter, TokenBucket
+from app.upstream import CircuitBreaker, CircuitOpenError, RateLimitedError, UpstreamClient
+from tests.openfoodfacts_stub import OpenFoodFactsStub
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def stub():
+    with OpenFoodFactsStub() as stub:
+        yield stub
+
+def test_connections_are_reused(stub):
+    """Test that consecutive requests share one pooled connection."""
+    client = UpstreamClient(retries=0)
+    for _ in range(3):
+        assert client.get(f"{stub.product_url}003766200063.json").status_code == 200
+    pool = client._adapter.poolmanager.connection_from_url(stub.url)
+    assert pool.num_connections == 1
+
+def test_retries_on_server_errors(stub):
+    """Test that 5xx responses are retried before giving up."""
+    stub.fail = True
+    client = UpstreamClient(retries=2, backoff=0)
+    assert client.get(f"{stub.product_url}1.json").status_code == 503
+    assert len(stub.requests) == 3
+
+def test_read_timeout(stub):
+    """Test that a stalled upstream raises instead of hanging."""
+    stub.latency = 0.5
+    client = UpstreamClient(read_timeout=0.05, retries=0)
+    with pytest.raises(requests.exceptions.Timeout):
+        client.get(f"{stub.product_url}1.json")
+
+def test_circuit_breaker_fails_fast(stub):
+    """Test that an open circuit stops requests until the reset timeout."""
+    clock = FakeClock()
+    client = UpstreamClient(retries=0, breaker=CircuitBreaker(2, 10, clock=clock))
+    stub.fail = True
+    client.get(f"{stub.product_url}1.json")
+    client.get(f"{stub.product_url}1.json")
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        client.get(f"{stub.product_url}1.json")
+    assert len(stub.requests) == 2
+
+    stub.fail = False
+    clock.now = 10
+    assert client.breaker.state == CircuitBreaker.HALF_OPEN
+    assert client.get(f"{stub.product_url}1.json").status_code == 200
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+def open_circuit(client, stub, clock):
+    """Open the client's circuit, then let the reset timeout pass."""
+    stub.fail = True
+    for _ in range(client.breaker.failure_threshold):
+        client.get(f"{stub.product_url}1.json")
+    stub.fail = False
+    clock.now += client.breaker.reset_timeout
+    assert client.breaker.state == CircuitBreaker.HALF_OPEN
+
+def test_rate_limited_trial_does_not_wedge_the_circuit(stub):
+    """Test that a half-open trial refused by the rate limiter frees the trial slot."""
+    clock, bucket_clock = FakeClock(), FakeClock()
+    # Two tokens, both spent opening the circuit
+    limiter = RateLimiter(TokenBucket(rate=1, burst=2, clock=bucket_clock), interactive_wait=0)
+    client = UpstreamClient(retries=0, breaker=CircuitBreaker(2, 10, clock=clock), limiter=limiter)
+    open_circuit(client, stub, clock)
+
+    with pytest.raises(RateLimitedError):
+        client.get(f"{stub.product_url}1.json")
+    bucket_clock.now = 1
+    assert client.get(f"{stub.product_url}1.json").status_code == 200
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+def test_unexpected_error_in_trial_reopens_the_circuit(stub, monkeypatch):
+    """Test that a half-open trial ending in any other error counts as a failure."""
+    clock = FakeClock()
+    client = UpstreamClient(retries=0, breaker=CircuitBreaker(2, 10, clock=clock))
+    open_circuit(client, stub, clock)
+
+    def redirect_loop(*args, **kwargs):
+        raise requests.exceptions.TooManyRedirects("Exceeded 30 redirects.")
+
+    monkeypatch.setattr(client._session(), "get", redirect_loop)
+    with pytest.raises(requests.exceptions.TooManyRedirects):
+        client.get(f"{stub.product_url}1.json")
+    assert client.breaker.state == CircuitBreaker.OPEN
+    monkeypatch.undo()
+    clock.now += client.breaker.reset_timeout
+    assert client.get(f"{stub.product_url}1.json").status_code == 200
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+def test_per_host_concurrency_cap(stub):
+    """Test that no more than max_per_host requests run at once."""
+    stub.latency = 0.05
+    client = UpstreamClient(max_per_host=2, retries=0)
+    in_flight = peak = 0
+    lock = threading.Lock()
+    original_slot = client._host_slot
+
+    @contextmanager
+    def counting_slot(url):
+        nonlocal in_flight, peak
+        with original_slot(url):
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            try:
+                yield
+            finally:
+                with lock:
+                    in_flight -= 1
+
+    client._host_slot = counting_slot
+    threads = [threading.Thread(target=client.get, args=(f"{stub.product_url}1.json",))
+               for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak == 2
+    assert len(stub.requests) == 6